@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script benchmarks the util and versioning scripts against synthetic repos
+# (see synthetic_repos.py) with local bare origins, so that results can be compared
+# across versions of the library.
+#
+# Phases:
+#   cold-start  interpreter start and imports of each script, i.e. `<script> -h`
+#   yaml        in-process parse and dump of an app CI info file, per file size
+#   tags        in-process latest tag resolution, per tag count
+#   git         in-process commit and push to the CI info repo, per number of apps
+#   scripts     end to end runs of each script, per file size, tag count and number of apps
+#
+# Argument 1 (-n, --runs): Runs per case. Defaults to 10
+# Argument 2 (-t, --tags): Comma separated tag counts of the synthetic app repos. Defaults to 10,1000
+# Argument 3 (-e, --environments): Comma separated blue/green environment counts of the synthetic app CI
+#                                  info files, i.e. file sizes. Defaults to 10,200
+# Argument 4 (-a, --apps): Comma separated app counts of the synthetic CI info repos. Defaults to 10,200
+# Argument 5 (-p, --phases): Comma separated phases to run. Defaults to all
+# Argument 6 (-o, --output): Also write the results as JSON to this file
+# Argument 7 (-c, --compare): Compare the median times against the JSON results of an earlier run
+# Argument 8 (--json): Print results as JSON instead of a table
+###############################################################################
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic_repos
+
+libraryDir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, libraryDir)
+from util import ci_info
+from util import ci_info_cache
+from util import yaml_stream
+from util.git_repo import GitRepo
+from versioning import tag_index
+
+PHASES = ['cold-start', 'yaml', 'tags', 'git', 'scripts']
+SCRIPTS = {
+    'read-from-yml': 'util/read-from-yml.py',
+    'write-to-yml': 'util/write-to-yml.py',
+    'commit-changes': 'util/commit-changes.py',
+    'inc-build-number': 'versioning/inc-build-number.py',
+    'generate-version': 'versioning/generate-version.py',
+    'tag-release': 'versioning/tag-release.py',
+    'version-pipeline': 'versioning/version-pipeline.py',
+}
+
+
+def parseCounts(value):
+    return [int(count) for count in value.split(',') if count]
+
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-n', '--runs', dest='n', type=int, default=10)
+argParse.add_argument('-t', '--tags', dest='t', type=parseCounts, default=[10, 1000])
+argParse.add_argument('-e', '--environments', dest='e', type=parseCounts, default=[10, 200])
+argParse.add_argument('-a', '--apps', dest='a', type=parseCounts, default=[10, 200])
+argParse.add_argument('-p', '--phases', dest='p', type=lambda value: value.split(','), default=PHASES)
+argParse.add_argument('-o', '--output', dest='o')
+argParse.add_argument('-c', '--compare', dest='c')
+argParse.add_argument('--json', dest='json', action='store_true')
+
+opts = argParse.parse_args()
+
+unknownPhases = [phase for phase in opts.p if phase not in PHASES]
+if unknownPhases:
+    exit('Unknown phases: {}. Phases are: {}'.format(', '.join(unknownPhases), ', '.join(PHASES)))
+
+results = []
+
+
+def record(phase, case, params, samples):
+    results.append({'phase': phase, 'case': case, 'params': params,
+                    'min_ms': round(min(samples), 2), 'median_ms': round(statistics.median(samples), 2),
+                    'mean_ms': round(statistics.mean(samples), 2)})
+
+
+def timeCall(function, before=None, warmup=True):
+    """Times the function over the runs, after one untimed run to exclude one-off costs such as imports."""
+    samples = []
+    for run in range(opts.n + 1 if warmup else opts.n):
+        if before:
+            before()
+        start = time.perf_counter()
+        function()
+        if run or not warmup:
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def runScript(name, *args, cwd=None):
+    subprocess.run([sys.executable, os.path.join(libraryDir, SCRIPTS[name])] + list(args), cwd=cwd, env=scriptEnv,
+                   stdout=subprocess.DEVNULL, check=True)
+
+
+def bumpBuildNumber(appCiInfoDir, numbers, setVersion=False):
+    buildNumber = next(numbers)
+    properties = {'ci-data.current-build-number': buildNumber}
+    if setVersion:
+        properties['ci-data.current-version'] = '{}.{}.{}+{}'.format(*(synthetic_repos.APP_VERSION + (buildNumber,)))
+    ci_info.update(os.path.join(appCiInfoDir, 'app-ci-info.yml'), properties)
+
+
+def coldStart():
+    record('cold-start', 'interpreter', {}, timeCall(
+        lambda: subprocess.run([sys.executable, '-c', 'pass'], check=True), warmup=False))
+    for name in SCRIPTS:
+        record('cold-start', name, {}, timeCall(lambda: runScript(name, '-h'), warmup=False))
+
+
+def yamlPhase():
+    for environments in opts.e:
+        params = {'environments': environments}
+        path = os.path.join(workDir, 'yaml-e{}.yml'.format(environments))
+        synthetic_repos.write_ci_info(path, environments)
+        numbers = itertools.count(1000)
+        document = ci_info.load(path)
+
+        def dumpChanged():
+            document['ci-data']['current-build-number'] = next(numbers)
+            ci_info.dump(document, path)
+
+        record('yaml', 'round-trip-load', params, timeCall(lambda: ci_info.load(path)))
+        record('yaml', 'round-trip-dump', params, timeCall(dumpChanged))
+        record('yaml', 'cached-load-miss', params, timeCall(
+            lambda: ci_info_cache.load(path), lambda: shutil.rmtree(cacheDir, ignore_errors=True)))
+        record('yaml', 'cached-load-hit', params, timeCall(lambda: ci_info_cache.load(path)))
+        record('yaml', 'stream-read-first', params, timeCall(
+            lambda: yaml_stream.read_properties(path, ['ci-data.current-build-number'])))
+        record('yaml', 'stream-read-last', params, timeCall(lambda: yaml_stream.read_properties(
+            path, ['ci-data.blue-green-deployment.env-{}.live-group'.format(environments - 1)])))
+        record('yaml', 'patch-update', params, timeCall(
+            lambda: ci_info.update(path, {'ci-data.current-build-number': next(numbers)})))
+
+
+def tagsPhase():
+    for tags in opts.t:
+        params = {'tags': tags}
+        repoDir = synthetic_repos.create_app_repo(workDir, tags, 'tags-t{}'.format(tags))
+        indexPath = os.path.join(repoDir, '.git', tag_index.INDEX_FILE_NAME)
+
+        def removeIndex():
+            if os.path.exists(indexPath):
+                os.unlink(indexPath)
+
+        record('tags', 'index-build', params, timeCall(lambda: tag_index.latest_tag(repoDir), removeIndex))
+        record('tags', 'index-hit', params, timeCall(lambda: tag_index.latest_tag(repoDir)))
+        record('tags', 'describe', params, timeCall(lambda: tag_index.latest_tag(repoDir, 'describe')))
+        record('tags', 'remote', params, timeCall(lambda: tag_index.latest_tag(repoDir, 'remote')))
+
+        # Cloning for a build: full history and tags, against depth 1 plus the remote tag lookup
+        originUrl = 'file://' + os.path.join(workDir, 'tags-t{}-origin.git'.format(tags))
+        cloneDir = os.path.join(workDir, 'tags-t{}-clone'.format(tags))
+
+        def removeClone():
+            shutil.rmtree(cloneDir, ignore_errors=True)
+
+        record('tags', 'clone-full', params, timeCall(
+            lambda: synthetic_repos.git('clone', '-q', originUrl, cloneDir), removeClone))
+        record('tags', 'clone-shallow-remote', params, timeCall(lambda: (
+            synthetic_repos.git('clone', '-q', '--depth', '1', originUrl, cloneDir),
+            tag_index.latest_tag(cloneDir, 'remote')), removeClone))
+        removeClone()
+
+
+def gitPhase():
+    for apps in opts.a:
+        params = {'apps': apps}
+        repoDir = synthetic_repos.create_ci_repo(workDir, apps, 10, 'git-a{}'.format(apps))
+        repo = GitRepo(repoDir)
+        path = os.path.join(repoDir, 'app-0', 'app-ci-info.yml')
+        numbers = itertools.count(1000)
+
+        def stage():
+            ci_info.update(path, {'ci-data.current-build-number': next(numbers)})
+            repo.add(path)
+
+        def stageAndCommit():
+            stage()
+            repo.commit('Benchmark commit')
+
+        record('git', 'commit', params, timeCall(lambda: repo.commit('Benchmark commit'), stage))
+        record('git', 'push', params, timeCall(repo.push, stageAndCommit))
+
+
+def scriptsPhase():
+    numbers = itertools.count(1000)
+    for environments in opts.e:
+        params = {'environments': environments}
+        repoDir = synthetic_repos.create_ci_repo(workDir, 1, environments, 'scripts-e{}'.format(environments))
+        appCiInfoDir = os.path.join(repoDir, 'app-0')
+        appCiInfoFile = os.path.join(appCiInfoDir, 'app-ci-info.yml')
+
+        record('scripts', 'read-from-yml', params, timeCall(
+            lambda: runScript('read-from-yml', '-f', appCiInfoFile, '-p', 'ci-data.blue-green-deployment.env-0.*')))
+        record('scripts', 'write-to-yml', params, timeCall(
+            lambda: runScript('write-to-yml', '-d', repoDir, '-f', 'app-0/app-ci-info.yml', '-p',
+                              json.dumps({'ci-data.current-build-number': next(numbers)}))))
+        record('scripts', 'commit-changes', params, timeCall(
+            lambda: runScript('commit-changes', '-d', repoDir, '-f', '["app-0/app-ci-info.yml"]', '-m', 'Benchmark'),
+            lambda: bumpBuildNumber(appCiInfoDir, numbers)))
+        record('scripts', 'inc-build-number', params, timeCall(
+            lambda: runScript('inc-build-number', '-f', appCiInfoDir)))
+
+    for tags in opts.t:
+        params = {'tags': tags}
+        appRepoDir = synthetic_repos.create_app_repo(workDir, tags, 'scripts-app-t{}'.format(tags))
+        repoDir = synthetic_repos.create_ci_repo(workDir, 1, 10, 'scripts-ci-t{}'.format(tags))
+        appCiInfoDir = os.path.join(repoDir, 'app-0')
+
+        record('scripts', 'generate-version', params, timeCall(
+            lambda: runScript('generate-version', '-f', appCiInfoDir, '-d', appRepoDir),
+            lambda: bumpBuildNumber(appCiInfoDir, numbers)))
+        record('scripts', 'tag-release', params, timeCall(
+            lambda: runScript('tag-release', '-f', os.path.join(appCiInfoDir, 'app-ci-info.yml'), '-d', appRepoDir),
+            lambda: bumpBuildNumber(appCiInfoDir, numbers, setVersion=True)))
+        record('scripts', 'version-pipeline', params, timeCall(
+            lambda: runScript('version-pipeline', '-f', appCiInfoDir, '-d', appRepoDir)))
+
+    for apps in opts.a:
+        params = {'apps': apps}
+        repoDir = synthetic_repos.create_ci_repo(workDir, apps, 10, 'scripts-a{}'.format(apps))
+        manifestPath = os.path.join(workDir, 'manifest-a{}.json'.format(apps))
+        groups = itertools.cycle(['green', 'blue'])
+
+        def writeManifest():
+            group = next(groups)
+            with open(manifestPath, 'w') as manifestFile:
+                json.dump([{'file': 'app-{}/app-ci-info.yml'.format(i),
+                            'property': 'ci-data.blue-green-deployment.env-0.live-group', 'value': group}
+                           for i in range(apps)], manifestFile)
+
+        record('scripts', 'bulk-write-to-yml', params, timeCall(
+            lambda: runScript('write-to-yml', '-d', repoDir, '-m', manifestPath, '-c', 'Benchmark'), writeManifest))
+        record('scripts', 'bulk-read-from-yml', params, timeCall(
+            lambda: runScript('read-from-yml', '-m', manifestPath, cwd=repoDir), writeManifest))
+
+
+def revision():
+    try:
+        return synthetic_repos.git('describe', '--always', '--dirty', cwd=libraryDir)
+    except (OSError, RuntimeError):
+        return None
+
+
+def caseKey(result):
+    return result['phase'], result['case'], json.dumps(result['params'], sort_keys=True)
+
+
+workDir = tempfile.mkdtemp(prefix='stakater-bench-')
+try:
+    cacheDir = os.path.join(workDir, 'cache')
+    os.environ[ci_info_cache.CACHE_DIR_ENV] = cacheDir
+    os.environ.update(synthetic_repos.GIT_ENV)
+    scriptEnv = dict(os.environ, STAKATER_CI_INFO_SOCKET=os.path.join(workDir, 'no-daemon.sock'))
+    phases = {'cold-start': coldStart, 'yaml': yamlPhase, 'tags': tagsPhase, 'git': gitPhase,
+              'scripts': scriptsPhase}
+    for phase in PHASES:
+        if phase in opts.p:
+            phases[phase]()
+finally:
+    shutil.rmtree(workDir, ignore_errors=True)
+
+report = {
+    'revision': revision(),
+    'timestamp': datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+    'python': platform.python_version(),
+    'git': synthetic_repos.git('--version'),
+    'platform': platform.platform(),
+    'runs': opts.n,
+    'results': results,
+}
+if opts.o:
+    with open(opts.o, 'w') as outputFile:
+        json.dump(report, outputFile, indent=2)
+
+if opts.json:
+    print(json.dumps(report, indent=2))
+elif opts.c:
+    with open(opts.c) as baselineFile:
+        baseline = json.load(baselineFile)
+    baselineMedians = {caseKey(result): result['median_ms'] for result in baseline['results']}
+    print('Comparing against {} ({})'.format(baseline.get('revision'), baseline.get('timestamp')))
+    print('{:<12}{:<22}{:<22}{:>14}{:>14}{:>10}'.format('phase', 'case', 'params', 'baseline ms', 'median ms',
+                                                     'change'))
+    for result in results:
+        before = baselineMedians.get(caseKey(result))
+        change = '' if not before else '{:+.1f}%'.format((result['median_ms'] - before) / before * 100)
+        print('{:<12}{:<22}{:<22}{:>14}{:>14}{:>10}'.format(
+            result['phase'], result['case'], json.dumps(result['params']) if result['params'] else '',
+            '' if before is None else before, result['median_ms'], change))
+else:
+    print('{:<12}{:<22}{:<22}{:>10}{:>12}{:>10}'.format('phase', 'case', 'params', 'min ms', 'median ms', 'mean ms'))
+    for result in results:
+        print('{:<12}{:<22}{:<22}{:>10}{:>12}{:>10}'.format(
+            result['phase'], result['case'], json.dumps(result['params']) if result['params'] else '',
+            result['min_ms'], result['median_ms'], result['mean_ms']))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script measures the startup time of read-from-yml.py, i.e. the wall time of one
+# invocation as paid by every pipeline step, against the cost of the eager ruamel.yaml
+# import that every yml script used to do.
+#
+# Cases:
+#   interpreter           python3 -c pass
+#   eager-ruamel-import   python3 -c "import ruamel.yaml"
+#   round-trip-read       import ruamel.yaml and round trip load the file, as read-from-yml.py used to
+#   read-cache-miss       read-from-yml.py with an empty parsed file cache (default loader)
+#   read-cache-miss-ruamel  same, with STAKATER_YAML_LOADER=ruamel
+#   read-cache-hit        read-from-yml.py with the file already in the parsed file cache
+#
+# Argument 1 (-n, --runs): Runs per case. Defaults to 20
+# Argument 2 (-e, --environments): Blue/green environments in the synthetic app CI info file. Defaults to 50
+# Argument 3 (--json): Print results as JSON instead of a table
+###############################################################################
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic_repos
+
+libraryDir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+readScript = os.path.join(libraryDir, 'util', 'read-from-yml.py')
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-n', '--runs', dest='n', type=int, default=20)
+argParse.add_argument('-e', '--environments', dest='e', type=int, default=50)
+argParse.add_argument('--json', dest='json', action='store_true')
+
+opts = argParse.parse_args()
+
+
+def timeCase(cmd, env, runs, before=None):
+    samples = []
+    for _ in range(runs):
+        if before:
+            before()
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'min_ms': round(min(samples), 2), 'median_ms': round(statistics.median(samples), 2),
+            'mean_ms': round(statistics.mean(samples), 2)}
+
+
+workDir = tempfile.mkdtemp(prefix='stakater-bench-')
+try:
+    ciInfoPath = os.path.join(workDir, 'app-ci-info.yml')
+    synthetic_repos.write_ci_info(ciInfoPath, opts.e)
+    cacheDir = os.path.join(workDir, 'cache')
+    env = dict(os.environ, STAKATER_CI_INFO_CACHE_DIR=cacheDir,
+               STAKATER_CI_INFO_SOCKET=os.path.join(workDir, 'no-daemon.sock'))
+    readCmd = [sys.executable, readScript, '-f', ciInfoPath, '-p', 'ci-data.blue-green-deployment.env-0.*']
+
+    def clearCache():
+        shutil.rmtree(cacheDir, ignore_errors=True)
+
+    results = {
+        'interpreter': timeCase([sys.executable, '-c', 'pass'], env, opts.n),
+        'eager-ruamel-import': timeCase([sys.executable, '-c', 'import ruamel.yaml'], env, opts.n),
+        'round-trip-read': timeCase([sys.executable, '-c', 'import sys, ruamel.yaml; '
+                                     'ruamel.yaml.YAML().load(open(sys.argv[1]))', ciInfoPath], env, opts.n),
+        'read-cache-miss': timeCase(readCmd, env, opts.n, clearCache),
+        'read-cache-miss-ruamel': timeCase(readCmd, dict(env, STAKATER_YAML_LOADER='ruamel'), opts.n, clearCache),
+    }
+    # Warm the cache once, then every run is a hit
+    subprocess.run(readCmd, env=env, stdout=subprocess.DEVNULL, check=True)
+    results['read-cache-hit'] = timeCase(readCmd, env, opts.n)
+finally:
+    shutil.rmtree(workDir, ignore_errors=True)
+
+if opts.json:
+    print(json.dumps({'runs': opts.n, 'environments': opts.e, 'results': results}, indent=2))
+else:
+    print('{:<26}{:>10}{:>12}{:>10}'.format('case', 'min ms', 'median ms', 'mean ms'))
+    for case, result in results.items():
+        print('{:<26}{:>10}{:>12}{:>10}'.format(case, result['min_ms'], result['median_ms'], result['mean_ms']))
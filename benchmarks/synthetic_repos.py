@@ -0,0 +1,121 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Builds synthetic repos for the benchmarks: app repos with a given number of
+# version tags and CI info repos with a given number of apps and app CI info file
+# size. Every repo is cloned from a local bare "origin", so that pushes and fetches
+# are measured without a network remote.
+###############################################################################
+
+import os
+import subprocess
+
+# Benchmark machines may have no git identity configured
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'Stakater Benchmark',
+    'GIT_AUTHOR_EMAIL': 'benchmark@stakater.com',
+    'GIT_COMMITTER_NAME': 'Stakater Benchmark',
+    'GIT_COMMITTER_EMAIL': 'benchmark@stakater.com',
+}
+
+APP_VERSION = (9, 0, 0)
+
+
+def git(*args, cwd=None, input=None):
+    env = dict(os.environ, **GIT_ENV)
+    proc = subprocess.run(['git'] + list(args), cwd=cwd, input=input, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError('git {} failed: {}'.format(' '.join(args), proc.stderr.decode('utf-8', 'replace')))
+    return proc.stdout.decode('utf-8').strip()
+
+
+def tag_name(i):
+    """The i-th synthetic version tag, e.g. 1.0.5+5. Every tag is lower than APP_VERSION."""
+    return '1.{}.{}+{}'.format(i // 100, i % 100, i)
+
+
+def write_ci_info(path, environments, buildNumber=42):
+    with open(path, 'w') as f:
+        f.write('# Synthetic app CI info file\nci-data:\n  current-build-number: {0}\n  current-version: {1}.{2}.{3}+{0}\n'
+                '  blue-green-deployment:\n'.format(buildNumber, *APP_VERSION))
+        for i in range(environments):
+            f.write('    env-{0}:\n      live-group: blue\n      blue-group-ami-id: ami-{0:08x}\n'
+                    '      green-group-ami-id: ami-{1:08x}\n      is-group-switch-valid: \'true\'\n'
+                    '      is-deployment-rollback-valid: \'false\'\n'.format(i, i + 1))
+
+
+def _data(text):
+    data = text.encode('utf-8')
+    return b'data ' + str(len(data)).encode() + b'\n' + data + b'\n'
+
+
+def _clone(originDir, repoDir):
+    git('symbolic-ref', 'HEAD', 'refs/heads/master', cwd=originDir)
+    git('clone', '-q', originDir, repoDir)
+
+
+def create_app_repo(workDir, tags, name='app'):
+    """Creates an app repo with app-info.yml and one commit per tag, and its bare origin. Returns the repo dir."""
+    originDir = os.path.join(workDir, name + '-origin.git')
+    repoDir = os.path.join(workDir, name)
+    git('init', '-q', '--bare', originDir)
+    appInfo = 'application:\n  name: {}\n  group: benchmark\nversion:\n  major: {}\n  minor: {}\n  patch: {}\n' \
+        .format(name, *APP_VERSION)
+    # fast-import creates thousands of commits and tags in well under a second
+    stream = [b'commit refs/heads/master\nmark :1\ncommitter Stakater Benchmark <benchmark@stakater.com> '
+              b'1500000000 +0000\n', _data('Initial commit'), b'M 644 inline app-info.yml\n', _data(appInfo)]
+    for i in range(1, tags + 1):
+        stream.append('commit refs/heads/master\nmark :{}\ncommitter Stakater Benchmark <benchmark@stakater.com> '
+                      '{} +0000\n'.format(i + 1, 1500000000 + i).encode())
+        stream.append(_data('Build {}'.format(i)))
+        stream.append('from :{}\nreset refs/tags/{}\nfrom :{}\n'.format(i, tag_name(i), i + 1).encode())
+    git('fast-import', '--quiet', cwd=originDir, input=b''.join(stream))
+    _clone(originDir, repoDir)
+    return repoDir
+
+
+def create_ci_repo(workDir, apps, environments, name='ci'):
+    """Creates a CI info repo with an `app-<i>/app-ci-info.yml` per app, and its bare origin. Returns the repo dir."""
+    originDir = os.path.join(workDir, name + '-origin.git')
+    repoDir = os.path.join(workDir, name)
+    git('init', '-q', '--bare', originDir)
+    git('symbolic-ref', 'HEAD', 'refs/heads/master', cwd=originDir)
+    git('init', '-q', repoDir)
+    git('symbolic-ref', 'HEAD', 'refs/heads/master', cwd=repoDir)
+    for i in range(apps):
+        os.mkdir(os.path.join(repoDir, 'app-{}'.format(i)))
+        write_ci_info(os.path.join(repoDir, 'app-{}'.format(i), 'app-ci-info.yml'), environments)
+    git('add', '-A', cwd=repoDir)
+    git('commit', '-q', '-m', 'Initial commit', cwd=repoDir)
+    git('remote', 'add', 'origin', originDir, cwd=repoDir)
+    git('push', '-q', '-u', 'origin', 'master', cwd=repoDir)
+    return repoDir
@@ -81,13 +81,10 @@ TEST_ELB_CIDR_BLOCK=${TEST_ELB_CIDR_BLOCK//\"}
 
 ## Get deployment state values
 DEPLOYMENT_STATE_FILE="/app/stakater/ci-info/${APP_NAME}/app-ci-info.yml"
-PARENT_KEY_NODE="ci-data.blue-green-deployment.${ENVIRONMENT}."
-# Read parameters from file
-BLUE_GROUP_AMI_ID=`sudo python3 /app/stakater/pipeline-library/util/read-from-yml.py -f ${DEPLOYMENT_STATE_FILE} -p ${PARENT_KEY_NODE}blue-group-ami-id` || exit 1
-CURRENT_GREEN_GROUP_AMI_ID=`sudo python3 /app/stakater/pipeline-library/util/read-from-yml.py -f ${DEPLOYMENT_STATE_FILE} -p ${PARENT_KEY_NODE}green-group-ami-id` || exit 1
-LIVE_GROUP=`sudo python3 /app/stakater/pipeline-library/util/read-from-yml.py -f ${DEPLOYMENT_STATE_FILE} -p ${PARENT_KEY_NODE}live-group` || exit 1
-IS_DEPLOYMENT_ROLLBACK_VALID=`sudo python3 /app/stakater/pipeline-library/util/read-from-yml.py -f ${DEPLOYMENT_STATE_FILE} -p ${PARENT_KEY_NODE}is-deployment-rollback-valid` || exit 1
-SWITCHED_TO_NEW_GROUP=`sudo python3 /app/stakater/pipeline-library/util/read-from-yml.py -f ${DEPLOYMENT_STATE_FILE} -p ${PARENT_KEY_NODE}switched-to-new-group` || exit 1
+# Read the whole deployment state record in one call, as KEY=value lines
+DEPLOYMENT_STATE=`sudo python3 /app/stakater/pipeline-library/util/bg-deployment-state.py -f ${DEPLOYMENT_STATE_FILE} -e ${ENVIRONMENT}` || exit 1
+eval "${DEPLOYMENT_STATE}"
+CURRENT_GREEN_GROUP_AMI_ID=${GREEN_GROUP_AMI_ID}
 ##############################################################
 
 ## For two stage rollback to previous group
@@ -53,13 +53,12 @@ IS_DEPLOYMENT_ROLLBACK_VALID=$6
 IS_GROUP_SWITCH_VALID=$7
 SWITCHED_TO_NEW_GROUP=$8
 
-PARENT_KEY_NODE="ci-data.blue-green-deployment.${ENVIRONMENT}."
-#write parameters to file
-parameters="{\"${PARENT_KEY_NODE}live-group\":\"${LIVE_GROUP}\",\
-\"${PARENT_KEY_NODE}blue-group-ami-id\":\"${BLUE_GROUP_AMI_ID}\",\
-\"${PARENT_KEY_NODE}green-group-ami-id\":\"${GREEN_GROUP_AMI_ID}\",\
-\"${PARENT_KEY_NODE}is-deployment-rollback-valid\":\"${IS_DEPLOYMENT_ROLLBACK_VALID}\",\
-\"${PARENT_KEY_NODE}is-group-switch-valid\":\"${IS_GROUP_SWITCH_VALID}\",\
-\"${PARENT_KEY_NODE}switched-to-new-group\":\"${SWITCHED_TO_NEW_GROUP}\"}"
-sudo python3 /app/stakater/pipeline-library/util/write-to-yml.py -f ${APP_NAME}/app-ci-info.yml -d /app/stakater/ci-info -p ${parameters} || exit 1
-sudo python3 /app/stakater/pipeline-library/util/commit-changes.py -m "update bg deployment state" -d /app/stakater/ci-info -f [\"${APP_NAME}/app-ci-info.yml\"] || exit 1
\ No newline at end of file
+# Validate and write the whole record, then commit and push it, in one process
+sudo python3 /app/stakater/pipeline-library/util/bg-deployment-state.py -d /app/stakater/ci-info -f ${APP_NAME}/app-ci-info.yml \
+    -e ${ENVIRONMENT} \
+    -s live-group=${LIVE_GROUP} \
+    -s blue-group-ami-id=${BLUE_GROUP_AMI_ID} \
+    -s green-group-ami-id=${GREEN_GROUP_AMI_ID} \
+    -s is-deployment-rollback-valid=${IS_DEPLOYMENT_ROLLBACK_VALID} \
+    -s is-group-switch-valid=${IS_GROUP_SWITCH_VALID} \
+    -s switched-to-new-group=${SWITCHED_TO_NEW_GROUP} || exit 1
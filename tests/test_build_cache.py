@@ -0,0 +1,121 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+import hashlib
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import ci_info
+from util import ci_info_cache
+from util import yaml_backend
+from util import yaml_patch
+from versioning import build_cache
+
+CI_INFO = '''# CI data of the app
+ci-data:
+  current-build-number: 12   # bumped by inc-build-number.py
+  current-version: 1.2.0+11
+  blue-green-deployment:
+    prod:
+      live-group: blue
+'''
+
+
+def sha1(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def parse(text):
+    return ci_info_cache.to_plain(yaml_backend.safe_load(text))
+
+
+def record(text, key, buildNumber):
+    """Records a build as generate-version.py does, checking that the file is patched in place."""
+    properties = build_cache.record(parse(text), key, sha1('commit {}'.format(buildNumber)), buildNumber,
+                                    '1.2.0+{}'.format(buildNumber))
+    patched = yaml_patch.patch(text, properties)
+    if patched is None:
+        raise AssertionError('Recording build {} is a round trip'.format(buildNumber))
+    return patched
+
+
+def build_lines(key, buildNumber):
+    return ('    {}:\n      build-number: {}\n      version: 1.2.0+{}\n      commit: {}\n'
+            .format(key, buildNumber, buildNumber, sha1('commit {}'.format(buildNumber))))
+
+
+class RecordTest(unittest.TestCase):
+    def test_record_adds_only_the_build_lines(self):
+        text = record(CI_INFO, sha1('tree 12'), 12)
+        text = record(text, sha1('tree 13'), 13)
+        self.assertEqual(text, CI_INFO + '  builds:\n' + build_lines(sha1('tree 12'), 12)
+                         + build_lines(sha1('tree 13'), 13))
+        self.assertEqual(build_cache.find(parse(text), sha1('tree 12')),
+                         {'key': sha1('tree 12'), 'commit': sha1('commit 12'), 'build-number': 12,
+                          'version': '1.2.0+12'})
+
+    def test_record_again_patches_the_build_lines(self):
+        text = record(CI_INFO, sha1('tree 12'), 12)
+        self.assertEqual(record(text, sha1('tree 12'), 13), CI_INFO + '  builds:\n' + build_lines(sha1('tree 12'), 13))
+
+    def test_record_after_a_round_trip_patches_in_place(self):
+        # Builds rewritten by a round trip dump, which wraps lines longer than its width
+        text = ci_info.update_text(CI_INFO, build_cache.record(parse(CI_INFO), sha1('tree 12'), sha1('commit 12'),
+                                                               12, '1.2.0+12'))
+        text = ci_info.update_text(text, {build_cache.BUILDS_PROPERTY: parse(text)['ci-data']['builds']})
+        patched = record(text, sha1('tree 13'), 13)
+        self.assertEqual(patched, text + build_lines(sha1('tree 13'), 13))
+
+    def test_builds_are_trimmed_to_the_most_recent(self):
+        document = parse(CI_INFO)
+        document['ci-data']['builds'] = {sha1('tree {}'.format(n)): {'build-number': n, 'version': '1.0.0+{}'.format(n),
+                                                                      'commit': sha1('commit {}'.format(n))}
+                                         for n in range(2 * build_cache.MAX_BUILDS)}
+        properties = build_cache.record(document, sha1('tree 1000'), sha1('commit 1000'), 1000, '1.0.0+1000')
+        kept = properties[build_cache.BUILDS_PROPERTY]
+        self.assertEqual(len(kept), build_cache.MAX_BUILDS)
+        self.assertIn(sha1('tree 1000'), kept)
+        self.assertNotIn(sha1('tree 0'), kept)
+
+    def test_builds_recorded_as_a_list_are_read_and_rewritten(self):
+        document = parse(CI_INFO)
+        document['ci-data']['builds'] = [{'key': sha1('tree 3'), 'commit': sha1('commit 3'), 'build-number': 3,
+                                          'version': '1.0.0+3'}]
+        self.assertEqual(build_cache.find(document, sha1('tree 3'))['build-number'], 3)
+        properties = build_cache.record(document, sha1('tree 4'), sha1('commit 4'), 4, '1.0.0+4')
+        self.assertEqual(properties, {build_cache.BUILDS_PROPERTY: {
+            sha1('tree 3'): {'build-number': 3, 'version': '1.0.0+3', 'commit': sha1('commit 3')},
+            sha1('tree 4'): {'build-number': 4, 'version': '1.0.0+4', 'commit': sha1('commit 4')}}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from versioning import build_number
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='tester', GIT_AUTHOR_EMAIL='tester@example.com',
+               GIT_COMMITTER_NAME='tester', GIT_COMMITTER_EMAIL='tester@example.com')
+
+
+def git(*args):
+    return subprocess.run(['git'] + list(args), env=GIT_ENV, check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE).stdout.decode('utf-8').strip()
+
+
+class AllocateTest(unittest.TestCase):
+    """Allocations from two clones of the CI info repo, which share its branch."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.origin = os.path.join(self.tmp.name, 'ci-origin.git')
+        git('init', '-q', '--bare', self.origin)
+        self.clones = []
+        for name in ('ci-a', 'ci-b'):
+            clone = os.path.join(self.tmp.name, name)
+            git('clone', '-q', self.origin, clone)
+            self.clones.append(clone)
+        os.makedirs(os.path.join(self.clones[0], 'app'))
+        with open(os.path.join(self.clones[0], 'app', 'app-ci-info.yml'), 'w') as ymlFile:
+            ymlFile.write('ci-data:\n  current-build-number: 0\n')
+        git('-C', self.clones[0], 'add', '-A')
+        git('-C', self.clones[0], 'commit', '-q', '-m', 'init')
+        git('-C', self.clones[0], 'push', '-q', 'origin', 'HEAD')
+        git('-C', self.clones[1], 'pull', '-q')
+        patcher = mock.patch.dict(os.environ, dict(GIT_ENV, STAKATER_CI_INFO_CACHE_DIR=self.tmp.name + '/cache'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def allocate(self, clone):
+        return build_number.allocate(os.path.join(clone, 'app'), backoff=0)
+
+    def test_allocation_after_a_fetch_does_not_overwrite_the_other_clone(self):
+        self.assertEqual(self.allocate(self.clones[0]), (1, 1))
+        first = git('-C', self.clones[0], 'rev-parse', 'HEAD')
+        # The upstream of the second clone now has the first allocation, its checkout does not
+        git('-C', self.clones[1], 'fetch', '-q')
+        self.assertEqual(self.allocate(self.clones[1]), (2, 2))
+        self.assertEqual(self.allocate(self.clones[0]), (3, 3))
+        history = git('--git-dir', self.origin, 'log', '--format=%H %s').split('\n')
+        self.assertIn(first, [line.split(' ', 1)[0] for line in history])
+        subjects = [line.split(' ', 1)[1] for line in history]
+        self.assertEqual(subjects, ['[Stakater] Updated Build Number to: {}'.format(n) for n in (3, 2, 1)] + ['init'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import ci_info_client
+
+
+class SocketTrustTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        os.chmod(self.dir, 0o700)
+        self.path = os.path.join(self.dir, ci_info_client.SOCKET_NAME)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        os.chmod(self.path, 0o600)
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.dir)
+
+    def test_default_socket_is_in_the_run_dir(self):
+        with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.dir}):
+            os.environ.pop(ci_info_client.SOCKET_ENV, None)
+            self.assertEqual(ci_info_client.socket_path(), self.path)
+
+    def test_private_socket_is_used(self):
+        self.assertTrue(ci_info_client.is_private(self.path))
+
+    def test_socket_others_can_write_to_is_ignored(self):
+        os.chmod(self.path, 0o666)
+        self.assertFalse(ci_info_client.is_private(self.path))
+        self.assertIsNone(ci_info_client.request({'op': 'ping'}, self.path))
+
+    def test_socket_in_a_directory_others_can_write_to_is_ignored(self):
+        os.chmod(self.dir, 0o777)
+        self.assertFalse(ci_info_client.is_private(self.path))
+
+    def test_regular_file_is_ignored(self):
+        os.unlink(self.path)
+        open(self.path, 'w').close()
+        self.assertFalse(ci_info_client.is_private(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
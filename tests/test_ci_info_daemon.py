@@ -0,0 +1,81 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import ci_info_daemon
+
+CI_INFO = '''# CI data of the app
+ci-data:
+  current-build-number: 12   # bumped by inc-build-number.py
+  previous-version: null
+  amis:
+  - ami-1
+  - ami-2
+'''
+
+
+class HandleTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'app-ci-info.yml')
+        with open(self.path, 'w') as ymlFile:
+            ymlFile.write(CI_INFO)
+        self.cache = ci_info_daemon.DocumentCache()
+
+    def request(self, message):
+        return ci_info_daemon.handle(self.cache, dict(message, file=self.path))
+
+    def test_set_patches_the_file_in_place(self):
+        self.assertEqual(self.request({'op': 'get', 'properties': ['ci-data.current-build-number']}),
+                         [('ci-data.current-build-number', 'ci-data.current-build-number', '12')])
+        self.assertTrue(self.request({'op': 'set', 'properties': {'ci-data.current-build-number': 13}}))
+        with open(self.path) as ymlFile:
+            self.assertEqual(ymlFile.read(), CI_INFO.replace('12', '13'))
+        self.assertEqual(self.request({'op': 'get', 'properties': ['ci-data.current-build-number']}),
+                         [('ci-data.current-build-number', 'ci-data.current-build-number', '13')])
+
+    def test_batch_runs_gets_and_sets_in_order(self):
+        prop = 'ci-data.current-build-number'
+        self.assertEqual(self.request({'op': 'batch', 'requests': [
+            {'op': 'get', 'file': self.path, 'properties': [prop], 'typed': True},
+            {'op': 'set', 'file': self.path, 'properties': {prop: 13}},
+            {'op': 'set', 'file': self.path, 'properties': {prop: 13}},
+            {'op': 'get', 'file': self.path, 'properties': [prop], 'typed': True},
+        ]}), [[(prop, prop, 12)], True, False, [(prop, prop, 13)]])
+
+
+if __name__ == '__main__':
+    unittest.main()
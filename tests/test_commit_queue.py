@@ -0,0 +1,82 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import commit_queue
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='tester', GIT_AUTHOR_EMAIL='tester@example.com',
+               GIT_COMMITTER_NAME='tester', GIT_COMMITTER_EMAIL='tester@example.com')
+
+
+def git(*args):
+    return subprocess.run(['git'] + list(args), env=GIT_ENV, check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE).stdout.decode('utf-8').strip()
+
+
+class CommitQueueWorktreeTest(unittest.TestCase):
+    """The queue of a shard of the `branches` layout, a worktree whose `.git` is a file."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.origin = os.path.join(self.tmp.name, 'ci-origin.git')
+        self.root = os.path.join(self.tmp.name, 'ci')
+        self.shard = os.path.join(self.tmp.name, 'ci-shards', 'app')
+        git('init', '-q', '--bare', self.origin)
+        git('clone', '-q', self.origin, self.root)
+        os.makedirs(os.path.join(self.root, 'app'))
+        with open(os.path.join(self.root, 'app', 'app-ci-info.yml'), 'w') as ymlFile:
+            ymlFile.write('ci-data:\n  current-build-number: 1\n')
+        git('-C', self.root, 'add', '-A')
+        git('-C', self.root, 'commit', '-q', '-m', 'init')
+        git('-C', self.root, 'push', '-q', 'origin', 'HEAD:refs/heads/ci-info/app')
+        git('-C', self.root, 'fetch', '-q', 'origin')
+        git('-C', self.root, 'worktree', 'add', '-q', '--track', '-B', 'ci-info/app', self.shard,
+            'origin/ci-info/app')
+
+    def test_commit_in_worktree(self):
+        self.assertTrue(os.path.isfile(os.path.join(self.shard, '.git')))
+        with open(os.path.join(self.shard, 'app', 'app-ci-info.yml'), 'a') as ymlFile:
+            ymlFile.write('  x: y\n')
+        with mock.patch.dict(os.environ, GIT_ENV):
+            self.assertEqual(commit_queue.commit(self.shard, ['app/app-ci-info.yml'], 'Update x', window=0), 1)
+        self.assertEqual(git('--git-dir', self.origin, 'log', '-1', '--format=%s', 'ci-info/app'), 'Update x')
+        self.assertIn('x: y', git('--git-dir', self.origin, 'show', 'ci-info/app:app/app-ci-info.yml'))
+
+
+if __name__ == '__main__':
+    unittest.main()
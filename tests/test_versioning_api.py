@@ -0,0 +1,99 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import ci_info
+from util import ci_info_cache
+from versioning import api
+from versioning import build_cache
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='tester', GIT_AUTHOR_EMAIL='tester@example.com',
+               GIT_COMMITTER_NAME='tester', GIT_COMMITTER_EMAIL='tester@example.com')
+
+APP_INFO = '''application:
+  name: app
+version:
+  major: 1
+  minor: 2
+  patch: 0
+'''
+
+
+def git(*args):
+    return subprocess.run(['git'] + list(args), env=GIT_ENV, check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE).stdout.decode('utf-8').strip()
+
+
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repoDir = os.path.join(self.tmp.name, 'app')
+        git('init', '-q', self.repoDir)
+        with open(os.path.join(self.repoDir, 'app-info.yml'), 'w') as ymlFile:
+            ymlFile.write(APP_INFO)
+        git('-C', self.repoDir, 'add', '-A')
+        git('-C', self.repoDir, 'commit', '-q', '-m', 'init')
+        self.appCiInfoDir = os.path.join(self.tmp.name, 'ci', 'app')
+        os.makedirs(self.appCiInfoDir)
+        self.appCiInfoFilePath = os.path.join(self.appCiInfoDir, 'app-ci-info.yml')
+        with open(self.appCiInfoFilePath, 'w') as ymlFile:
+            ymlFile.write('ci-data:\n  current-build-number: 4\n  current-version: 1.2.0+4\n')
+        patcher = mock.patch.dict(os.environ, {'STAKATER_CI_INFO_CACHE_DIR': self.tmp.name + '/cache'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_plan_includes_the_build_record(self):
+        versionPlan = api.plan(self.appCiInfoDir, self.repoDir)
+        key, commitId = build_cache.current_build(self.repoDir, ci_info_cache.load(
+            os.path.join(self.repoDir, 'app-info.yml')))
+        builds = 'ci-data.builds.' + key
+        self.assertEqual(versionPlan['changes'], {
+            'ci-data.current-build-number': {'from': 4, 'to': 5},
+            'ci-data.current-version': {'from': '1.2.0+4', 'to': '1.2.0+5'},
+            builds + '.build-number': {'from': None, 'to': 5},
+            builds + '.version': {'from': None, 'to': '1.2.0+5'},
+            builds + '.commit': {'from': None, 'to': commitId},
+        })
+        # Applying the plan records the build as a real run would
+        ci_info.update(self.appCiInfoFilePath, {prop: change['to'] for prop, change in versionPlan['changes'].items()})
+        self.assertEqual(api.lookup_build(self.appCiInfoDir, self.repoDir),
+                         {'key': key, 'build-number': 5, 'version': '1.2.0+5', 'commit': commitId})
+
+
+if __name__ == '__main__':
+    unittest.main()
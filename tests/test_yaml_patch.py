@@ -0,0 +1,111 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import ci_info_cache
+from util import property_path
+from util import yaml_backend
+from util import yaml_patch
+
+
+def parse(text):
+    return ci_info_cache.to_plain(yaml_backend.round_trip_load(text))
+
+
+class PatchTest(unittest.TestCase):
+    def assertPatched(self, text, properties, expected=None):
+        """Checks that the text is patched, to the expected text if given, to the data a round trip update writes."""
+        patched = yaml_patch.patch(text, properties)
+        self.assertIsNotNone(patched)
+        if expected is not None:
+            self.assertEqual(patched, expected)
+        document = yaml_backend.round_trip_load(text)
+        property_path.set_properties(document, properties)
+        stream = io.StringIO()
+        yaml_backend.round_trip_dump(document, stream)
+        self.assertEqual(parse(patched), parse(stream.getvalue()))
+
+    def test_scalars_keep_comments_and_quotes(self):
+        self.assertPatched('a:\n  b: 1   # build\n  c: \'x\'\n', {'a.b': 2, 'a.c': 'z'},
+                           'a:\n  b: 2   # build\n  c: z\n')
+
+    def test_new_keys_are_added_with_their_parents(self):
+        self.assertPatched('a:\n    b: 1\nc: 2\n', {'a.d.e': 3, 'a.f': 'x'},
+                           'a:\n    b: 1\n    d:\n        e: 3\n    f: x\nc: 2\n')
+
+    def test_new_top_level_keys_are_not_patched(self):
+        self.assertIsNone(yaml_patch.patch('a: 1\n', {'b': 2}))
+
+    def test_anchored_mapping(self):
+        text = 'a: &defaults\n  b:\n    c: 1\n  c: 2\nd:\n  <<: *defaults\n'
+        self.assertPatched(text, {'a.c': 3}, text.replace('c: 2', 'c: 3'))
+        self.assertPatched(text, {'a.b.c': 4}, text.replace('c: 1', 'c: 4'))
+
+    def test_tagged_mapping(self):
+        text = 'a: !!map\n  b:\n    c: 1\n  c: 2\n'
+        self.assertPatched(text, {'a.c': 3}, text.replace('c: 2', 'c: 3'))
+        self.assertPatched(text, {'a.d': 4}, text + '  d: 4\n')
+
+    def test_anchored_scalars_are_not_patched(self):
+        self.assertIsNone(yaml_patch.patch('a: &x 1\nb: *x\n', {'a': 2}))
+        self.assertIsNone(yaml_patch.patch('a: !!str 1\n', {'a': 2}))
+
+    def test_tagged_block_scalar(self):
+        text = 'a: !t |\n  k: v\n  text\nb: 1\n'
+        self.assertPatched(text, {'b': 2}, text.replace('b: 1', 'b: 2'))
+        self.assertIsNone(yaml_patch.patch(text, {'a.k': 'w'}))
+
+    def test_wrapped_scalars_are_skipped(self):
+        text = ('a:\n  plain: a plain scalar that was\n    wrapped by a dump\n  quoted: "a quoted scalar\n'
+                '    wrapped too"\n  n: 1\n')
+        self.assertPatched(text, {'a.n': 2, 'a.m': 3}, text.replace('n: 1', 'n: 2\n  m: 3'))
+        self.assertIsNone(yaml_patch.patch(text, {'a.plain': 'x'}))
+        self.assertIsNone(yaml_patch.patch(text, {'a.quoted': 'x'}))
+
+    def test_sequence_items_are_skipped(self):
+        text = 'a:\n  l:\n  - k: 1\n    j: 2\n  - a scalar\n    item\n  n: 1\n'
+        self.assertPatched(text, {'a.n': 2}, text.replace('n: 1', 'n: 2'))
+        self.assertIsNone(yaml_patch.patch(text, {'a.l.k': 2}))
+
+    def test_flow_values(self):
+        text = 'a: {x: 1}\nb: [1, 2]\nc: 1\n'
+        self.assertPatched(text, {'c': 2}, text.replace('c: 1', 'c: 2'))
+        self.assertIsNone(yaml_patch.patch(text, {'a.x': 2}))
+        self.assertIsNone(yaml_patch.patch(text, {'b': 3}))
+        self.assertIsNone(yaml_patch.patch('a: [1,\n  2]\nc: 1\n', {'c': 2}))
+
+
+if __name__ == '__main__':
+    unittest.main()
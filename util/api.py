@@ -0,0 +1,129 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# In-process API to read and write app CI info files, for callers that run many
+# operations per process instead of one script per operation, e.g. run-batch.py.
+# read-from-yml.py and write-to-yml.py are thin wrappers around it.
+#
+# Like the scripts, operations are served by the ci-info daemon (see ci-info-daemon.py)
+# when it is running, else done in-process. Modules are only imported when needed, so
+# that a read served from the parsed file cache stays cheap.
+# With $STAKATER_CI_INFO_DB set, files are read and written through the SQLite store
+# instead, see ci_info_store.py. Paths in a sharded CI info repo are resolved to the
+# app's shard, see ci_info_shards.py.
+#
+# Note: App CI info file is the one which is required by stakater to store CI/CD related data.
+###############################################################################
+
+import contextlib
+
+from util import path_query
+
+
+def read_properties(path, patterns, stream=False):
+    """Returns typed (pattern, property, value) triples for the properties, see path_query.evaluate.
+
+    With stream, the file is streamed and only read up to the properties, see yaml_stream.py.
+    """
+    from util import ci_info_client
+    from util import ci_info_shards
+    from util import ci_info_store
+    path = ci_info_shards.resolve(path)
+    results = None
+    if stream:
+        from util import yaml_stream
+        results = yaml_stream.read_properties(path, patterns, typed=True)
+    if results is None and ci_info_store.enabled():
+        with contextlib.closing(ci_info_store.connect()) as conn:
+            results = ci_info_store.read_properties(conn, path, patterns)
+    if results is None:
+        results = ci_info_client.get_properties(path, patterns, typed=True)
+    if results is None:
+        # Read once for all the properties, skipping the parse if it is cached
+        from util import ci_info_cache
+        from util import property_path
+        results = property_path.read_properties(ci_info_cache.load(path), patterns, typed=True)
+    return results
+
+
+def read_property(path, pattern, stream=False):
+    """Returns the typed value of a single property, or None if it is missing."""
+    if path_query.compile_query(pattern).multi:
+        raise path_query.QueryError('Query "{}" can match several properties, use read_properties'.format(pattern))
+    return read_properties(path, [pattern], stream)[0][2]
+
+
+def write_properties(path, properties):
+    """Writes the map of properties to the file, keeping its format and comments."""
+    from util import ci_info_client
+    from util import ci_info_shards
+    from util import ci_info_store
+    path = ci_info_shards.resolve(path, create=True)
+    if ci_info_store.enabled():
+        with contextlib.closing(ci_info_store.connect()) as conn:
+            ci_info_store.update(conn, {path: properties})
+        return
+    if ci_info_client.set_properties(path, properties) is None:
+        # Daemon is not running, update the file in-process
+        from util import ci_info
+        ci_info.update(path, properties)
+
+
+def commit_changes(repoDir, files, message, queue=False, window=1.0, asyncPush=False):
+    """Commits the files with one commit and pushes, retrying rejected pushes. Returns False if nothing changed.
+
+    With queue, the change is committed together with those of concurrent callers, see commit_queue.py.
+    With asyncPush, it is committed locally and pushed in the background, see push_journal.py.
+    In a sharded CI info repo, the files of each shard are committed to it, with the shards pushed concurrently.
+    """
+    from util import ci_info_shards
+    groups = ci_info_shards.group(repoDir, files)
+    if len(groups) > 1:
+        return any(ci_info_shards.run_per_shard(groups, lambda shardDir, shardFiles: commit_changes(
+            shardDir, shardFiles, message, queue, window, asyncPush)))
+    repoDir, files = groups[0]
+    if asyncPush:
+        if queue:
+            raise ValueError('Queued changes cannot be pushed asynchronously')
+        from util import push_journal
+        return push_journal.commit(repoDir, files, message)
+    if queue:
+        from util import commit_queue
+        commit_queue.commit(repoDir, files, message, window=window)
+        return True
+    from util import ci_info_bulk
+    return ci_info_bulk.commit(repoDir, files, message)
+
+
+def flush_pushes(repoDir):
+    """Returns once the commits pushed asynchronously to the repo are pushed, with how many there were."""
+    from util import push_journal
+    return push_journal.flush(repoDir, wait=True)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script reads or writes the blue/green deployment state of an app environment
+# as a whole, validated record, see bg_deployment_state.py. A read prints every
+# field with one query; a write validates the given fields, merges them into the
+# record, writes it with one update of the file and commits it with one commit.
+#
+# Argument 1 (-f, --app-ci-info-file): File path to the app CI info yml file, relative to -d if given
+# Argument 2 (-e, --environment): Environment whose state is read or written
+# Argument 3 (-s, --set): Write mode: field=value to write, e.g. `live-group=blue`. Can be repeated,
+#                         fields not given keep their value. `null` clears a field
+# Argument 4 (-d, --ci-repo-dir): Path to the directory of git CI repo. Changes are committed and pushed to it
+# Argument 5 (-m, --message): Commit message, defaults to "update bg deployment state"
+# Argument 6 (-o, --output): Output format of a read: `shell` (KEY=value lines, default) or `json`
+# Argument 7 (--async): Commit locally and push in the background instead of waiting for the push,
+#                       see flush-pushes.py to wait until it is pushed
+# Argument 8 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+#
+# Note: App CI info file is the one which is required by stakater to store CI/CD related data.
+###############################################################################
+
+import argparse
+import json
+import os
+import shlex
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import api
+from util import bg_deployment_state
+from util import ci_info_client
+from util import ci_info_shards
+from util.commit_queue import CommitError
+from util.git_repo import GitError
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-f', '--app-ci-info-file', dest='f')
+argParse.add_argument('-e', '--environment', dest='e')
+argParse.add_argument('-s', '--set', dest='s', action='append')
+argParse.add_argument('-d', '--ci-repo-dir', dest='d')
+argParse.add_argument('-m', '--message', dest='m', default='update bg deployment state')
+argParse.add_argument('-o', '--output', dest='o', choices=['shell', 'json'], default='shell')
+argParse.add_argument('--async', dest='asyncPush', action='store_true')
+
+opts = tracing.parse_args(argParse)
+
+if not any([opts.f]):
+    argParse.print_usage(sys.stderr)
+    print('Argument `-f` or `--app-ci-info-file` must be specified', file=sys.stderr)
+    exit(1)
+
+if not any([opts.e]):
+    argParse.print_usage(sys.stderr)
+    print('Argument `-e` or `--environment` must be specified', file=sys.stderr)
+    exit(1)
+
+appCiInfoFilePath = os.path.join(opts.d, opts.f) if opts.d else opts.f
+
+if not opts.s:
+    try:
+        record = bg_deployment_state.read(appCiInfoFilePath, opts.e)
+    except (bg_deployment_state.StateError, ci_info_client.CiInfoDaemonError, ci_info_shards.ShardError,
+            OSError) as ex:
+        print(str(ex), file=sys.stderr)
+        exit(1)
+    if opts.o == 'json':
+        print(json.dumps(record))
+    else:
+        for field, value in record.items():
+            print('{}={}'.format(field.replace('-', '_').upper(),
+                                 shlex.quote(bg_deployment_state.format_field(value))))
+    exit(0)
+
+changes = {}
+for assignment in opts.s:
+    field, separator, value = assignment.partition('=')
+    if not separator:
+        print('Invalid value for `-s` or `--set`, expected field=value: ' + assignment, file=sys.stderr)
+        exit(1)
+    changes[field] = value
+
+try:
+    bg_deployment_state.write(appCiInfoFilePath, opts.e, changes)
+except (bg_deployment_state.StateError, ci_info_client.CiInfoDaemonError, ci_info_shards.ShardError,
+        OSError) as ex:
+    print(str(ex), file=sys.stderr)
+    exit(1)
+print('Deployment state of {} updated'.format(opts.e))
+
+if opts.d:
+    try:
+        committed = api.commit_changes(opts.d, [opts.f], opts.m, asyncPush=opts.asyncPush)
+    except (CommitError, ci_info_shards.ShardError, GitError) as ex:
+        print(str(ex), file=sys.stderr)
+        exit(1)
+    if not committed:
+        print('No changes to commit')
+    else:
+        print('Changes committed, push continues in the background' if opts.asyncPush else 'Changes committed and pushed')
@@ -0,0 +1,115 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Blue/green deployment state of an app, kept in its app CI info file as one record
+# per environment under `ci-data.blue-green-deployment.<environment>`:
+#   live-group: blue, green or null
+#   blue-group-ami-id, green-group-ami-id: AMI id or null
+#   is-deployment-rollback-valid, is-group-switch-valid, switched-to-new-group: true or false
+#
+# The record is validated against this schema, and read with one query and written with
+# one update of the file. Values written as strings by earlier versions, e.g. 'true' and
+# 'null', are read as the booleans and nulls they stand for.
+###############################################################################
+
+import re
+
+from util import api
+
+STATE_PROPERTY = 'ci-data.blue-green-deployment.{}'
+GROUPS = ('blue', 'green')
+AMI_ID = re.compile(r'^ami-[0-9A-Za-z]+$')
+GROUP_FIELDS = ('live-group',)
+AMI_FIELDS = ('blue-group-ami-id', 'green-group-ami-id')
+FLAG_FIELDS = ('is-deployment-rollback-valid', 'is-group-switch-valid', 'switched-to-new-group')
+FIELDS = GROUP_FIELDS + AMI_FIELDS + FLAG_FIELDS
+ENVIRONMENT = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class StateError(ValueError):
+    pass
+
+
+def parse_field(field, value):
+    """Returns the typed value of a field, given as typed or as a string, raising StateError if it is invalid."""
+    if field not in FIELDS:
+        raise StateError('Unknown blue/green deployment state field: "{}", expected one of: {}'
+                         .format(field, ', '.join(FIELDS)))
+    if isinstance(value, str) and value.lower() in ('null', ''):
+        value = None
+    if field in FLAG_FIELDS:
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            value = value.lower() == 'true'
+        # A flag never written is not set
+        if value is None:
+            value = False
+        valid = isinstance(value, bool)
+    elif field in GROUP_FIELDS:
+        valid = value is None or value in GROUPS
+    else:
+        valid = value is None or isinstance(value, str) and AMI_ID.match(value) is not None
+    if not valid:
+        raise StateError('Invalid value for {}: "{}"'.format(field, value))
+    return value
+
+
+def format_field(value):
+    """Formats a typed value for shell scripts: true, false, null or the string."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return 'null' if value is None else value
+
+
+def _parent(environment):
+    if not ENVIRONMENT.match(environment):
+        raise StateError('Invalid environment name: "{}"'.format(environment))
+    return STATE_PROPERTY.format(environment)
+
+
+def read(path, environment):
+    """Returns the validated record of the environment, as {field: typed value}, in schema order."""
+    parent = _parent(environment)
+    results = api.read_properties(path, ['{}.{{{}}}'.format(parent, ','.join(FIELDS))])
+    values = {prop[len(parent) + 1:]: value for pattern, prop, value in results}
+    return {field: parse_field(field, values.get(field)) for field in FIELDS}
+
+
+def write(path, environment, changes):
+    """Validates the changed fields, merges them into the current record and writes it with one update.
+
+    Returns the new record.
+    """
+    changes = {field: parse_field(field, value) for field, value in changes.items()}
+    record = read(path, environment)
+    record.update(changes)
+    parent = _parent(environment)
+    api.write_properties(path, {'{}.{}'.format(parent, field): value for field, value in record.items()})
+    return record
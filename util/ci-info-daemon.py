@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script runs the ci-info daemon, which keeps app CI info yml files parsed in
+# memory and serves reads and writes for read-from-yml.py and write-to-yml.py over
+# a Unix domain socket, with bulk reads and writes sent as one batch request. The
+# scripts fall back to reading the files themselves when the daemon is not running.
+#
+# Argument 1 (-s, --socket): Path of the Unix socket to listen on. Defaults to $STAKATER_CI_INFO_SOCKET,
+#                            else $XDG_RUNTIME_DIR/stakater-ci-info.sock, else stakater-ci-info.sock in a
+#                            directory private to the user, stakater-<uid> under $TMPDIR or /tmp
+# Argument 2 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+###############################################################################
+
+import argparse
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import ci_info_daemon
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-s', '--socket', dest='s')
+
+opts = tracing.parse_args(argParse)
+
+# Exit through serve()'s cleanup of the socket file on termination
+signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+try:
+    ci_info_daemon.serve(opts.s)
+except KeyboardInterrupt:
+    pass
+except RuntimeError as ex:
+    exit(str(ex))
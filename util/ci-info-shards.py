@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script manages the shards of a sharded CI info repo (see ci_info_shards.py):
+# prints the shard of apps, and pulls every shard concurrently before fleet reads,
+# e.g. `read-from-yml.py -m` with a manifest file of `*/app-ci-info.yml`.
+#
+# Argument 1 (-a, --app): App whose directory in its shard is printed, creating the shard if needed. Can be repeated
+# Argument 2 (-l, --list): Print the shard of every app found in the shards
+# Argument 3 (-s, --sync): Pull every shard, concurrently
+# Argument 4 (-j, --jobs): Number of shards to pull concurrently. Defaults to 8
+# Argument 5 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+#
+# Sharding is configured by the JSON file in $STAKATER_CI_INFO_SHARDS.
+###############################################################################
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import ci_info_shards
+from util.git_repo import GitError
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-a', '--app', dest='a', action='append')
+argParse.add_argument('-l', '--list', dest='l', action='store_true')
+argParse.add_argument('-s', '--sync', dest='s', action='store_true')
+argParse.add_argument('-j', '--jobs', dest='j', type=int)
+
+opts = tracing.parse_args(argParse)
+
+if not any([opts.a, opts.l, opts.s]):
+    argParse.print_usage()
+    print('One of the arguments `-a`, `-l` or `-s` must be specified')
+    exit(1)
+
+try:
+    config = ci_info_shards.load_config()
+    if not config:
+        print('Sharding is not enabled, set $' + ci_info_shards.SHARDS_ENV)
+        exit(1)
+    if opts.s:
+        print('Pulled {} shard(s)'.format(len(ci_info_shards.sync(opts.j))))
+    for app in opts.a or []:
+        print('{} {}'.format(app, ci_info_shards.resolve(os.path.join(config['root'], app), create=True)))
+    if opts.l:
+        for path in ci_info_shards.expand(os.path.join(config['root'], '*', '')):
+            app = os.path.basename(os.path.normpath(path))
+            print('{} {}'.format(app, ci_info_shards.shard_of(config, app)))
+except ci_info_shards.ShardError as ex:
+    print(str(ex))
+    exit(1)
+except GitError as gitException:
+    print("Error Code: {} \nError: {}".format(gitException.returncode, gitException.stderr))
+    exit(1)
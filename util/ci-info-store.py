@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script manages the SQLite store of app CI info files (see ci_info_store.py):
+# imports yml files into it, exports them back, and queries values across all the
+# files with its index, e.g. the apps live on the green group in prod:
+#   ci-info-store.py -q ci-data.blue-green-deployment.prod.live-group -v green
+# or the highest build number:
+#   ci-info-store.py -q ci-data.current-build-number -s desc -n 1
+#
+# Argument 1 (-b, --database): Path to the database file, defaults to $STAKATER_CI_INFO_DB
+# Argument 2 (-i, --import): File, or directory of app CI info files, to import. Can be repeated
+# Argument 3 (-e, --export): Directory to write the files under the root (-r) to, with the same relative paths.
+#                            Files are exported exactly as imported or last written
+# Argument 4 (-r, --root): Directory of the files to export or query, defaults to all the files for queries
+#                          and the current directory for exports
+# Argument 5 (-q, --query): Property to query across the files, may contain the wildcards and projections of
+#                           read-from-yml.py. Only scalar values are matched
+# Argument 6 (-v, --value): Only match this value, as JSON, e.g. `12` or `true`, or else a string
+# Argument 7 (-s, --sort): Order the matches by value, `asc` or `desc`, instead of by file
+# Argument 8 (-n, --limit): Print at most this many matches
+# Argument 9 (-o, --output): Output format of a query: `text` (file, property and value per line, default) or `json`
+# Argument 10 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+#
+# Files changed on disk since they were imported or written are imported again before a query or export,
+# and those deleted are dropped from the store.
+#
+# Note: App CI info file is the one which is required by stakater to store CI/CD related data.
+###############################################################################
+
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import ci_info_store
+from util import path_query
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-b', '--database', dest='b', default=ci_info_store.database_path())
+argParse.add_argument('-i', '--import', dest='i', action='append')
+argParse.add_argument('-e', '--export', dest='e')
+argParse.add_argument('-r', '--root', dest='r')
+argParse.add_argument('-q', '--query', dest='q')
+argParse.add_argument('-v', '--value', dest='v')
+argParse.add_argument('-s', '--sort', dest='s', choices=['asc', 'desc'])
+argParse.add_argument('-n', '--limit', dest='n', type=int)
+argParse.add_argument('-o', '--output', dest='o', choices=['text', 'json'], default='text')
+
+opts = tracing.parse_args(argParse)
+
+if not any([opts.b]):
+    argParse.print_usage()
+    print('Argument `-b` or `--database` must be specified, or $' + ci_info_store.DB_ENV + ' set')
+    exit(1)
+
+if not any([opts.i, opts.e, opts.q]):
+    argParse.print_usage()
+    print('One of the arguments `-i`, `-e` or `-q` must be specified')
+    exit(1)
+
+value = ci_info_store.ANY
+if opts.v is not None:
+    try:
+        value = json.loads(opts.v)
+    except ValueError:
+        value = opts.v
+    if isinstance(value, (dict, list)):
+        print('Argument `-v` or `--value` must be a scalar')
+        exit(1)
+
+try:
+    with contextlib.closing(ci_info_store.connect(opts.b)) as conn:
+        if opts.i:
+            print('Imported {} file(s)'.format(len(ci_info_store.import_files(conn, opts.i))))
+        if opts.e:
+            print('Exported {} file(s)'.format(len(ci_info_store.export_files(conn, opts.r or '.', opts.e))))
+        if opts.q:
+            ci_info_store.refresh_all(conn, opts.r)
+            matches = ci_info_store.find(conn, opts.q, value, opts.s, opts.n, opts.r)
+            if opts.o == 'json':
+                print(json.dumps([{'file': path, 'property': prop, 'value': matched}
+                                  for path, prop, matched in matches]))
+            else:
+                for path, prop, matched in matches:
+                    print('{} {}={}'.format(path, prop, json.dumps(matched) if matched is None or
+                                            isinstance(matched, bool) else matched))
+except (ci_info_store.StoreError, path_query.QueryError, sqlite3.Error, OSError, ValueError) as ex:
+    print(str(ex))
+    exit(1)
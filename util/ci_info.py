@@ -0,0 +1,135 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Shared helpers to load and store app CI info yml files, keeping their format and
+# comments. See property_path.py to read and update properties of the loaded documents.
+#
+# Note: App CI info file is the one which is required by stakater to store CI/CD related data.
+###############################################################################
+
+import io
+import os
+import tempfile
+
+from util import property_path
+from util import tracing
+from util import yaml_backend
+from util import yaml_patch
+
+
+def load(path):
+    """Loads the yml file, keeping its format and comments."""
+    with open(path, 'r') as ymlFile:
+        return yaml_backend.round_trip_load(ymlFile)
+
+
+def write_text(path, text):
+    """Atomically replaces the file with the text, unless it already has that content. Returns True if written.
+
+    The text is written to a temporary file in the same directory, fsynced and renamed over
+    the file, so concurrent readers see either the old or the new content, never a partial file.
+    """
+    with tracing.span('ci-info.write', file=path) as span:
+        written = _write_text(path, text)
+        span.set(written=written)
+        return written
+
+
+def _write_text(path, text):
+    try:
+        with open(path, 'r') as current:
+            if current.read() == text:
+                return False
+        stat = os.stat(path)
+    except FileNotFoundError:
+        stat = None
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmpPath = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as tmpFile:
+            tmpFile.write(text)
+            tmpFile.flush()
+            os.fsync(tmpFile.fileno())
+        if stat is not None:
+            os.chmod(tmpPath, stat.st_mode & 0o7777)
+            try:
+                os.chown(tmpPath, stat.st_uid, stat.st_gid)
+            except PermissionError:
+                pass
+        os.replace(tmpPath, path)
+    except BaseException:
+        os.unlink(tmpPath)
+        raise
+    dirFd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dirFd)
+    finally:
+        os.close(dirFd)
+    return True
+
+
+def dump(document, path):
+    """Atomically writes the document to the file, skipping the write if nothing changed. Returns True if written."""
+    stream = io.StringIO()
+    yaml_backend.round_trip_dump(document, stream)
+    return write_text(path, stream.getvalue())
+
+
+def update(path, properties):
+    """Sets the given map of dotted properties in the file. Returns True if the file changed.
+
+    Existing scalar values are patched, and new scalar keys of existing mappings added, in place on
+    the text, without parsing or re-serializing the document; anything else, e.g. new parent keys,
+    falls back to a round trip load and dump.
+    """
+    with tracing.span('ci-info.update', file=path) as span:
+        with open(path, 'r') as ymlFile:
+            text = ymlFile.read()
+        patched = yaml_patch.patch(text, properties)
+        span.set(patched=patched is not None)
+        if patched is not None:
+            return write_text(path, patched)
+        return write_text(path, _round_trip_update(text, properties))
+
+
+def update_text(text, properties):
+    """Returns the yml text with the given map of dotted properties set, the same way as update."""
+    patched = yaml_patch.patch(text, properties)
+    return patched if patched is not None else _round_trip_update(text, properties)
+
+
+def _round_trip_update(text, properties):
+    document = yaml_backend.round_trip_load(text)
+    property_path.set_properties(document, properties)
+    stream = io.StringIO()
+    yaml_backend.round_trip_dump(document, stream)
+    return stream.getvalue()
@@ -0,0 +1,185 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Bulk reads and writes of properties across many app CI info files, e.g. for
+# fleet-wide jobs touching every app in the CI info repo.
+#
+# A manifest is a JSON list of operations:
+#   [{"file": "<app>/app-ci-info.yml", "property": "ci-data.x", "value": "y"}, ...]
+# where `value` is only needed for writes. Operations are grouped per file, so that
+# each file is read or written once, and files are processed concurrently in a
+# process pool with bounded parallelism. Written files can then be committed and
+# pushed with a single commit. With the SQLite store enabled, all the writes are
+# made in one transaction instead, see ci_info_store.py. While the ci-info daemon is
+# running, all the files are read or written with one batch request to it instead.
+#
+# Files of reads may be glob patterns, e.g. `*/app-ci-info.yml` for every app, which
+# are matched across all the shards of a sharded CI info repo, see ci_info_shards.py.
+###############################################################################
+
+import concurrent.futures
+import contextlib
+import json
+import os
+import sys
+
+from util import ci_info
+from util import ci_info_cache
+from util import ci_info_client
+from util import ci_info_shards
+from util import ci_info_store
+from util import commit_queue
+from util import property_path
+from util import tracing
+from util.git_repo import GitRepo
+
+
+class ManifestError(Exception):
+    pass
+
+
+def load_manifest(path, write=False):
+    """Reads the manifest from the file, or stdin if path is `-`, and checks its operations."""
+    try:
+        if path == '-':
+            operations = json.load(sys.stdin)
+        else:
+            with open(path) as manifestFile:
+                operations = json.load(manifestFile)
+    except ValueError as ex:
+        raise ManifestError('Invalid manifest: ' + str(ex))
+    if not isinstance(operations, list):
+        raise ManifestError('Invalid manifest: expected a list of operations')
+    required = ('file', 'property', 'value') if write else ('file', 'property')
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or any(key not in operation for key in required):
+            raise ManifestError('Invalid manifest: operation {} must have the keys: {}'
+                                .format(index, ', '.join(required)))
+    return operations
+
+
+def group_by_file(operations, write=False):
+    """Maps each file, in manifest order, to its properties map (writes) or property list (reads)."""
+    groups = {}
+    files = []
+    for operation in operations:
+        path = operation['file']
+        if path not in groups:
+            groups[path] = {} if write else []
+            files.append(path)
+        if write:
+            groups[path][operation['property']] = operation['value']
+        elif operation['property'] not in groups[path]:
+            groups[path].append(operation['property'])
+    return [(path, groups[path]) for path in files]
+
+
+def _read_file(task):
+    path, patterns = task
+    return path, property_path.read_properties(ci_info_cache.load(path), patterns, typed=True)
+
+
+def _update_file(task):
+    path, properties = task
+    return path, ci_info.update(path, properties)
+
+
+def _run(function, tasks, jobs):
+    if jobs == 1 or len(tasks) <= 1:
+        with tracing.span('bulk.run', files=len(tasks), jobs=1):
+            return [function(task) for task in tasks]
+    jobs = jobs or os.cpu_count() or 1
+    with tracing.span('bulk.run', files=len(tasks), jobs=jobs), \
+            concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(function, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+
+def _serve(op, tasks):
+    """Runs the tasks with one batch request to the ci-info daemon, or returns None if it is not running."""
+    with tracing.span('bulk.daemon', files=len(tasks)):
+        results = ci_info_client.batch([{'op': op, 'file': path, 'properties': properties, 'typed': True}
+                                        for path, properties in tasks])
+    return None if results is None else [(path, result) for (path, properties), result in zip(tasks, results)]
+
+
+def _expand(operations, baseDir):
+    for operation in operations:
+        if not property_path.GLOB_CHARS.search(operation['file']):
+            yield operation
+            continue
+        for path in ci_info_shards.expand(os.path.join(baseDir, operation['file'])):
+            yield dict(operation, file=os.path.relpath(path, baseDir) if baseDir != '.' else path)
+
+
+def read_all(operations, baseDir='.', jobs=None):
+    """Reads all the properties in the manifest. Returns {file: {property: value}}, with null for missing values."""
+    groups = group_by_file(_expand(operations, baseDir))
+    tasks = [(ci_info_shards.resolve(os.path.join(baseDir, path)), patterns) for path, patterns in groups]
+    served = _serve('get', tasks) or _run(_read_file, tasks, jobs)
+    values = {}
+    for (path, patterns), (fullPath, results) in zip(groups, served):
+        values[path] = {prop: value for pattern, prop, value in results}
+    return values
+
+
+def write_all(operations, baseDir='.', jobs=None):
+    """Writes all the properties in the manifest. Returns the files which changed."""
+    groups = group_by_file(operations, write=True)
+    if ci_info_store.enabled():
+        fullPaths = [ci_info_shards.resolve(os.path.join(baseDir, path), create=True)
+                     for path, properties in groups]
+        with contextlib.closing(ci_info_store.connect()) as conn:
+            changed = set(ci_info_store.update(conn, {fullPath: properties for fullPath, (path, properties)
+                                                      in zip(fullPaths, groups)}))
+        return [path for fullPath, (path, properties) in zip(fullPaths, groups) if fullPath in changed]
+    tasks = [(ci_info_shards.resolve(os.path.join(baseDir, path), create=True), properties)
+             for path, properties in groups]
+    served = _serve('set', tasks) or _run(_update_file, tasks, jobs)
+    return [path for (path, properties), (fullPath, changed) in zip(groups, served) if changed]
+
+
+def commit(repoDir, files, message, retries=5):
+    """Commits the files with one commit and pushes, retrying rejected pushes. Returns False if nothing changed.
+
+    In a sharded CI info repo, the files of each shard are committed to it, with the shards pushed concurrently.
+    """
+    groups = ci_info_shards.group(repoDir, files)
+    if len(groups) > 1:
+        return any(ci_info_shards.run_per_shard(groups, lambda shardDir, shardFiles: commit(
+            shardDir, shardFiles, message, retries)))
+    repoDir, files = groups[0]
+    repo = GitRepo(repoDir)
+    repo.add(*files)
+    if not repo.has_staged_changes():
+        return False
+    repo.commit(message)
+    commit_queue.push_with_retry(repo, retries)
+    return True
@@ -0,0 +1,114 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# On-disk cache of parsed yml files for read-only callers, keyed by a hash of the
+# file contents. A hit returns the document as plain dicts and lists straight from
+# a JSON file, without loading a yml library at all.
+#
+# Entries live in $STAKATER_CI_INFO_CACHE_DIR (default ~/.cache/stakater/ci-info). Both
+# yml loaders of yaml_backend.py resolve scalars the same way, so entries do not depend
+# on the loader that wrote them.
+# Scripts that write the yml files must keep using ci_info.load so that the
+# format and comments of the files are preserved.
+###############################################################################
+
+import hashlib
+import json
+import os
+
+from util import tracing
+
+CACHE_DIR_ENV = 'STAKATER_CI_INFO_CACHE_DIR'
+# Bump when the layout or the parsing of cached entries changes
+CACHE_FORMAT = 3
+MAX_ENTRIES = 512
+
+
+def cache_dir():
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser('~'), '.cache', 'stakater', 'ci-info')
+
+
+def to_plain(node):
+    """Converts a round trip document to JSON compatible dicts, lists and scalars."""
+    if isinstance(node, dict):
+        return {str(key): to_plain(value) for key, value in node.items()}
+    if isinstance(node, (list, tuple)):
+        return [to_plain(value) for value in node]
+    if node is None or isinstance(node, bool):
+        return node
+    if isinstance(node, int):
+        return int(node)
+    # Keep strings and everything else, e.g. floats and dates, as they would be printed
+    return str(node)
+
+
+def _prune(directory):
+    entries = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.json')]
+    if len(entries) <= MAX_ENTRIES:
+        return
+    entries.sort(key=os.path.getmtime)
+    for entry in entries[:len(entries) - MAX_ENTRIES]:
+        os.unlink(entry)
+
+
+def load(path):
+    """Returns the yml file parsed into plain dicts and lists, from the cache if its contents are unchanged."""
+    with tracing.span('ci-info.cached-load', file=path) as span:
+        return _load(path, span)
+
+
+def _load(path, span):
+    with open(path, 'rb') as ymlFile:
+        content = ymlFile.read()
+    directory = cache_dir()
+    entryPath = os.path.join(directory, 'v{}-{}.json'.format(CACHE_FORMAT, hashlib.sha256(content).hexdigest()))
+    try:
+        with open(entryPath, 'r') as entryFile:
+            document = json.load(entryFile)
+        span.set(hit=True)
+        return document
+    except (OSError, ValueError):
+        span.set(hit=False)
+
+    import tempfile
+    from util import yaml_backend
+    document = to_plain(yaml_backend.safe_load(content.decode('utf-8')))
+    # The cache is only an optimization, so failing to write it is not an error
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmpFile:
+            json.dump(document, tmpFile, separators=(',', ':'))
+        os.replace(tmpPath, entryPath)
+        _prune(directory)
+    except OSError:
+        pass
+    return document
@@ -0,0 +1,126 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Thin client for the ci-info daemon (see ci-info-daemon.py).
+#
+# Each call returns None when the daemon is not running, so that callers can fall
+# back to reading and writing the yml files in-process. The socket lives in the user's
+# private run dir ($XDG_RUNTIME_DIR, else a 0700 dir under $TMPDIR or /tmp) and its path can
+# be overridden with the STAKATER_CI_INFO_SOCKET environment variable. A socket that is not
+# owned by the current user, or that others can write to, is ignored as if the daemon was
+# not running, so that another user cannot serve or receive the yml files.
+#
+# This module must stay free of yml imports, as avoiding them is the point of the daemon.
+###############################################################################
+
+import json
+import os
+import stat
+
+from util import tracing
+
+SOCKET_ENV = 'STAKATER_CI_INFO_SOCKET'
+SOCKET_NAME = 'stakater-ci-info.sock'
+
+
+class CiInfoDaemonError(Exception):
+    pass
+
+
+def run_dir():
+    """Returns the directory private to the current user that holds the socket by default."""
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.environ['XDG_RUNTIME_DIR']
+    return os.path.join(os.environ.get('TMPDIR') or '/tmp', 'stakater-{}'.format(os.geteuid()))
+
+
+def socket_path():
+    return os.environ.get(SOCKET_ENV) or os.path.join(run_dir(), SOCKET_NAME)
+
+
+def is_private(path):
+    """Whether path is a socket owned by the current user, in a directory that only it can replace files in."""
+    try:
+        socketStat = os.lstat(path)
+        dirStat = os.stat(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return False
+    if not stat.S_ISSOCK(socketStat.st_mode) or socketStat.st_uid != os.geteuid() \
+            or socketStat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return False
+    # Others may create files in a sticky directory such as /tmp, but not replace ours
+    return dirStat.st_uid in (os.geteuid(), 0) and \
+        (not dirStat.st_mode & (stat.S_IWGRP | stat.S_IWOTH) or bool(dirStat.st_mode & stat.S_ISVTX))
+
+
+def request(message, path=None):
+    """Sends a request to the daemon and returns its response, or None if the daemon is not running."""
+    path = path or socket_path()
+    if not is_private(path):
+        return None
+    # Only imported once the daemon is running, to keep reads without it cheap
+    import socket
+    try:
+        with tracing.span('ci-info.daemon-request', op=message.get('op')), \
+                socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(path)
+            conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            with conn.makefile('rb') as reader:
+                line = reader.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    response = json.loads(line.decode('utf-8'))
+    if not response['ok']:
+        raise CiInfoDaemonError(response['error'])
+    return response
+
+
+def get_properties(path, patterns, typed=False):
+    """Returns (pattern, property, value) triples as in property_path.read_properties."""
+    response = request({'op': 'get', 'file': os.path.abspath(path), 'properties': patterns, 'typed': typed})
+    return None if response is None else [tuple(result) for result in response['result']]
+
+
+def set_properties(path, properties):
+    """Returns True once the daemon has written the properties to the file."""
+    response = request({'op': 'set', 'file': os.path.abspath(path), 'properties': properties})
+    return None if response is None else True
+
+
+def batch(requests):
+    """Runs a list of get and set requests, e.g. {'op': 'get', 'file': path, 'properties': patterns},
+    in one round trip and returns their results in order, with whether the file changed for sets.
+    """
+    requests = [dict(req, file=os.path.abspath(req['file'])) for req in requests]
+    response = request({'op': 'batch', 'requests': requests})
+    return None if response is None else response['result']
@@ -0,0 +1,152 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Resident server that keeps parsed app CI info yml files in memory and answers
+# get/set/batch requests over a Unix domain socket, one JSON message per line. A batch
+# runs a list of get and set requests in order, in one round trip.
+#
+# Cached documents are keyed by path and invalidated whenever the file's inode,
+# size or modification time changes, so writes made without the daemon are seen.
+# Writes patch the file in place where possible, the same way as ci_info.update.
+###############################################################################
+
+import json
+import os
+import socketserver
+import threading
+
+from util import ci_info
+from util import ci_info_cache
+from util import ci_info_client
+from util import property_path
+from util import tracing
+
+
+class DocumentCache(object):
+    def __init__(self):
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def lock(self, path):
+        with self._guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def _stamp(path):
+        stat = os.stat(path)
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def load(self, path):
+        """Returns the parsed document, re-reading the file only if it changed. Hold lock(path)."""
+        stamp = self._stamp(path)
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, ci_info.load(path))
+            self._entries[path] = entry
+        return entry[1]
+
+    def update(self, path, properties):
+        """Sets the properties in the file, patching it in place where possible, see ci_info.update. Hold lock(path).
+
+        The cached document is dropped and parsed again on the next get. Returns True if the file changed.
+        """
+        changed = ci_info.update(path, properties)
+        self._entries.pop(path, None)
+        return changed
+
+
+def handle(cache, message):
+    op = message.get('op')
+    if op == 'ping':
+        return 'pong'
+    if op == 'batch':
+        return [handle(cache, req) for req in message['requests']]
+    if op not in ('get', 'set'):
+        raise ValueError('Unknown operation: {}'.format(op))
+
+    path = os.path.realpath(message['file'])
+    with cache.lock(path):
+        if op == 'set':
+            return cache.update(path, message['properties'])
+        document = cache.load(path)
+        if message.get('typed'):
+            # Round trip documents hold ruamel.yaml types, which are not JSON serializable
+            return [(pattern, prop, ci_info_cache.to_plain(value)) for pattern, prop, value
+                    in property_path.read_properties(document, message['properties'], typed=True)]
+        return property_path.read_properties(document, message['properties'])
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                message = json.loads(line.decode('utf-8'))
+                with tracing.span('ci-info-daemon.request', op=message.get('op')):
+                    response = {'ok': True, 'result': handle(self.server.cache, message)}
+            except Exception as ex:
+                response = {'ok': False, 'error': '{}: {}'.format(type(ex).__name__, ex)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class CiInfoServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        self.cache = DocumentCache()
+        socketserver.UnixStreamServer.__init__(self, path, RequestHandler)
+
+
+def serve(path=None):
+    path = path or ci_info_client.socket_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    # Remove a socket left behind by a daemon that did not shut down cleanly
+    if os.path.lexists(path):
+        if ci_info_client.request({'op': 'ping'}, path) is not None:
+            raise RuntimeError('ci-info daemon is already running on {}'.format(path))
+        os.unlink(path)
+    # Only the current user may connect, the client ignores sockets that others can write to
+    umask = os.umask(0o077)
+    try:
+        server = CiInfoServer(path)
+    finally:
+        os.umask(umask)
+    if not ci_info_client.is_private(path):
+        server.server_close()
+        os.unlink(path)
+        raise RuntimeError('ci-info daemon socket {} is not private to the current user'.format(path))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
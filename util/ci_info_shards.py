@@ -0,0 +1,270 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Optional sharding of the CI info repo by app, so that pipelines of different apps
+# commit and push to different refs instead of all serializing on one branch.
+#
+# Scripts keep being given paths under the CI info repo, e.g. `-d /app/stakater/ci-info
+# -f myapp/app-ci-info.yml`; paths under the configured root are resolved to the app's
+# shard, whose first path component is the app. Enabled by setting
+# $STAKATER_CI_INFO_SHARDS to a JSON config file, with one of the layouts:
+#
+#   {"root": "/app/stakater/ci-info", "layout": "repos",
+#    "repos": ["/app/stakater/ci-info-0", "/app/stakater/ci-info-1"],
+#    "apps": {"big-app": "/app/stakater/ci-info-big"}}
+# Each app lives in a clone of one of the repos, picked by a hash of its name, unless
+# it is pinned to a repo in `apps`. The files keep their path in the repo.
+#
+#   {"root": "/app/stakater/ci-info", "layout": "branches", "prefix": "ci-info/",
+#    "worktrees": "/app/stakater/ci-info-shards"}
+# Each app lives on its own branch (`prefix` + app, default `ci-info/`) of the root repo,
+# holding only the app's directory, checked out in a worktree per app under `worktrees`
+# (default: the root followed by `-shards`). The branch of an app is created from its
+# directory in the root repo's HEAD the first time it is written.
+#
+# Only writes and commits create shards; reads never run git, and a file of a shard
+# which is not checked out reads as missing, see `ci-info-shards.py -s` to check out all.
+# The git and thread pool modules are only imported once shards are created or synced.
+###############################################################################
+
+import glob
+import hashlib
+import json
+import os
+
+from util import file_lock
+from util import tracing
+
+SHARDS_ENV = 'STAKATER_CI_INFO_SHARDS'
+LAYOUTS = ('repos', 'branches')
+DEFAULT_JOBS = 8
+_SHARD_COMMIT_MESSAGE = '[Stakater] Created CI info shard of: {}'
+_configs = {}
+
+
+class ShardError(Exception):
+    pass
+
+
+def load_config():
+    """Returns the sharding config from $STAKATER_CI_INFO_SHARDS, or None if sharding is not enabled."""
+    path = os.environ.get(SHARDS_ENV)
+    if not path:
+        return None
+    if path not in _configs:
+        try:
+            with open(path) as configFile:
+                config = json.load(configFile)
+        except (OSError, ValueError) as ex:
+            raise ShardError('Invalid shards config {}: {}'.format(path, ex))
+        if not isinstance(config, dict) or not config.get('root') or config.get('layout') not in LAYOUTS:
+            raise ShardError('Invalid shards config {}: expected a `root` and a `layout` of: {}'
+                             .format(path, ', '.join(LAYOUTS)))
+        if config['layout'] == 'repos' and not (isinstance(config.get('repos'), list) and config['repos']):
+            raise ShardError('Invalid shards config {}: the `repos` layout needs a list of `repos`'.format(path))
+        config['root'] = os.path.realpath(config['root'])
+        config.setdefault('apps', {})
+        config.setdefault('prefix', 'ci-info/')
+        config.setdefault('worktrees', config['root'] + '-shards')
+        _configs[path] = config
+    return _configs[path]
+
+
+def enabled():
+    return load_config() is not None
+
+
+def _app_path(config, path):
+    """Returns the app and the path relative to the root, or None if the path is not in an app of the root."""
+    relPath = os.path.relpath(os.path.realpath(path), config['root'])
+    if relPath == '.' or relPath.startswith('..') or relPath.split(os.sep)[0] == '.git':
+        return None
+    return relPath.split(os.sep)[0], relPath
+
+
+def shard_of(config, app):
+    """Returns the directory of the app's shard, without creating it."""
+    if config['layout'] == 'repos':
+        pinned = config['apps'].get(app)
+        if pinned:
+            return pinned
+        repos = config['repos']
+        return repos[int(hashlib.sha1(app.encode('utf-8')).hexdigest(), 16) % len(repos)]
+    return os.path.join(config['worktrees'], app)
+
+
+def _ensure_shard(config, app):
+    shardDir = shard_of(config, app)
+    if os.path.exists(os.path.join(shardDir, '.git')):
+        return shardDir
+    if config['layout'] == 'repos':
+        raise ShardError('Shard {} of app {} is not a git repository, it must be cloned first'.format(shardDir, app))
+    from util.git_repo import GitRepo
+    root = GitRepo(config['root'])
+    os.makedirs(config['worktrees'], exist_ok=True)
+    # Worktrees are added in the root repo, one at a time
+    with file_lock.locked(os.path.join(config['worktrees'], '.lock')), tracing.span('shards.create', app=app):
+        if not os.path.exists(os.path.join(shardDir, '.git')):
+            _add_worktree(root, config['prefix'] + app, app, shardDir)
+    return shardDir
+
+
+def _add_worktree(root, branch, app, shardDir):
+    from util.git_repo import GitError
+    from util.git_repo import GitRepo
+    try:
+        root.run('fetch', 'origin', '+refs/heads/{0}:refs/remotes/origin/{0}'.format(branch))
+        root.run('worktree', 'add', '--track', '-B', branch, shardDir, 'origin/' + branch)
+        return
+    except GitError as ex:
+        if "couldn't find remote ref" not in ex.stderr:
+            raise
+    # First use of the app: its branch starts with only the app's directory from HEAD
+    try:
+        appTree = root.run('rev-parse', '--verify', '--quiet', 'HEAD:' + app)
+        entries = '040000 tree {}\t{}\n'.format(appTree, app)
+    except GitError:
+        entries = ''
+    tree = root.run('mktree', input=entries)
+    commit = root.run('commit-tree', tree, '-m', _SHARD_COMMIT_MESSAGE.format(app))
+    root.run('worktree', 'add', '-B', branch, shardDir, commit)
+    shard = GitRepo(shardDir)
+    try:
+        shard.run('push', '-u', 'origin', branch)
+    except GitError:
+        # Created concurrently by another agent, use that one
+        shard.run('fetch', 'origin', '+refs/heads/{0}:refs/remotes/origin/{0}'.format(branch))
+        shard.run('reset', '--hard', 'origin/' + branch)
+        shard.run('branch', '--set-upstream-to', 'origin/' + branch)
+
+
+def resolve(path, create=False):
+    """Returns the path of the file or directory in its app's shard, or the path itself if it is not sharded.
+
+    Unless create, for writes, the shard is not created if it does not exist, so that the path does not exist either.
+    """
+    config = load_config()
+    appPath = config and _app_path(config, path)
+    if not appPath:
+        return path
+    app, relPath = appPath
+    return os.path.join(_ensure_shard(config, app) if create else shard_of(config, app), relPath)
+
+
+def group(repoDir, files):
+    """Groups the files of the repo by shard, to commit them. Returns (repo dir, files) pairs, the repo itself if
+    it is not sharded.
+
+    Files are relative to the repo dir, or absolute. Shards are created if they do not exist.
+    """
+    config = load_config()
+    if not config or os.path.realpath(repoDir) != config['root']:
+        return [(repoDir, files)]
+    groups = {}
+    for path in files:
+        appPath = _app_path(config, os.path.join(repoDir, path))
+        if not appPath:
+            raise ShardError('File {} is not in the directory of an app'.format(path))
+        shardDir = _ensure_shard(config, appPath[0])
+        groups.setdefault(shardDir, []).append(os.path.join(shardDir, appPath[1]))
+    return list(groups.items())
+
+
+def run_per_shard(groups, function, jobs=None):
+    """Runs function(repo dir, files) for each group of files concurrently. Returns the results in order."""
+    if len(groups) == 1:
+        return [function(*groups[0])]
+    import concurrent.futures
+    with tracing.span('shards.run', shards=len(groups)), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=min(len(groups), jobs or DEFAULT_JOBS)) as executor:
+        return list(executor.map(lambda pair: function(*pair), groups))
+
+
+def _checked_out_apps(config):
+    if not os.path.isdir(config['worktrees']):
+        return []
+    return [name for name in os.listdir(config['worktrees'])
+            if os.path.exists(os.path.join(config['worktrees'], name, '.git'))]
+
+
+def _branch_apps(config):
+    from util.git_repo import GitRepo
+    root = GitRepo(config['root'])
+    refs = root.run('for-each-ref', '--format=%(refname)', 'refs/remotes/origin/' + config['prefix'])
+    apps = [ref[len('refs/remotes/origin/' + config['prefix']):] for ref in refs.split('\n') if ref]
+    return sorted(set(apps) | set(_checked_out_apps(config)))
+
+
+def shards(config, create=False):
+    """Returns the directories of the shards which exist; with create, of all of them, checking out the missing ones."""
+    if config['layout'] == 'repos':
+        return sorted(set(config['repos']) | set(config['apps'].values()))
+    if create:
+        return [_ensure_shard(config, app) for app in _branch_apps(config)]
+    return [shard_of(config, app) for app in sorted(_checked_out_apps(config))]
+
+
+def sync(jobs=None):
+    """Pulls every shard concurrently. Returns the shard directories."""
+    config = load_config()
+    if not config:
+        raise ShardError('Sharding is not enabled, set ${}'.format(SHARDS_ENV))
+    from util.git_repo import GitRepo
+    if config['layout'] == 'branches':
+        # One fetch for all the branches, which the worktrees share
+        GitRepo(config['root']).run('fetch', 'origin', '+refs/heads/{0}*:refs/remotes/origin/{0}*'
+                                    .format(config['prefix']))
+        shardDirs = shards(config, create=True)
+        update = lambda shardDir: GitRepo(shardDir).run('rebase', '--autostash', '@{upstream}')
+    else:
+        shardDirs = shards(config)
+        update = lambda shardDir: GitRepo(shardDir).pull_rebase()
+    run_per_shard([(shardDir,) for shardDir in shardDirs], update, jobs)
+    return shardDirs
+
+
+def expand(pattern):
+    """Returns the files matching the glob pattern, across all the existing shards for a pattern under the root.
+
+    Files under the root are returned with their path under the root, wherever their shard is.
+    """
+    config = load_config()
+    appPath = config and _app_path(config, os.path.abspath(pattern))
+    if not appPath:
+        return sorted(glob.glob(pattern))
+    files = []
+    for shardDir in shards(config):
+        for match in glob.glob(os.path.join(shardDir, appPath[1])):
+            relPath = os.path.relpath(match, shardDir)
+            # Skip the copies of apps which moved to another shard
+            if shard_of(config, relPath.split(os.sep)[0]) == shardDir:
+                files.append(os.path.join(config['root'], relPath))
+    return sorted(files)
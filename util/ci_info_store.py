@@ -0,0 +1,355 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Optional SQLite store of app CI info files, for indexed queries across the fleet,
+# e.g. which apps are live on the green group in prod or the highest build number,
+# and for updating several properties of several files in one transaction.
+#
+# The yml files stay the source of truth for git and for tooling that reads them
+# directly; the store keeps a copy of each file, exact to the byte, its parsed
+# document, and an index of its scalar values by property, e.g.
+#   ci-data.blue-green-deployment.prod.live-group = green
+#   ci-data.builds[0].build-number = 12
+# Writes through the store update the file and its copy together. A copy whose file
+# changed since, e.g. after a git pull, is imported again when it is next read.
+#
+# Enabled by setting $STAKATER_CI_INFO_DB to the database file, in which case the
+# read and write scripts go through it. The database is in WAL mode, so readers
+# are not blocked by a writer, and writers are serialized by SQLite.
+###############################################################################
+
+import fnmatch
+import hashlib
+import json
+import os
+
+from util import ci_info_cache
+from util import path_query
+from util import property_path
+from util import tracing
+
+DB_ENV = 'STAKATER_CI_INFO_DB'
+APP_CI_INFO_FILE_NAME = 'app-ci-info.yml'
+# Bump when the schema changes, older databases are then imported again from the files
+SCHEMA_VERSION = 2
+SCHEMA = '''
+CREATE TABLE documents (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    text TEXT NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE TABLE properties (
+    path TEXT NOT NULL REFERENCES documents(path) ON DELETE CASCADE,
+    property TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value,
+    PRIMARY KEY (path, property)
+) WITHOUT ROWID;
+CREATE INDEX properties_by_value ON properties(property, value);
+'''
+# Upper bound of the properties starting with a prefix
+_PREFIX_END = '\U0010ffff'
+ANY = object()
+
+
+class StoreError(Exception):
+    pass
+
+
+def database_path():
+    return os.environ.get(DB_ENV)
+
+
+def enabled():
+    return bool(database_path())
+
+
+def connect(path=None):
+    """Opens the database, creating its schema if needed."""
+    path = path or database_path()
+    if not path:
+        raise StoreError('No database given, set ${}'.format(DB_ENV))
+    import sqlite3
+    with tracing.span('store.connect'):
+        conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            with _transaction(conn):
+                if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                    conn.execute('DROP TABLE IF EXISTS properties')
+                    conn.execute('DROP TABLE IF EXISTS documents')
+                    for statement in SCHEMA.split(';'):
+                        if statement.strip():
+                            conn.execute(statement)
+                    conn.execute('PRAGMA user_version={}'.format(SCHEMA_VERSION))
+    return conn
+
+
+class _transaction(object):
+    """Runs the block in a write transaction, rolled back if it raises."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, excType, excValue, traceback):
+        self.conn.execute('COMMIT' if excType is None else 'ROLLBACK')
+        return False
+
+
+def _key(path):
+    return os.path.realpath(path)
+
+
+def _under(root):
+    """Returns the bounds of the paths of the files under the directory."""
+    prefix = os.path.join(_key(root), '')
+    return prefix, prefix + _PREFIX_END
+
+
+def _scalar(value):
+    """Returns the type and the value to index a scalar with."""
+    if value is None:
+        return 'null', None
+    if isinstance(value, bool):
+        return 'bool', int(value)
+    if isinstance(value, int):
+        return 'int', value
+    return 'str', str(value)
+
+
+def _typed(valueType, value):
+    return bool(value) if valueType == 'bool' else value
+
+
+def _leaves(node, path=()):
+    """Yields (property, value) pairs for the scalar values of the document."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _leaves(value, path + (str(key),))
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from _leaves(value, path + (index,))
+    elif path:
+        yield path_query.format_path(path), node
+
+
+def _save(conn, key, content, text):
+    """Saves the text of the file and indexes its document. Returns the document."""
+    from util import yaml_backend
+    document = ci_info_cache.to_plain(yaml_backend.safe_load(text))
+    conn.execute('INSERT OR REPLACE INTO documents (path, hash, text, document) VALUES (?, ?, ?, ?)',
+                 (key, hashlib.sha256(content).hexdigest(), text, json.dumps(document, separators=(',', ':'))))
+    conn.execute('DELETE FROM properties WHERE path = ?', (key,))
+    conn.executemany('INSERT INTO properties (path, property, type, value) VALUES (?, ?, ?, ?)',
+                     ((key, prop) + _scalar(value) for prop, value in _leaves(document)))
+    return document
+
+
+def _read(key):
+    try:
+        with open(key, 'rb') as ymlFile:
+            return ymlFile.read()
+    except FileNotFoundError:
+        return None
+
+
+def _refresh(conn, key):
+    """Imports the file again if it changed since it was saved. Returns its document, or None if it does not exist."""
+    content = _read(key)
+    row = conn.execute('SELECT hash, document FROM documents WHERE path = ?', (key,)).fetchone()
+    if content is not None and row and row[0] == hashlib.sha256(content).hexdigest():
+        return json.loads(row[1])
+    if content is None and not row:
+        return None
+    with tracing.span('store.import', file=key), _transaction(conn):
+        # Read again under the lock, so that a concurrent update is not overwritten with the older content
+        content = _read(key)
+        if content is None:
+            conn.execute('DELETE FROM documents WHERE path = ?', (key,))
+            return None
+        return _save(conn, key, content, content.decode('utf-8'))
+
+
+def import_files(conn, paths):
+    """Imports the files, and every app CI info file under the directories given. Returns the files imported."""
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for directory, dirNames, fileNames in os.walk(path):
+            dirNames[:] = sorted(name for name in dirNames if name != '.git')
+            files.extend(os.path.join(directory, name) for name in sorted(fileNames) if name == APP_CI_INFO_FILE_NAME)
+    for path in files:
+        if _refresh(conn, _key(path)) is None:
+            raise StoreError('File not found: ' + path)
+    return files
+
+
+def export_files(conn, root, targetDir):
+    """Writes the saved copy of every file under the root to the same path under the target directory.
+
+    Files are first refreshed from disk. Returns the files written.
+    """
+    from util import ci_info
+    written = []
+    for (key,) in conn.execute('SELECT path FROM documents WHERE path >= ? AND path < ? ORDER BY path',
+                               _under(root)).fetchall():
+        if _refresh(conn, key) is None:
+            continue
+        target = os.path.join(targetDir, os.path.relpath(key, _key(root)))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        text = conn.execute('SELECT text FROM documents WHERE path = ?', (key,)).fetchone()[0]
+        ci_info.write_text(target, text)
+        written.append(target)
+    return written
+
+
+def read_properties(conn, path, patterns):
+    """Returns typed (pattern, property, value) triples for the properties of the file, see path_query.evaluate."""
+    document = _refresh(conn, _key(path))
+    if document is None:
+        raise FileNotFoundError('File not found: ' + path)
+    return property_path.read_properties(document, patterns, typed=True)
+
+
+def update(conn, changes):
+    """Sets the properties of each file of {path: {property: value}} in one transaction. Returns the files changed.
+
+    The files are written once the new contents are saved in the store, and restored if writing any of them fails.
+    """
+    from util import ci_info
+    with tracing.span('store.update', files=len(changes)), _transaction(conn):
+        texts = []
+        for path, properties in changes.items():
+            with open(path, 'rb') as ymlFile:
+                content = ymlFile.read()
+            text = ci_info.update_text(content.decode('utf-8'), properties)
+            _save(conn, _key(path), text.encode('utf-8'), text)
+            texts.append((path, content.decode('utf-8'), text))
+        changed = []
+        try:
+            for path, oldText, text in texts:
+                if ci_info.write_text(path, text):
+                    changed.append((path, oldText))
+        except BaseException:
+            for path, oldText in changed:
+                ci_info.write_text(path, oldText)
+            raise
+    return [path for path, oldText in changed]
+
+
+def _prefix(query):
+    """Returns the properties matching the query share, up to its first wildcard or projection."""
+    path = []
+    for step in query.steps:
+        if path_query.is_multi_step(step):
+            return path_query.format_path(path), False
+        path.append(step[0].value)
+    return path_query.format_path(path), True
+
+
+def _match(steps, path):
+    if len(steps) != len(path):
+        return False
+    for step, element in zip(steps, path):
+        if not any(_match_step(alternative, element) for alternative in step):
+            return False
+    return True
+
+
+def _match_step(alternative, element):
+    if alternative.kind == path_query.KEY:
+        return alternative.value == element
+    if alternative.kind == path_query.GLOB:
+        return isinstance(element, str) and fnmatch.fnmatchcase(element, alternative.value)
+    if alternative.kind == path_query.ALL_ITEMS:
+        return isinstance(element, int)
+    return alternative.value == element
+
+
+def find(conn, pattern, value=ANY, order=None, limit=None, root=None):
+    """Returns (file, property, value) triples for the scalar values matching the query across all the saved files.
+
+    Only the values equal to value if given; ordered by value with order `asc` or `desc`, else by file and property.
+    The query may use the wildcards and projections of path_query.py, but not negative list indices.
+    Files are not refreshed from disk, see refresh_all.
+    """
+    query = path_query.compile_query(pattern)
+    if any(alternative.kind == path_query.INDEX and alternative.value < 0 for step in query.steps
+           for alternative in step):
+        raise path_query.QueryError('Negative list indices cannot be queried across files: ' + pattern)
+    prefix, exact = _prefix(query)
+    sql = 'SELECT path, property, type, value FROM properties WHERE '
+    if exact:
+        sql += 'property = ?'
+        params = [prefix]
+    else:
+        sql += 'property >= ? AND property < ?'
+        params = [prefix, prefix + _PREFIX_END]
+    if value is not ANY:
+        valueType, indexed = _scalar(str(value) if isinstance(value, float) else value)
+        sql += ' AND type = ?' + (' AND value = ?' if indexed is not None else '')
+        params.extend([valueType] if indexed is None else [valueType, indexed])
+    if root:
+        sql += ' AND path >= ? AND path < ?'
+        params.extend(_under(root))
+    sql += {'asc': ' ORDER BY value, path, property', 'desc': ' ORDER BY value DESC, path, property'}.get(
+        order, ' ORDER BY path, property')
+    if exact and limit:
+        sql += ' LIMIT {:d}'.format(limit)
+    results = []
+    with tracing.span('store.find', query=pattern):
+        for path, prop, valueType, stored in conn.execute(sql, params):
+            if exact or _match(query.steps, path_query.split_property(prop)):
+                results.append((path, prop, _typed(valueType, stored)))
+                if limit and len(results) >= limit:
+                    break
+    return results
+
+
+def refresh_all(conn, root=None):
+    """Imports the saved files which changed on disk again, and drops those deleted. Returns the files refreshed."""
+    sql, params = 'SELECT path FROM documents', []
+    if root:
+        sql, params = sql + ' WHERE path >= ? AND path < ?', _under(root)
+    keys = [key for (key,) in conn.execute(sql, params).fetchall()]
+    with tracing.span('store.refresh', files=len(keys)):
+        for key in keys:
+            _refresh(conn, key)
+    return keys
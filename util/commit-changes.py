@@ -38,20 +38,39 @@
 # Argument 1 (-m, --message): Commit Message
 # Argument 2 (-f, --files): Files To Commit
 # Argument 3 (-d, --repo-dir): Path to the directory of git repo
+# Argument 4 (-q, --queue): Queue the change so that it is committed and pushed together with changes
+#                           from concurrent callers to the same repo, retrying rejected pushes
+# Argument 5 (-w, --window): Seconds to wait for concurrent changes to queue up. Defaults to 1
+# Argument 6 (--async): Commit locally and push in the background instead of waiting for the push,
+#                       see flush-pushes.py to wait until it is pushed
+# Argument 7 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
 #
+# In a sharded CI info repo (see ci_info_shards.py), the files of each app are committed to and
+# pushed from the app's shard, with the shards pushed concurrently. Exits with 1 if committing or
+# pushing fails for any of them.
 ###############################################################################
 
 import argparse
-import subprocess
 import os
 import json
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import api
+from util import tracing
+from util.ci_info_shards import ShardError
+from util.commit_queue import CommitError
+from util.git_repo import GitError
 
 argParse = argparse.ArgumentParser()
 argParse.add_argument('-m', '--message', dest='m')
 argParse.add_argument('-d', '--repo-dir', dest='d')
 argParse.add_argument('-f', '--files', dest='f')
+argParse.add_argument('-q', '--queue', dest='q', action='store_true')
+argParse.add_argument('-w', '--window', dest='w', type=float, default=1.0)
+argParse.add_argument('--async', dest='asyncPush', action='store_true')
 
-opts = argParse.parse_args()
+opts = tracing.parse_args(argParse)
 
 if not any([opts.f]):
     argParse.print_usage()
@@ -80,12 +99,21 @@ try:
 except ValueError as ex:
     print("Inavalid File map : " + str(ex))
     exit(1)
+
+if opts.asyncPush and opts.q:
+    print('Argument `--async` cannot be combined with `-q` or `--queue`')
+    exit(1)
+
+# Fails the step if committing or pushing fails for any shard, the others are still committed and pushed
 try:
-    #-C specifies the git directory and __add__ adds second array to first one
-    subprocess.run(['git', '-C', repoDir, 'add'].__add__(files), stdout=subprocess.PIPE,stderr=subprocess.PIPE, check=True)
-    subprocess.run(['git', '-C', repoDir, 'commit', '-m', opts.m])
-    subprocess.run(['git', '-C', repoDir, 'push'])
-except subprocess.CalledProcessError as addException:
-    print("Error Code: {} \nError: {}".format(addException.returncode,
-                                              addException.stderr.decode('ascii').rstrip()))
-    exit(1)
\ No newline at end of file
+    committed = api.commit_changes(repoDir, files, opts.m, queue=opts.q, window=opts.w, asyncPush=opts.asyncPush)
+except (GitError, ShardError, CommitError) as ex:
+    print(str(ex))
+    exit(1)
+
+if not committed:
+    print("No changes to commit")
+elif opts.asyncPush:
+    print("Changes committed, push continues in the background")
+else:
+    print("Changes committed and pushed")
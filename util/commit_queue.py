@@ -0,0 +1,155 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Coalesces commits from concurrent callers to the same git repo, e.g. the shared
+# CI info repo, into a single commit and push.
+#
+# Each caller appends its files and message to a queue under the repo's .git dir and
+# waits for the queue lock. The first to get the lock becomes the leader: it waits a
+# short window for more callers to queue, commits everything queued with one commit,
+# and pushes once, rebasing onto the remote and retrying when the push is rejected.
+# Callers whose entry was already committed by a leader just pick up its result.
+###############################################################################
+
+import json
+import os
+import time
+
+from util import file_lock
+from util import tracing
+from util.git_repo import GitError
+from util.git_repo import GitRepo
+
+QUEUE_DIR_NAME = 'stakater-commit-queue'
+
+
+class CommitError(Exception):
+    pass
+
+
+def _write_json(path, data):
+    tmpPath = path + '.tmp'
+    with open(tmpPath, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmpPath, path)
+
+
+def enqueue(queueDir, files, message):
+    """Adds a change to the queue and returns its id. Needs no lock, as entries are written atomically."""
+    entryId = '{:020d}-{}'.format(int(time.time() * 1e9), os.getpid())
+    _write_json(os.path.join(queueDir, entryId + '.json'), {'files': files, 'message': message})
+    return entryId
+
+
+def _take_entries(queueDir):
+    entries = []
+    for name in sorted(os.listdir(queueDir)):
+        if name.endswith('.json'):
+            with open(os.path.join(queueDir, name)) as f:
+                entries.append((name[:-len('.json')], json.load(f)))
+    return entries
+
+
+def _commit_message(entries):
+    messages = []
+    for entryId, entry in entries:
+        if entry['message'] not in messages:
+            messages.append(entry['message'])
+    if len(messages) == 1:
+        return messages[0]
+    return 'Batched {} changes\n\n'.format(len(entries)) + '\n'.join('- ' + message for message in messages)
+
+
+def push_with_retry(repo, retries=5, backoff=0.5):
+    """Pushes, rebasing onto the remote branch and retrying when the push is rejected."""
+    for attempt in range(retries):
+        try:
+            with tracing.span('push-attempt', attempt=attempt + 1):
+                return repo.push()
+        except GitError as ex:
+            if attempt == retries - 1:
+                raise
+            try:
+                repo.pull_rebase()
+            except GitError:
+                repo.abort_rebase()
+                raise CommitError('Push was rejected and rebasing onto the remote failed:\n{}'.format(ex))
+            time.sleep(backoff * (attempt + 1))
+
+
+def commit_and_push(repo, entries, retries=5):
+    files = []
+    for entryId, entry in entries:
+        files.extend(path for path in entry['files'] if path not in files)
+    repo.add(*files)
+    # Files may be unchanged, e.g. when the same value is written again; still push any earlier commits
+    if repo.has_staged_changes():
+        repo.commit(_commit_message(entries))
+    push_with_retry(repo, retries)
+
+
+def commit(repoDir, files, message, window=1.0, retries=5):
+    """Queues the change and returns once it has been committed and pushed, possibly together with others."""
+    repo = GitRepo(repoDir)
+    # In a worktree, e.g. a shard of the CI info repo, `.git` is a file pointing to its git dir
+    gitDir = repo.git_dir()
+    queueDir = os.path.join(gitDir, QUEUE_DIR_NAME)
+    os.makedirs(queueDir, exist_ok=True)
+    entryId = enqueue(queueDir, files, message)
+    resultPath = os.path.join(queueDir, entryId + '.result')
+
+    with file_lock.locked(os.path.join(gitDir, QUEUE_DIR_NAME + '.lock')):
+        if not os.path.exists(os.path.join(queueDir, entryId + '.json')):
+            # Already committed by another leader
+            with open(resultPath) as f:
+                result = json.load(f)
+            os.unlink(resultPath)
+            if result['error']:
+                raise CommitError(result['error'])
+            return len(result['batch'])
+
+        with tracing.span('commit-queue.window', seconds=window):
+            time.sleep(window)
+        entries = _take_entries(queueDir)
+        error = None
+        try:
+            with tracing.span('commit-queue.commit-and-push', batch=len(entries)):
+                commit_and_push(repo, entries, retries)
+        except (CommitError, GitError) as ex:
+            error = str(ex)
+        batch = [otherId for otherId, entry in entries]
+        for otherId in batch:
+            if otherId != entryId:
+                _write_json(os.path.join(queueDir, otherId + '.result'), {'error': error, 'batch': batch})
+            os.unlink(os.path.join(queueDir, otherId + '.json'))
+    if error:
+        raise CommitError(error)
+    return len(batch)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script pushes the commits journaled by asynchronous pushes (`--async` of
+# commit-changes.py, inc-build-number.py and generate-version.py), see push_journal.py.
+#
+# Without --wait it is the background flusher: it exits straight away if another
+# flusher is running. With --wait it is a barrier: it returns once every commit
+# journaled before it started has been pushed, and fails if they could not be.
+#
+# Argument 1 (-d, --repo-dir): Path to the directory of git repo
+# Argument 2 (-w, --wait): Wait for a running flusher and push anything left, failing if the push fails
+# Argument 3 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+###############################################################################
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import push_journal
+from util.git_repo import GitError
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-d', '--repo-dir', dest='d')
+argParse.add_argument('-w', '--wait', dest='w', action='store_true')
+
+opts = tracing.parse_args(argParse)
+
+if not any([opts.d]):
+    argParse.print_usage()
+    print('Argument `-d` or `--repo-dir` must be specified')
+    exit(1)
+
+repoDir = opts.d
+if not os.path.isdir(repoDir):
+    print("Given Repository path does not exist or is not a directory")
+    exit(1)
+
+try:
+    pushed = push_journal.flush(repoDir, wait=opts.w)
+except (push_journal.PushError, GitError) as ex:
+    print('{} {}'.format(time.strftime('%Y-%m-%d %H:%M:%S'), ex))
+    exit(1)
+if pushed:
+    print('{} Pushed {} journaled commit(s)'.format(time.strftime('%Y-%m-%d %H:%M:%S'), pushed))
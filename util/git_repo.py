@@ -0,0 +1,193 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Shared git access for the util and versioning scripts.
+#
+# Local, read-mostly operations (describing the latest tag, creating tags and branches)
+# use pygit2 in-process when it is installed, saving a git process per operation;
+# any pygit2 failure falls back to the git CLI. Anything touching a remote always goes
+# through the git CLI, so that the agent's credentials and ssh config are used.
+# Set STAKATER_GIT_NATIVE=0 to always use the git CLI.
+###############################################################################
+
+import os
+import subprocess
+
+from util import tracing
+
+NATIVE_ENV = 'STAKATER_GIT_NATIVE'
+
+
+class GitError(Exception):
+    def __init__(self, cmd, returncode, stderr):
+        Exception.__init__(self, 'Execution of the following failed: \nCommand: "{}"\nError Code: {} \nError: "{}"'
+                           .format(' '.join(cmd), returncode, stderr))
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+def _open_native(path):
+    if os.environ.get(NATIVE_ENV, '1') == '0':
+        return None
+    try:
+        import pygit2
+        return pygit2, pygit2.Repository(path)
+    except Exception:
+        return None
+
+
+class GitRepo(object):
+    def __init__(self, path, native=True):
+        self.path = path
+        self._native = _open_native(path) if native else None
+
+    def run(self, *args, input=None):
+        """Runs a git command in the repo, with the given text on stdin, and returns its stripped stdout."""
+        cmd = ['git', '-C', self.path] + list(args)
+        with tracing.span('git ' + args[0], args=' '.join(args[1:])):
+            proc = subprocess.run(cmd, input=None if input is None else input.encode('utf-8'),
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise GitError(cmd, proc.returncode, proc.stderr.decode('utf-8', 'replace').rstrip())
+        return proc.stdout.decode('utf-8', 'replace').rstrip()
+
+    def git_dir(self):
+        """Returns the absolute path of the repo's .git directory, which may be above the given path."""
+        if self._native:
+            return os.path.abspath(self._native[1].path)
+        return os.path.abspath(os.path.join(self.path, self.run('rev-parse', '--git-dir')))
+
+    def head_ids(self):
+        """Returns the ids of the HEAD commit and of its tree."""
+        if self._native:
+            try:
+                with tracing.span('git.native head'):
+                    commit = self._native[1].head.peel(self._native[0].Commit)
+                    return str(commit.id), str(commit.tree_id)
+            except Exception:
+                pass
+        return tuple(self.run('rev-parse', 'HEAD', 'HEAD^{tree}').split('\n'))
+
+    def latest_tag(self):
+        """Returns the nearest tag reachable from HEAD, as `git describe --tags --abbrev=0`, or None if there is none."""
+        if self._native:
+            pygit2, repo = self._native
+            try:
+                with tracing.span('git.native describe'):
+                    return repo.describe(describe_strategy=pygit2.GIT_DESCRIBE_TAGS, abbreviated_size=0)
+            except pygit2.GitError as ex:
+                if 'no reference found' in str(ex):
+                    return None
+            except Exception:
+                pass
+        try:
+            return self.run('describe', '--tags', '--abbrev=0')
+        except GitError as ex:
+            if 'fatal: No names found' in ex.stderr:
+                return None
+            raise
+
+    def remote_tags(self, remote='origin'):
+        """Returns the tag names of the remote, listed with `git ls-remote` without fetching any objects."""
+        output = self.run('ls-remote', '--tags', '--refs', remote)
+        return [line.split('\t', 1)[1][len('refs/tags/'):] for line in output.split('\n') if line]
+
+    def tag(self, name, message):
+        """Creates an annotated tag on HEAD."""
+        if self._native:
+            pygit2, repo = self._native
+            try:
+                objectType = getattr(pygit2, 'GIT_OBJECT_COMMIT', None) or pygit2.GIT_OBJ_COMMIT
+                with tracing.span('git.native tag', tag=name):
+                    repo.create_tag(name, repo.head.target, objectType, _signature(pygit2, repo),
+                                    message + '\n')
+                return
+            except Exception:
+                pass
+        self.run('tag', '-a', name, '-m', message)
+
+    def branch(self, name, startPoint):
+        if self._native:
+            pygit2, repo = self._native
+            try:
+                with tracing.span('git.native branch', branch=name):
+                    repo.branches.local.create(name, repo.revparse_single(startPoint).peel(pygit2.Commit))
+                return
+            except Exception:
+                pass
+        self.run('branch', name, startPoint)
+
+    def delete_tag(self, name):
+        return self.run('tag', '-d', name)
+
+    def delete_branch(self, name):
+        return self.run('branch', '-D', name)
+
+    def add(self, *paths):
+        return self.run('add', *paths)
+
+    def has_staged_changes(self):
+        cmd = ['git', '-C', self.path, 'diff', '--cached', '--quiet']
+        with tracing.span('git diff', args='--cached --quiet'):
+            return subprocess.run(cmd).returncode != 0
+
+    def commit(self, message):
+        return self.run('commit', '-m', message)
+
+    def push(self, *refspecs, remote=None, atomic=False):
+        """Pushes all the refspecs in one `git push`, or the current branch to its upstream if none are given.
+
+        With atomic, either all the refspecs are updated on the remote or none is.
+        """
+        args = ['push', '--atomic'] if atomic else ['push']
+        if remote or refspecs:
+            args.append(remote or 'origin')
+        return self.run(*(args + list(refspecs)))
+
+    def pull_rebase(self):
+        return self.run('pull', '--rebase', '--autostash')
+
+    def drop_last_commit(self):
+        """Removes the last commit, resetting the files it changed but keeping other local changes."""
+        return self.run('reset', '--keep', 'HEAD~1')
+
+    def abort_rebase(self):
+        subprocess.run(['git', '-C', self.path, 'rebase', '--abort'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _signature(pygit2, repo):
+    """Tagger as the git CLI would resolve it, honouring the GIT_COMMITTER_* environment variables."""
+    name = os.environ.get('GIT_COMMITTER_NAME')
+    email = os.environ.get('GIT_COMMITTER_EMAIL')
+    if name and email:
+        return pygit2.Signature(name, email)
+    return repo.default_signature
@@ -57,7 +57,9 @@ func ReadAppCiInfo(repoDirPath string, ciMetadataDirPath string) AppCiInfo {
 		log.Fatal("Given Repository path for CI Metadata does not exist or is not a directory")
 	}
 
-	var ciInfoFilePath = ciMetadataDirPath + "/" + appInfo.Application.Name + "/app-ci-info.yml"
+	// In a sharded CI info repo, the file is read from the app's shard, where it is written
+	var ciInfoFilePath = ResolveCiMetadataDir(ciMetadataDirPath, appInfo.Application.Name) + "/" +
+		appInfo.Application.Name + "/app-ci-info.yml"
 	var appCiInfo AppCiInfo
 	source, err := ioutil.ReadFile(ciInfoFilePath)
 	if err != nil {
@@ -0,0 +1,93 @@
+package infoUtil
+
+/*###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################*/
+
+import (
+	"crypto/sha1"
+	"encoding/json"
+	"io/ioutil"
+	"log"
+	"math/big"
+	"os"
+	"path/filepath"
+)
+
+// Sharding of the CI info repo by app, see util/ci_info_shards.py, which writes the build number and version
+// to the app's shard instead of the CI info repo itself.
+type ciInfoShards struct {
+	Root      string            `json:"root"`
+	Layout    string            `json:"layout"`
+	Repos     []string          `json:"repos"`
+	Apps      map[string]string `json:"apps"`
+	Worktrees string            `json:"worktrees"`
+}
+
+// ResolveCiMetadataDir returns the directory holding the app's CI info directory: the app's shard if
+// $STAKATER_CI_INFO_SHARDS shards the CI metadata dir, as ci_info_shards.resolve does, else the CI metadata dir itself
+func ResolveCiMetadataDir(ciMetadataDirPath string, appName string) string {
+	var configPath = os.Getenv("STAKATER_CI_INFO_SHARDS")
+	if configPath == "" {
+		return ciMetadataDirPath
+	}
+	var config ciInfoShards
+	source, err := ioutil.ReadFile(configPath)
+	if err == nil {
+		err = json.Unmarshal(source, &config)
+	}
+	if err != nil {
+		log.Fatal("Invalid shards config ", configPath, ": ", err)
+	}
+	root, rootErr := filepath.EvalSymlinks(config.Root)
+	metadataDir, err := filepath.EvalSymlinks(ciMetadataDirPath)
+	if rootErr != nil || err != nil || root != metadataDir {
+		return ciMetadataDirPath
+	}
+
+	switch config.Layout {
+	case "repos":
+		if pinned := config.Apps[appName]; pinned != "" {
+			return pinned
+		}
+		if len(config.Repos) == 0 {
+			log.Fatal("Invalid shards config ", configPath, ": the `repos` layout needs a list of `repos`")
+		}
+		var sum = sha1.Sum([]byte(appName))
+		var index = new(big.Int).Mod(new(big.Int).SetBytes(sum[:]), big.NewInt(int64(len(config.Repos))))
+		return config.Repos[index.Int64()]
+	case "branches":
+		if config.Worktrees == "" {
+			return filepath.Join(root+"-shards", appName)
+		}
+		return filepath.Join(config.Worktrees, appName)
+	}
+	log.Fatal("Invalid shards config ", configPath, ": expected a `layout` of: repos, branches")
+	return ""
+}
@@ -0,0 +1,196 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Compiled queries for reading properties of parsed yml documents.
+#
+# A query is a dotted property, e.g. `ci-data.current-version`, whose segments may use:
+#   glob wildcards           ci-data.blue-green-deployment.*.live-group
+#   list indices             ci-data.amis[0], ci-data.amis[-1], ci-data.amis[*]
+#   projection of several    ci-data.blue-green-deployment.prod.{live-group,blue-group-ami-id}
+#   keys (or globs)
+#
+# Queries are compiled once and cached. Several queries are merged into a tree on their
+# common prefixes and run in a single walk over the document, returning typed values.
+# Queries without wildcards or `[*]` return one result per property, with value None if
+# missing, i.e. a projection of plain keys is the same as querying each key; other
+# queries return one result per match and skip missing keys.
+###############################################################################
+
+import collections
+import fnmatch
+import functools
+import itertools
+import re
+
+GLOB_CHARS = re.compile(r'[*?\[]')
+_SEGMENT = re.compile(r'^(?P<key>.*?)(?P<indices>(?:\[(?:-?\d+|\*)\])*)$')
+_INDEX = re.compile(r'\[(-?\d+|\*)\]')
+
+KEY = 'key'
+GLOB = 'glob'
+INDEX = 'index'
+ALL_ITEMS = 'all-items'
+
+Step = collections.namedtuple('Step', ['kind', 'value'])
+Query = collections.namedtuple('Query', ['text', 'steps', 'multi', 'expansions'])
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _key_steps(key, query):
+    if key.startswith('{') and key.endswith('}'):
+        alternatives = key[1:-1].split(',')
+        if not all(alternatives):
+            raise QueryError('Empty key in projection of query: {}'.format(query))
+        return tuple(Step(GLOB if GLOB_CHARS.search(alt) else KEY, alt) for alt in alternatives)
+    if '{' in key or '}' in key:
+        raise QueryError('A projection must be a whole segment, e.g. `a.{{b,c}}`, in query: {}'.format(query))
+    return (Step(GLOB if GLOB_CHARS.search(key) else KEY, key),)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_query(text):
+    """Parses a query into a Query of steps. A step is a tuple of alternative Steps, one unless it is a projection."""
+    steps = []
+    for segment in text.split('.'):
+        match = _SEGMENT.match(segment)
+        key, indices = match.group('key'), match.group('indices')
+        if key:
+            steps.append(_key_steps(key, text))
+        elif not indices or not steps:
+            raise QueryError('Empty key in query: {}'.format(text))
+        for index in _INDEX.findall(indices):
+            steps.append((Step(ALL_ITEMS, None),) if index == '*' else (Step(INDEX, int(index)),))
+    multi = any(is_multi_step(step) for step in steps)
+    expansions = None
+    if multi and all(alternative.kind in (KEY, INDEX) for step in steps for alternative in step):
+        # Projections of plain keys stand for a fixed list of properties
+        expansions = tuple(format_path(path) for path in
+                           itertools.product(*[[alternative.value for alternative in step] for step in steps]))
+    return Query(text, tuple(steps), multi, expansions)
+
+
+def _matches(step, node):
+    """Yields (path element, value) pairs of the node's children matched by the step."""
+    for alternative in step:
+        if alternative.kind == KEY:
+            if isinstance(node, dict) and alternative.value in node:
+                yield alternative.value, node[alternative.value]
+        elif alternative.kind == GLOB:
+            if isinstance(node, dict):
+                for key in node:
+                    if fnmatch.fnmatchcase(str(key), alternative.value):
+                        yield str(key), node[key]
+        elif isinstance(node, list):
+            if alternative.kind == ALL_ITEMS:
+                for index, value in enumerate(node):
+                    yield index, value
+            elif -len(node) <= alternative.value < len(node):
+                yield alternative.value, node[alternative.value]
+
+
+class _Node(object):
+    __slots__ = ('children', 'ends')
+
+    def __init__(self):
+        self.children = collections.OrderedDict()
+        self.ends = []
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_set(queries):
+    """Compiles the queries and merges them into a tree of steps on their common prefixes."""
+    compiled = [compile_query(query) for query in queries]
+    root = _Node()
+    for position, query in enumerate(compiled):
+        node = root
+        for step in query.steps:
+            node = node.children.setdefault(step, _Node())
+        node.ends.append(position)
+    return compiled, root
+
+
+def _walk(value, node, path, matches):
+    for step, child in node.children.items():
+        for element, childValue in _matches(step, value):
+            childPath = path + (element,)
+            for position in child.ends:
+                matches[position].append((childPath, childValue))
+            if child.children:
+                _walk(childValue, child, childPath, matches)
+
+
+def format_path(path):
+    """Formats path elements as a property, e.g. ('ci-data', 'amis', 0) as `ci-data.amis[0]`."""
+    text = ''
+    for element in path:
+        if isinstance(element, int):
+            text += '[{}]'.format(element)
+        else:
+            text += '.' + element if text else element
+    return text
+
+
+def split_property(prop):
+    """Splits a property returned for a query into its path elements, the inverse of format_path."""
+    path = []
+    for segment in prop.split('.'):
+        match = _SEGMENT.match(segment)
+        if match.group('key'):
+            path.append(match.group('key'))
+        path.extend(int(index) for index in _INDEX.findall(match.group('indices')))
+    return tuple(path)
+
+
+def is_multi_step(step):
+    return len(step) > 1 or step[0].kind in (GLOB, ALL_ITEMS)
+
+
+def evaluate(document, queries):
+    """Runs the queries in one walk over the document. Returns (query, property, value) triples in query order."""
+    compiled, root = _compile_set(tuple(queries))
+    matches = [[] for _ in compiled]
+    _walk(document, root, (), matches)
+    results = []
+    for query, queryMatches in zip(compiled, matches):
+        if not query.multi:
+            value = queryMatches[0][1] if queryMatches else None
+            results.append((query.text, query.text, value))
+            continue
+        if query.expansions:
+            values = dict((format_path(path), value) for path, value in queryMatches)
+            results.extend((query.text, prop, values.get(prop)) for prop in query.expansions)
+            continue
+        for path, value in queryMatches:
+            results.append((query.text, format_path(path), value))
+    return results
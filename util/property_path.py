@@ -0,0 +1,86 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Helpers to read and update properties of parsed yml documents. Properties are
+# addressed with dotted keys e.g. `ci-data.current-version`; reads also accept the
+# wildcards, list indices and projections of path_query.py.
+#
+# Documents may be ruamel.yaml round trip documents or plain dicts, so nothing here
+# depends on a yml library.
+###############################################################################
+
+import fnmatch
+
+from util import path_query
+
+GLOB_CHARS = path_query.GLOB_CHARS
+
+
+def match_keys(document, keyPatterns):
+    """Returns (keys, value) pairs for every path matching the glob patterns, one per key, skipping missing keys."""
+    matches = [([], document)]
+    for keyPattern in keyPatterns:
+        nextMatches = []
+        for path, node in matches:
+            if not isinstance(node, dict):
+                continue
+            for key in node:
+                if fnmatch.fnmatchcase(str(key), keyPattern):
+                    nextMatches.append((path + [str(key)], node[key]))
+        matches = nextMatches
+    return matches
+
+
+def format_value(value):
+    return None if value is None else str(value)
+
+
+def read_properties(document, patterns, typed=False):
+    """Returns (pattern, property, value) triples, running all the queries in one walk over the document.
+
+    Values are formatted as strings, unless typed.
+    """
+    results = path_query.evaluate(document, patterns)
+    if typed:
+        return results
+    return [(pattern, prop, format_value(value)) for pattern, prop, value in results]
+
+
+def set_properties(document, properties):
+    """Sets the given map of dotted properties, adding parent keys if not present."""
+    for prop in properties:
+        parentKeys = prop.split('.')
+        temp = document
+        for key in parentKeys[:-1]:
+            if not (key in temp):
+                temp[key] = {}
+            temp = temp[key]
+        temp[parentKeys[-1]] = properties[prop]
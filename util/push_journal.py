@@ -0,0 +1,166 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Asynchronous pushes of local commits, e.g. to the CI info repo, so that a pipeline
+# step does not wait on `git push`.
+#
+# A caller commits locally and records the commit in a journal under the repo's .git
+# dir, with each entry fsynced before it returns, then starts a background flusher
+# (flush-pushes.py) unless one is already running. The flusher pushes the branch,
+# which carries all journaled commits in order, retrying with exponential backoff and
+# rebasing onto the remote when the push is rejected, and removes the entries it
+# pushed. Entries left by a failed or killed flusher are pushed by the next one, and
+# `flush-pushes.py --wait` is a barrier before steps that need the changes remote.
+###############################################################################
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from util import file_lock
+from util import tracing
+from util.git_repo import GitError
+from util.git_repo import GitRepo
+
+JOURNAL_DIR_NAME = 'stakater-push-journal'
+# Held while committing and journaling, and while the flusher rebases, so that they do not interleave
+JOURNAL_LOCK_NAME = JOURNAL_DIR_NAME + '.lock'
+# Held by the running flusher
+FLUSHER_LOCK_NAME = JOURNAL_DIR_NAME + '-flusher.lock'
+FLUSHER_LOG_NAME = JOURNAL_DIR_NAME + '.log'
+FLUSHER_SCRIPT = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'flush-pushes.py')
+
+
+class PushError(Exception):
+    pass
+
+
+def _journal_dir(gitDir):
+    journalDir = os.path.join(gitDir, JOURNAL_DIR_NAME)
+    os.makedirs(journalDir, exist_ok=True)
+    return journalDir
+
+
+def _write_entry(journalDir, entry):
+    entryId = '{:020d}-{}'.format(int(time.time() * 1e9), os.getpid())
+    tmpPath = os.path.join(journalDir, entryId + '.tmp')
+    with open(tmpPath, 'w') as f:
+        json.dump(entry, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpPath, os.path.join(journalDir, entryId + '.json'))
+    dirFd = os.open(journalDir, os.O_RDONLY)
+    try:
+        os.fsync(dirFd)
+    finally:
+        os.close(dirFd)
+    return entryId
+
+
+def _pending(gitDir):
+    try:
+        names = os.listdir(os.path.join(gitDir, JOURNAL_DIR_NAME))
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len('.json')] for name in names if name.endswith('.json'))
+
+
+def pending(repoDir):
+    """Returns the ids of the journaled commits not pushed yet, oldest first."""
+    return _pending(GitRepo(repoDir, native=False).git_dir())
+
+
+def commit(repoDir, files, message):
+    """Commits the files locally and journals the commit for the background flusher to push.
+
+    Returns False if nothing changed, else True once the journal entry is durable.
+    """
+    repo = GitRepo(repoDir)
+    gitDir = repo.git_dir()
+    with file_lock.locked(os.path.join(gitDir, JOURNAL_LOCK_NAME)):
+        repo.add(*files)
+        if not repo.has_staged_changes():
+            return False
+        repo.commit(message)
+        _write_entry(_journal_dir(gitDir), {'message': message, 'commit': repo.run('rev-parse', 'HEAD')})
+    start_flusher(repoDir)
+    return True
+
+
+def start_flusher(repoDir):
+    """Starts flush-pushes.py in the background, detached from the caller. It exits if one is already running."""
+    gitDir = GitRepo(repoDir, native=False).git_dir()
+    with open(os.path.join(gitDir, FLUSHER_LOG_NAME), 'a') as log:
+        subprocess.Popen([sys.executable, FLUSHER_SCRIPT, '-d', os.path.abspath(repoDir)],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+
+
+def _push(repo, gitDir, retries, backoff):
+    for attempt in range(retries):
+        try:
+            with tracing.span('push-attempt', attempt=attempt + 1):
+                return repo.push()
+        except GitError as ex:
+            if attempt == retries - 1:
+                raise PushError('Could not push the journaled commits after {} attempts:\n{}'.format(retries, ex))
+        time.sleep(backoff * 2 ** attempt)
+        # Assume the push was rejected, or the remote was unreachable, in which case the pull fails too
+        with file_lock.locked(os.path.join(gitDir, JOURNAL_LOCK_NAME)):
+            try:
+                repo.pull_rebase()
+            except GitError:
+                repo.abort_rebase()
+
+
+def flush(repoDir, wait=False, retries=8, backoff=0.5):
+    """Pushes the journaled commits in order and returns how many were pushed.
+
+    Unless wait, returns None right away if another flusher is running, else waits for it and
+    then pushes anything left, so that all commits journaled before the call are remote on return.
+    """
+    repo = GitRepo(repoDir)
+    gitDir = repo.git_dir()
+    with file_lock.locked(os.path.join(gitDir, FLUSHER_LOCK_NAME), blocking=wait) as acquired:
+        if not acquired:
+            return None
+        pushed = 0
+        while True:
+            entries = _pending(gitDir)
+            if not entries:
+                return pushed
+            with tracing.span('push-journal.flush', entries=len(entries)):
+                _push(repo, gitDir, retries, backoff)
+            # Entries journaled during the push are left for the next round, as their commits may not be in it
+            for entryId in entries:
+                os.unlink(os.path.join(gitDir, JOURNAL_DIR_NAME, entryId + '.json'))
+            pushed += len(entries)
@@ -31,32 +31,81 @@
 ###############################################################################
 
 ###############################################################################
-# This script reads the given property from specified yml file. Returns null if not present
+# This script reads the given properties from specified yml file. Returns null if not present
 #
+# The file is served by the ci-info daemon (see ci-info-daemon.py) when it is running,
+# else it is read in-process through the parsed file cache (see ci_info_cache.py).
 #
 # Authors: Hamza
 #
 # Argument 1 (-f, --app-ci-info-file): File path to the app CI info yml file
-# Argument 2 (-p, --property): Property whose value is to be read
+# Argument 2 (-p, --property): Property whose value is to be read. Can be repeated, and may contain
+#                              glob wildcards per segment e.g. `ci-data.blue-green-deployment.prod.*`,
+#                              list indices e.g. `ci-data.amis[0]` or `[*]`, and projections of several
+#                              keys e.g. `ci-data.blue-green-deployment.prod.{live-group,blue-group-ami-id}`.
+#                              See path_query.py
+# Argument 3 (-o, --output): Output format: `plain` (value only), `shell` (KEY=value lines) or `json`
+#                            (typed values). Defaults to `plain` for a single property and `shell` otherwise
+# Argument 4 (-m, --manifest): Bulk mode, instead of -f and -p: path to a JSON manifest (`-` for stdin)
+#                              listing the reads to make across app CI info files as
+#                              [{"file": "<app>/app-ci-info.yml", "property": "..."}]. Prints the values
+#                              as JSON: {"<file>": {"<property>": value}}
+# Argument 5 (-j, --jobs): Number of files to read concurrently in bulk mode. Defaults to the CPU count
+# Argument 6 (-s, --stream): Stream the file and stop reading once the properties are found, without
+#                            building the rest of the document. For large files, see yaml_stream.py
+# Argument 7 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
 #
 # Note: App CI info file is the one which is required by stakater to store CI/CD related data.
 ###############################################################################
 
 import argparse
+import json
+import os
+import re
+import shlex
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import api
+from util import ci_info_client
+from util import ci_info_shards
+from util import path_query
+from util import property_path
+
+
+# Shell variable name for a property: the leaf key, or the keys from the first wildcard or projection onwards,
+# with the list indices following a key e.g. `AMIS_0`
+def shellName(pattern, prop):
+    steps = path_query.compile_query(pattern).steps
+    path = path_query.split_property(prop)
+    start = next((i for i, step in enumerate(steps) if path_query.is_multi_step(step)), len(path) - 1)
+    while start > 0 and isinstance(path[start], int):
+        start -= 1
+    return re.sub(r'[^A-Za-z0-9_]', '_', '_'.join(str(element) for element in path[start:])).upper()
 
-# Import ruamel.yaml if not exists
-try:
-    import ruamel.yaml as yaml
-except ImportError:
-    import pip
-    pip.main(['-q', 'install', '--user', 'ruamel.yaml'])
-    import ruamel.yaml as yaml
 
 argParse = argparse.ArgumentParser()
 argParse.add_argument('-f', '--app-ci-info-file', dest='f')
-argParse.add_argument('-p', '--property', dest='p')
+argParse.add_argument('-p', '--property', dest='p', action='append')
+argParse.add_argument('-o', '--output', dest='o', choices=['plain', 'shell', 'json'])
+argParse.add_argument('-m', '--manifest', dest='m')
+argParse.add_argument('-j', '--jobs', dest='j', type=int)
+argParse.add_argument('-s', '--stream', dest='s', action='store_true')
+
+opts = tracing.parse_args(argParse)
 
-opts = argParse.parse_args()
+if opts.m:
+    if opts.o not in (None, 'json'):
+        print('Argument `-o` or `--output` must be `json` in bulk mode')
+        exit(1)
+    from util import ci_info_bulk
+    try:
+        print(json.dumps(ci_info_bulk.read_all(ci_info_bulk.load_manifest(opts.m), jobs=opts.j)))
+    except (ci_info_bulk.ManifestError, ci_info_client.CiInfoDaemonError, ci_info_shards.ShardError, OSError) as ex:
+        print(str(ex))
+        exit(1)
+    exit(0)
 
 if not any([opts.f]):
     argParse.print_usage()
@@ -68,18 +117,30 @@ if not any([opts.p]):
     print('Argument `-p` or `--property` must be specified')
     exit(1)
 
-# read from app-ci-info.yml
-with open(opts.f, 'r') as appCiInfoFile:
-    # Use round trip load and dump to store file with current format and comments
-    appCiInfo = yaml.round_trip_load(appCiInfoFile)
-    prop = opts.p
-    parentKeys = prop.split('.')
-    temp = appCiInfo
-    # Checks if key is available
-    for i in range(len(parentKeys)):
-        if not (parentKeys[i] in temp):
-            print("null")
-            exit(0)
-        temp = temp[parentKeys[i]]
-
-    print(temp)
+try:
+    queries = [path_query.compile_query(pattern) for pattern in opts.p]
+except path_query.QueryError as ex:
+    print(str(ex))
+    exit(1)
+
+output = opts.o
+if output is None:
+    output = 'plain' if len(queries) == 1 and not queries[0].multi else 'shell'
+
+# Values are read typed, for JSON output, and formatted as strings otherwise
+try:
+    results = api.read_properties(opts.f, opts.p, stream=opts.s)
+except (ci_info_client.CiInfoDaemonError, ci_info_shards.ShardError) as ex:
+    print("Error: " + str(ex))
+    exit(1)
+
+if output == 'json':
+    print(json.dumps({prop: value for pattern, prop, value in results}))
+elif output == 'shell':
+    for pattern, prop, value in results:
+        value = property_path.format_value(value)
+        print('{}={}'.format(shellName(pattern, prop), shlex.quote("null" if value is None else value)))
+else:
+    for pattern, prop, value in results:
+        value = property_path.format_value(value)
+        print("null" if value is None else value)
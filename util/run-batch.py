@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script runs many CI info and versioning operations in one process, so that
+# callers can group a whole stage's work into a single invocation instead of running
+# one script per operation. yml files parsed by one operation are reused by the next.
+#
+# Operations are read as a JSON list, each with the name of a function of util/api.py
+# or versioning/api.py and its keyword arguments, e.g.
+#   [{"op": "write_properties", "path": "app/app-ci-info.yml", "properties": {"ci-data.x": "y"}},
+#    {"op": "commit_changes", "repoDir": ".", "files": ["app/app-ci-info.yml"], "message": "Update x"},
+#    {"op": "generate_version", "appCiInfoDir": "ci-info/app", "repoDir": "app"}]
+# and run in order. One JSON result is printed per operation, in order, as
+# {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+#
+# Argument 1 (-i, --input): Path to the JSON file of operations, defaults to stdin (`-`)
+# Argument 2 (-k, --keep-going): Run the remaining operations after one fails, instead of stopping
+# Argument 3 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+#
+# Exits with 1 if any operation failed.
+###############################################################################
+
+import argparse
+import inspect
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import api
+from util import ci_info_client
+from util.ci_info_shards import ShardError
+from util.ci_info_store import StoreError
+from util.commit_queue import CommitError
+from util.push_journal import PushError
+from util.git_repo import GitError
+from versioning import api as versioning_api
+
+# Operation name: function and how its return value is output
+OPERATIONS = {
+    'read_property': (api.read_property, None),
+    'read_properties': (api.read_properties, lambda results: {prop: value for pattern, prop, value in results}),
+    'write_properties': (api.write_properties, None),
+    'commit_changes': (api.commit_changes, None),
+    'flush_pushes': (api.flush_pushes, None),
+    'increment_build_number': (versioning_api.increment_build_number, list),
+    'generate_version': (versioning_api.generate_version, None),
+    'tag_release': (versioning_api.tag_release, lambda result: {'version': result[0], 'branch': result[1]}),
+    'lookup_build': (versioning_api.lookup_build, None),
+    'plan': (versioning_api.plan, None),
+}
+# Errors reported as failed operations, path_query.QueryError and invalid operations are ValueErrors
+ERRORS = (ci_info_client.CiInfoDaemonError, versioning_api.VersioningError, CommitError, PushError, ShardError,
+          StoreError, GitError, OSError, ValueError)
+
+
+def runOperation(operation):
+    if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+        raise ValueError('Operation must have an `op` of: ' + ', '.join(sorted(OPERATIONS)))
+    function, toJson = OPERATIONS[operation['op']]
+    arguments = {key: value for key, value in operation.items() if key != 'op'}
+    try:
+        inspect.signature(function).bind(**arguments)
+    except TypeError as ex:
+        raise ValueError('Invalid arguments for {}: {}'.format(operation['op'], ex))
+    with tracing.span('batch.' + operation['op']):
+        result = function(**arguments)
+    return toJson(result) if toJson else result
+
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-i', '--input', dest='i', default='-')
+argParse.add_argument('-k', '--keep-going', dest='k', action='store_true')
+
+opts = tracing.parse_args(argParse)
+
+try:
+    if opts.i == '-':
+        operations = json.load(sys.stdin)
+    else:
+        with open(opts.i) as inputFile:
+            operations = json.load(inputFile)
+except (OSError, ValueError) as ex:
+    print("Invalid operations: " + str(ex))
+    exit(1)
+if not isinstance(operations, list):
+    print("Invalid operations: expected a list of operations")
+    exit(1)
+
+failed = False
+for index, operation in enumerate(operations):
+    try:
+        response = {'ok': True, 'result': runOperation(operation)}
+    except ERRORS as ex:
+        response = {'ok': False, 'error': 'Operation {}: {}'.format(index, ex)}
+        failed = True
+    print(json.dumps(response), flush=True)
+    if failed and not opts.k:
+        break
+exit(1 if failed else 0)
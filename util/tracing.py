@@ -0,0 +1,186 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Opt-in tracing of where the scripts spend their time: yaml imports, parsing and
+# dumping, the parsed file cache, git commands, tag lookups, commits and pushes.
+#
+# Tracing is enabled by setting STAKATER_TRACE to a file path, e.g. for all the
+# scripts a blue/green deployment shell script runs, or per script with `--trace FILE`.
+# Each process appends its spans to the file when it exits, as JSON lines, or in the
+# Chrome trace format (chrome://tracing, Perfetto) when the file name ends with .json
+# or STAKATER_TRACE_FORMAT=chrome. Timestamps are wall clock microseconds, so spans of
+# consecutive scripts line up on one timeline.
+#
+# When tracing is disabled, span() returns a shared no-op context manager.
+###############################################################################
+
+# _thread rather than threading, which is slower to import, as every script imports this module
+import _thread
+import atexit
+import json
+import os
+import sys
+import time
+
+TRACE_ENV = 'STAKATER_TRACE'
+FORMAT_ENV = 'STAKATER_TRACE_FORMAT'
+FORMATS = ('jsonl', 'chrome')
+# Long running processes, i.e. the ci-info daemon, write their spans in batches of this size
+FLUSH_EVENTS = 1000
+
+_clockOffset = time.time() - time.perf_counter()
+_path = None
+_format = None
+_pid = None
+_events = []
+_lock = _thread.allocate_lock()
+
+
+def _now():
+    """Wall clock time in microseconds, with the resolution of perf_counter."""
+    return (time.perf_counter() + _clockOffset) * 1e6
+
+
+# Scripts import this module first, so the script's span also covers the other imports
+_startTime = _now()
+
+
+def _record(event):
+    with _lock:
+        _events.append(event)
+        full = len(_events) >= FLUSH_EVENTS
+    if full:
+        flush()
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = _now()
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        if excType is not None:
+            self.args['error'] = excType.__name__
+        _record({'name': self.name, 'ph': 'X', 'ts': round(self.start, 1), 'dur': round(_now() - self.start, 1),
+                 'pid': os.getpid(), 'tid': _thread.get_ident(), 'args': self.args})
+        return False
+
+    def set(self, **args):
+        """Adds details known only once the phase has run, e.g. whether the cache was hit."""
+        self.args.update(args)
+
+
+def span(name, **args):
+    """Context manager recording the time spent in the block as a span, if tracing is enabled."""
+    # Forked children, e.g. bulk mode's worker processes, exit without writing their spans, so they record none
+    if _path is None or os.getpid() != _pid:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def flush():
+    """Appends the recorded spans to the trace file."""
+    with _lock:
+        events = list(_events)
+        del _events[:]
+    if not events or _path is None:
+        return
+    import fcntl
+    separator = ',\n' if _format == 'chrome' else '\n'
+    data = ''.join(json.dumps(event, separators=(',', ':')) + separator for event in events)
+    fd = os.open(_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+    try:
+        # Processes of a shell script may run concurrently and append to the same file
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        # Chrome trace viewers accept an array without the closing bracket
+        if _format == 'chrome' and os.fstat(fd).st_size == 0:
+            data = '[\n' + data
+        os.write(fd, data.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def _finish():
+    if os.getpid() != _pid:
+        return
+    script = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+    pid = os.getpid()
+    _record({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': script}})
+    _record({'name': script, 'ph': 'X', 'ts': round(_startTime, 1), 'dur': round(_now() - _startTime, 1),
+             'pid': pid, 'tid': _thread.get_ident(), 'args': {'argv': sys.argv[1:]}})
+    flush()
+
+
+def enable(path, traceFormat=None):
+    """Starts recording spans, which are written to the file when the process exits."""
+    global _path, _format, _pid
+    traceFormat = traceFormat or os.environ.get(FORMAT_ENV) or ('chrome' if path.endswith('.json') else 'jsonl')
+    if traceFormat not in FORMATS:
+        raise ValueError('Unknown trace format: {}. Formats are: {}'.format(traceFormat, ', '.join(FORMATS)))
+    if _path is None:
+        atexit.register(_finish)
+    _path = os.path.abspath(path)
+    _format = traceFormat
+    _pid = os.getpid()
+
+
+def parse_args(argParse):
+    """Adds the `--trace FILE` argument to the script's parser, parses the arguments and enables tracing if given."""
+    argParse.add_argument('--trace', dest='trace', metavar='FILE')
+    opts = argParse.parse_args()
+    if opts.trace:
+        enable(opts.trace)
+    return opts
+
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV])
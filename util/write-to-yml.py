@@ -39,6 +39,15 @@
 # Argument 1 (-f, --app-ci-info-file): File path to the app CI info yml file
 # Argument 2 (-d, --ci-repo-dir): Path to the directory of git CI repo
 # Argument 3 (-p, --properties-map): Properties map to save in yml
+# Argument 4 (-m, --manifest): Bulk mode, instead of -f and -p: path to a JSON manifest (`-` for stdin)
+#                              listing the writes to make across app CI info files in the CI repo as
+#                              [{"file": "<app>/app-ci-info.yml", "property": "...", "value": ...}]
+# Argument 5 (-j, --jobs): Number of files to write concurrently in bulk mode. Defaults to the CPU count
+# Argument 6 (-c, --commit-message): In bulk mode, commit all the changed files with this message and push
+# Argument 7 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+#
+# The file is updated by the ci-info daemon (see ci-info-daemon.py) when it is running,
+# else it is updated in-process. Bulk mode always updates the files in-process.
 #
 # Note: App CI info file is the one which is required by stakater to store CI/CD related data.
 ###############################################################################
@@ -46,27 +55,56 @@
 import argparse
 import json
 import os
+import sys
 
-# Import ruamel.yaml if not exists
-try:
-    import ruamel.yaml as yaml
-except ImportError:
-    import pip
-    pip.main(['install', '--user', 'ruamel.yaml'])
-    import ruamel.yaml as yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util import api
+from util import ci_info_client
+from util import ci_info_shards
 
 argParse = argparse.ArgumentParser()
 argParse.add_argument('-f', '--app-ci-info-file', dest='f')
 argParse.add_argument('-d', '--ci-repo-dir', dest='d')
 argParse.add_argument('-p', '--properties-map', dest='p')
+argParse.add_argument('-m', '--manifest', dest='m')
+argParse.add_argument('-j', '--jobs', dest='j', type=int)
+argParse.add_argument('-c', '--commit-message', dest='c')
 
-opts = argParse.parse_args()
+opts = tracing.parse_args(argParse)
 
 if not any([opts.d]):
     argParse.print_usage()
     print('Argument `-d` or `--ci-repo-dir` must be specified')
     exit(1)
 
+repoDir = opts.d
+if not os.path.isdir(repoDir):
+    print("Given Repository path does not exist or is not a directory")
+    exit(1)
+if not os.path.isdir(repoDir + '/.git'):
+    print("Given repository directory is not a git repository")
+    exit(1)
+
+if opts.m:
+    from util import ci_info_bulk
+    from util.commit_queue import CommitError
+    from util.git_repo import GitError
+    try:
+        changedFiles = ci_info_bulk.write_all(ci_info_bulk.load_manifest(opts.m, write=True), repoDir, opts.j)
+    except (ci_info_bulk.ManifestError, ci_info_client.CiInfoDaemonError, ci_info_shards.ShardError, OSError) as ex:
+        print(str(ex))
+        exit(1)
+    print("Updated {} file(s)".format(len(changedFiles)))
+    if opts.c and changedFiles:
+        try:
+            ci_info_bulk.commit(repoDir, changedFiles, opts.c)
+        except (CommitError, ci_info_shards.ShardError, GitError) as ex:
+            print(str(ex))
+            exit(1)
+        print("Changes committed and pushed")
+    exit(0)
+
 if not any([opts.f]):
     argParse.print_usage()
     print('Argument `-f` or `--app-ci-info-file` must be specified')
@@ -77,32 +115,15 @@ if not any([opts.p]):
     print('Argument `-p` or `--properties-map` must be specified')
     exit(1)
 
-repoDir = opts.d
-if not os.path.isdir(repoDir):
-    print("Given Repository path does not exist or is not a directory")
+try:
+    properties = json.loads(opts.p)
+except ValueError as ex:
+    print("Inavalid File map : " + str(ex))
     exit(1)
-if not os.path.isdir(repoDir + '/.git'):
-    print("Given repository directory is not a git repository")
+
+appCiInfoFilePath = opts.d + '/' + opts.f
+try:
+    api.write_properties(appCiInfoFilePath, properties)
+except (ci_info_client.CiInfoDaemonError, ci_info_shards.ShardError) as ex:
+    print("Error: " + str(ex))
     exit(1)
-# read from app-ci-info.yml
-with open(opts.d + '/' + opts.f, 'r') as appCiInfoFile:
-    # Use round trip load and dump to store file with current format and comments
-    appCiInfo = yaml.round_trip_load(appCiInfoFile)
-    try:
-        properties = json.loads(opts.p)
-    except ValueError as ex:
-        print("Inavalid File map : " + str(ex))
-        exit(1)
-    # Updates properties
-    for prop in properties:
-        parentKeys = prop.split('.')
-        temp = appCiInfo
-        # Adds parent keys if not present
-        for i in range(len(parentKeys)-1):
-            if not(parentKeys[i] in temp):
-                temp[parentKeys[i]] = {}
-            temp = temp[parentKeys[i]]
-        # Adds value to last key
-        temp[parentKeys[len(parentKeys)-1]] = properties[prop]
-with open(opts.d + '/' + opts.f, 'w') as appCiInfoFile:
-    yaml.round_trip_dump(appCiInfo, appCiInfoFile, default_flow_style=False)
\ No newline at end of file
@@ -0,0 +1,202 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Lazily loaded yml backends, so that scripts only pay for importing a yml library
+# on the code paths that actually parse or write a file.
+#
+# - Round trip (ruamel.yaml) keeps format and comments and must be used to write files.
+# - Safe loading is for read-only access. It uses PyYAML's libyaml based parser when
+#   available, which is several times faster, else ruamel.yaml's safe loader. Scalars are
+#   resolved by the YAML 1.2 rules of ruamel.yaml in both cases, not PyYAML's YAML 1.1
+#   ones, so that e.g. unquoted `yes`/`no` stay strings. Set STAKATER_YAML_LOADER=ruamel
+#   to always use ruamel.yaml.
+#
+# ruamel.yaml is a pre-requisite and is no longer installed at runtime: pip3 install ruamel.yaml
+###############################################################################
+
+import datetime
+import os
+import re
+
+from util import tracing
+
+LOADER_ENV = 'STAKATER_YAML_LOADER'
+
+_roundTrip = None
+_safeLoad = None
+_yaml12 = None
+_libyamlLoader = None
+
+# Implicit tags of plain scalars in YAML 1.2, as resolved by ruamel.yaml
+_YAML12_RESOLVERS = [
+    ('tag:yaml.org,2002:bool', r'^(?:true|True|TRUE|false|False|FALSE)$', 'tTfF'),
+    ('tag:yaml.org,2002:float', r'''^(?:
+         [-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+        |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+        |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$''', '-+0123456789.'),
+    ('tag:yaml.org,2002:int', r'''^(?:[-+]?0b[0-1_]+
+        |[-+]?0o?[0-7_]+
+        |[-+]?[0-9_]+
+        |[-+]?0x[0-9a-fA-F_]+)$''', '-+0123456789'),
+    ('tag:yaml.org,2002:merge', r'^(?:<<)$', '<'),
+    ('tag:yaml.org,2002:null', r'^(?: ~ |null|Null|NULL | )$', ['~', 'n', 'N', '']),
+    ('tag:yaml.org,2002:timestamp', r'''^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+        |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
+        (?:[Tt]|[ \t]+)[0-9][0-9]?
+        :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
+        (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$''', '0123456789'),
+]
+
+
+def _import_ruamel():
+    try:
+        with tracing.span('yaml.import', module='ruamel.yaml'):
+            import ruamel.yaml
+    except ImportError:
+        raise ImportError('ruamel.yaml is required, install it with: pip3 install ruamel.yaml')
+    return ruamel.yaml
+
+
+def round_trip():
+    """Returns the shared ruamel.yaml round trip loader/dumper, importing ruamel.yaml on first use."""
+    global _roundTrip
+    if _roundTrip is None:
+        yaml = _import_ruamel().YAML(typ='rt')
+        yaml.default_flow_style = False
+        _roundTrip = yaml
+    return _roundTrip
+
+
+def round_trip_load(stream):
+    yaml = round_trip()
+    with tracing.span('yaml.round-trip-load'):
+        return yaml.load(stream)
+
+
+def round_trip_dump(document, stream):
+    yaml = round_trip()
+    with tracing.span('yaml.round-trip-dump'):
+        yaml.dump(document, stream)
+
+
+def yaml12_classes(yaml):
+    """Returns PyYAML (constructor, resolver) classes which resolve and construct scalars as YAML 1.2 does."""
+    global _yaml12
+    if _yaml12 is not None:
+        return _yaml12
+
+    class Yaml12Resolver(yaml.resolver.BaseResolver):
+        pass
+
+    for tag, regexp, first in _YAML12_RESOLVERS:
+        Yaml12Resolver.add_implicit_resolver(tag, re.compile(regexp, re.X), list(first))
+
+    class Yaml12Constructor(yaml.constructor.SafeConstructor):
+        def construct_yaml_bool(self, node):
+            return self.construct_scalar(node).lower() == 'true'
+
+        def construct_yaml_int(self, node):
+            value = self.construct_scalar(node).replace('_', '')
+            sign = -1 if value[0] == '-' else 1
+            value = value.lstrip('+-')
+            for prefix, base in (('0b', 2), ('0x', 16), ('0o', 8)):
+                if value.startswith(prefix):
+                    return sign * int(value[2:], base)
+            return sign * int(value)
+
+        def construct_yaml_float(self, node):
+            value = self.construct_scalar(node).replace('_', '').lower()
+            sign = -1 if value[0] == '-' else 1
+            value = value.lstrip('+-')
+            if value == '.inf':
+                return sign * float('inf')
+            if value == '.nan':
+                return float('nan')
+            return sign * float(value)
+
+        def construct_yaml_timestamp(self, node):
+            # Times with a timezone are converted to UTC without one, as ruamel.yaml does
+            value = yaml.constructor.SafeConstructor.construct_yaml_timestamp(self, node)
+            if getattr(value, 'tzinfo', None) is not None:
+                value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            return value
+
+    Yaml12Constructor.add_constructor('tag:yaml.org,2002:bool', Yaml12Constructor.construct_yaml_bool)
+    Yaml12Constructor.add_constructor('tag:yaml.org,2002:int', Yaml12Constructor.construct_yaml_int)
+    Yaml12Constructor.add_constructor('tag:yaml.org,2002:float', Yaml12Constructor.construct_yaml_float)
+    Yaml12Constructor.add_constructor('tag:yaml.org,2002:timestamp', Yaml12Constructor.construct_yaml_timestamp)
+    _yaml12 = Yaml12Constructor, Yaml12Resolver
+    return _yaml12
+
+
+def libyaml_loader():
+    """Returns a loader class based on PyYAML's libyaml parser resolving YAML 1.2, or None if unavailable or disabled."""
+    global _libyamlLoader
+    if os.environ.get(LOADER_ENV, 'auto') not in ('auto', 'libyaml'):
+        return None
+    if _libyamlLoader is not None:
+        return _libyamlLoader
+    try:
+        with tracing.span('yaml.import', module='yaml'):
+            import yaml
+            import yaml.cyaml
+        parser = yaml.cyaml.CParser
+    except (ImportError, AttributeError):
+        return None
+    constructor, resolver = yaml12_classes(yaml)
+
+    class Yaml12Loader(parser, constructor, resolver):
+        def __init__(self, stream):
+            parser.__init__(self, stream)
+            constructor.__init__(self)
+            resolver.__init__(self)
+
+    _libyamlLoader = Yaml12Loader
+    return _libyamlLoader
+
+
+def _libyaml_safe_load():
+    loader = libyaml_loader()
+    if loader is None:
+        return None
+    import yaml
+    return lambda stream: yaml.load(stream, Loader=loader)
+
+
+def safe_load(stream):
+    """Loads yml into plain dicts and lists, for read-only access."""
+    global _safeLoad
+    if _safeLoad is None:
+        _safeLoad = _libyaml_safe_load() or _import_ruamel().YAML(typ='safe').load
+    with tracing.span('yaml.safe-load'):
+        return _safeLoad(stream)
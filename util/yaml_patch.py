@@ -0,0 +1,257 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Patches scalar values of block style yml documents in place, on the text, so that
+# e.g. a build number bump neither parses nor re-serializes the whole file. Everything
+# else in the file, including comments and formatting, is left untouched.
+#
+# Existing keys whose value is a single line scalar can be patched, and new keys with a
+# scalar value, and their new parent keys, can be appended to a block mapping that already
+# has keys. For anything else, e.g. new top level keys or flow style collections, patch()
+# returns None and the caller must fall back to a round trip load and dump.
+###############################################################################
+
+import re
+
+# <indent><key>:<value and comment>, where key is plain or quoted
+KEY_LINE = re.compile(r'^(?P<indent> *)(?P<key>"[^"]*"|\'[^\']*\'|[^\s#\'"{}\[\],&*!|>%@`-][^:#]*?|-[^\s:#][^:#]*?)'
+                      r':(?:[ \t]+(?P<value>.*?))?[ \t]*$')
+SEQUENCE_LINE = re.compile(r'^(?P<indent> *)-(?:[ \t]|$)')
+# Anchors and tags of a value, e.g. `&defaults` or `!!str`
+NODE_PROPERTIES = re.compile(r'^(?:[&!]\S*(?:[ \t]+|$))+')
+# Values that are already quoted, or plain up to an optional comment
+QUOTED_VALUE = re.compile(r'^(?P<scalar>\'(?:[^\']|\'\')*\'|"(?:[^"\\]|\\.)*")(?P<rest>[ \t]+#.*)?$')
+PLAIN_VALUE = re.compile(r'^(?P<scalar>[^\s#\'"{}\[\]&*!|>%@`](?:[^#]*?[^\s#])?)(?P<rest>[ \t]+#.*)?$')
+
+# Strings that can be written without quotes, unless they would be read back as another type
+SAFE_PLAIN = re.compile(r'^[A-Za-z0-9_./](?:[A-Za-z0-9_ ./+-]*[A-Za-z0-9_./+-])?$')
+# YAML 1.1 and 1.2 numbers and timestamps, and words read back as booleans or null
+NUMBER_LIKE = re.compile(r'^[-+]?(?:[0-9][0-9_]*(?:\.[0-9_]*)?|\.[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)?$'
+                         r'|^[-+]?0[xob][0-9a-fA-F_]+$|^[-+]?\.(?:inf|nan)$|^[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}', re.I)
+RESERVED_WORDS = {'y', 'n', 'yes', 'no', 'on', 'off', 'true', 'false', 'null', '~'}
+
+
+def format_scalar(value):
+    """Returns the yml text for a scalar value, or None if it is not a scalar."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, str):
+        if '\n' in value:
+            return None
+        if SAFE_PLAIN.match(value) and not NUMBER_LIKE.match(value) and value.lower() not in RESERVED_WORDS:
+            return value
+        return "'" + value.replace("'", "''") + "'"
+    return None
+
+
+def _unquote(key):
+    if len(key) >= 2 and key[0] == key[-1] and key[0] in '\'"':
+        return key[1:-1]
+    return key
+
+
+class _Block(object):
+    """The children of a key holding a block collection: their indent, whether they are keys and their last line."""
+
+    def __init__(self, line, keyIndent):
+        self.keyIndent = keyIndent
+        self.indent = None
+        self.keys = False
+        self.last = line
+
+
+def _locate(lines):
+    """Maps the dotted path of every single line scalar to (line index, value start, value end).
+
+    Returns that map, the set of the dotted paths of all keys, and a map of the dotted path of
+    every key holding a block collection to its _Block, or None if the document uses constructs
+    this module does not understand.
+    """
+    located = {}
+    keys = set()
+    blocks = {}
+    # Stack of (indent, key, _Block); key is None inside sequences, whose items cannot be addressed
+    stack = []
+    blockIndent = None
+    # Indent of the last line holding a scalar or a sequence item, more indented lines after it are part of it
+    scalarIndent = None
+    scalarPath = None
+    seenKeys = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if blockIndent is not None:
+            # Lines of a block scalar (| or >) are more indented than its key
+            if not stripped:
+                continue
+            if len(line) - len(line.lstrip(' ')) > blockIndent:
+                for entry in stack:
+                    entry[2].last = i
+                continue
+            blockIndent = None
+        if stripped.startswith('---') or stripped.startswith('...') or stripped.startswith('%'):
+            # Only a single document, with the marker before its content, is supported
+            if seenKeys:
+                return None
+            continue
+        if not stripped or stripped.startswith('#'):
+            continue
+        seenKeys = True
+        if '\t' in line[:len(line) - len(line.lstrip())]:
+            return None
+        indent = len(line) - len(line.lstrip(' '))
+        if scalarIndent is not None and indent > scalarIndent:
+            # A plain or quoted scalar spanning lines, which cannot be patched, or the rest of a sequence item
+            located.pop(scalarPath, None)
+            for entry in stack:
+                entry[2].last = i
+            continue
+        scalarIndent = scalarPath = None
+        sequence = SEQUENCE_LINE.match(line)
+        match = None if sequence else KEY_LINE.match(line)
+        if not sequence and not match:
+            return None
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        for entry in stack:
+            entry[2].last = i
+        if stack and stack[-1][2].indent is None:
+            stack[-1][2].indent = indent
+            stack[-1][2].keys = not sequence
+        if sequence:
+            stack.append((indent, None, _Block(i, indent)))
+            item = line[sequence.end():].strip()
+            if item and not item.startswith('#'):
+                # Items cannot be addressed, so the lines of an item starting on this line are skipped
+                scalarIndent = indent
+            continue
+        key = _unquote(match.group('key').rstrip())
+        path = [k for d, k, m in stack] + [key]
+        if None not in path:
+            keys.add('.'.join(path))
+        value = match.group('value')
+        properties = NODE_PROPERTIES.match(value) if value else None
+        rest = value[properties.end():] if properties else value
+        if not rest or rest.startswith('#'):
+            # A block collection, possibly with an anchor or tag
+            block = _Block(i, indent)
+            if None not in path:
+                blocks['.'.join(path)] = block
+            stack.append((indent, key, block))
+            continue
+        if rest[0] in '|>':
+            blockIndent = indent
+            continue
+        if rest[0] in '[{' and not (rest.endswith(']') or rest.endswith('}')):
+            # Flow collection spanning lines
+            return None
+        scalarIndent = indent
+        # Anchored values are left alone, patching them would change their aliases too
+        if None in path or properties:
+            continue
+        valueMatch = QUOTED_VALUE.match(value) or PLAIN_VALUE.match(value)
+        if valueMatch:
+            start = line.index(value, match.end('key') + 1)
+            scalarPath = '.'.join(path)
+            located[scalarPath] = (i, start, start + len(valueMatch.group('scalar')))
+    return located, keys, blocks
+
+
+def patch(text, properties):
+    """Returns the text with the given dotted properties set, or None if they cannot all be patched in place."""
+    lines = text.split('\n')
+    parsed = _locate(lines)
+    if parsed is None:
+        return None
+    located, keys, blocks = parsed
+    # Trees of the new keys, by the path of the existing mapping they are added to
+    added = {}
+    for prop, value in properties.items():
+        scalar = format_scalar(value)
+        if scalar is None:
+            return None
+        if prop in located:
+            i, start, end = located[prop]
+            lines[i] = lines[i][:start] + scalar + lines[i][end:]
+            # Later values on the same line cannot shift, as every line holds at most one scalar
+            continue
+        path = prop.split('.')
+        # The deepest existing parent key
+        depth = next((n for n in range(len(path) - 1, 0, -1) if '.'.join(path[:n]) in keys), 0)
+        if prop in keys or depth == 0:
+            return None
+        block = blocks.get('.'.join(path[:depth]))
+        if block is None or not block.keys:
+            return None
+        node = added.setdefault('.'.join(path[:depth]), {})
+        for key in path[depth:-1]:
+            node = node.setdefault(key, {})
+            if not isinstance(node, dict):
+                return None
+        if path[-1] in node:
+            return None
+        node[path[-1]] = scalar
+
+    # New keys, as (index of the line to add them after, depth, lines), added last so that located lines do not
+    # shift. From the end, and for mappings ending on the same line, the keys of the outer one go after the inner one
+    appended = []
+    for parent, tree in added.items():
+        block = blocks[parent]
+        newLines = _format_tree(tree, block.indent, block.indent - block.keyIndent)
+        if newLines is None:
+            return None
+        appended.append((block.last, -parent.count('.'), newLines))
+    for i, depth, newLines in sorted(appended, key=lambda added: added[:2], reverse=True):
+        lines[i + 1:i + 1] = newLines
+    return '\n'.join(lines)
+
+
+def _format_tree(tree, indent, step):
+    """Returns the lines of a block mapping of nested dicts of formatted scalars, or None if a key cannot be written."""
+    lines = []
+    for key, value in tree.items():
+        keyText = format_scalar(key)
+        if keyText is None or not key:
+            return None
+        if isinstance(value, dict):
+            children = _format_tree(value, indent + step, step)
+            if children is None:
+                return None
+            lines.append(' ' * indent + keyText + ':')
+            lines.extend(children)
+        else:
+            lines.append(' ' * indent + keyText + ': ' + value)
+    return lines
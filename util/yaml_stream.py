@@ -0,0 +1,241 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Streaming lookup of properties in a yml file, for read-only access to large app
+# CI info files.
+#
+# Instead of building the whole document, the parser events are walked and only the
+# mappings on the path to a requested property are entered; other subtrees are skipped
+# without being built and the file is read in chunks, so memory is bounded by the depth
+# of the path and the size of the values read rather than by the size of the document.
+# Reading stops as soon as every property has been found, which for properties with
+# wildcards is once the keys before the first wildcard have been read.
+#
+# Uses PyYAML's libyaml parser, and returns None, to fall back to loading the whole
+# document, when it is not available or disabled (see yaml_backend.py), for queries with
+# list indices or projections (see path_query.py), or when the lookup needs more than one
+# pass, i.e. merge keys or aliases to anchors outside the value read. Keys are matched on
+# their text, and the first of duplicate keys is used.
+###############################################################################
+
+import fnmatch
+
+from util import ci_info_cache
+from util import path_query
+from util import property_path
+from util import tracing
+from util import yaml_backend
+
+
+class _NeedsFullLoad(Exception):
+    pass
+
+
+class _Found(Exception):
+    pass
+
+
+def _event_loader(yaml):
+    constructor, resolver = yaml_backend.yaml12_classes(yaml)
+
+    class EventLoader(yaml.composer.Composer, constructor, resolver):
+        """Composes and constructs a document from a list of parser events, resolving scalars as YAML 1.2."""
+
+        def __init__(self, events):
+            self.events = events
+            self.position = 0
+            yaml.composer.Composer.__init__(self)
+            constructor.__init__(self)
+            resolver.__init__(self)
+
+        def check_event(self, *choices):
+            return not choices or isinstance(self.events[self.position], choices)
+
+        def peek_event(self):
+            return self.events[self.position]
+
+        def get_event(self):
+            self.position += 1
+            return self.events[self.position - 1]
+
+    return EventLoader
+
+
+class _Lookup(object):
+    def __init__(self, yaml, parser, patterns):
+        self.yaml = yaml
+        self.parser = parser
+        self.patterns = patterns
+        self.results = {pattern: [] for pattern in patterns}
+        self.globs = set(pattern for pattern in patterns if property_path.GLOB_CHARS.search(pattern))
+        self.pending = set(patterns)
+        # A pattern is done once the key matching its last segment before any wildcard has been read
+        self.exactDepth = {}
+        for pattern in patterns:
+            keys = pattern.split('.')
+            self.exactDepth[pattern] = next((i for i, key in enumerate(keys) if property_path.GLOB_CHARS.search(key)),
+                                            len(keys))
+        self.eventLoader = _event_loader(yaml)
+
+    def _node_events(self, first):
+        """Returns the events of the node starting with the given event."""
+        events = [first]
+        depth = 1 if isinstance(first, self.yaml.CollectionStartEvent) else 0
+        while depth:
+            event = self.parser.get_event()
+            events.append(event)
+            if isinstance(event, self.yaml.CollectionStartEvent):
+                depth += 1
+            elif isinstance(event, self.yaml.CollectionEndEvent):
+                depth -= 1
+        return events
+
+    def _skip(self, first):
+        """Skips the node starting with the given event, without keeping its events."""
+        depth = 1 if isinstance(first, self.yaml.CollectionStartEvent) else 0
+        while depth:
+            event = self.parser.get_event()
+            if isinstance(event, self.yaml.CollectionStartEvent):
+                depth += 1
+            elif isinstance(event, self.yaml.CollectionEndEvent):
+                depth -= 1
+
+    def _build(self, first):
+        yaml = self.yaml
+        events = [yaml.StreamStartEvent(), yaml.DocumentStartEvent()] + self._node_events(first) + \
+                 [yaml.DocumentEndEvent(), yaml.StreamEndEvent()]
+        try:
+            return ci_info_cache.to_plain(self.eventLoader(events).get_single_data())
+        except yaml.YAMLError:
+            # e.g. an alias to an anchor outside of the value
+            raise _NeedsFullLoad()
+
+    def _add(self, pattern, prop, value):
+        # As path_query.evaluate, missing properties without wildcards are added at the end
+        if value is not None or pattern in self.globs:
+            self.results[pattern].append((prop, value))
+
+    def walk_mapping(self, active, path):
+        """Reads the mapping whose start event was just consumed, for the given (pattern, keys) pairs."""
+        yaml = self.yaml
+        depth = len(path)
+        # Keys already read, so that wildcards also only match the first of duplicate keys
+        seen = set() if self.globs else None
+        while not self.parser.check_event(yaml.MappingEndEvent):
+            keyEvent = self.parser.get_event()
+            if not isinstance(keyEvent, yaml.ScalarEvent):
+                self._skip(keyEvent)
+                self._skip(self.parser.get_event())
+                continue
+            key = keyEvent.value
+            if key == '<<' and keyEvent.implicit[0]:
+                raise _NeedsFullLoad()
+            if seen is not None:
+                if key in seen:
+                    self._skip(self.parser.get_event())
+                    continue
+                seen.add(key)
+            matching = [(pattern, keys) for pattern, keys in active
+                        if pattern in self.pending and fnmatch.fnmatchcase(key, keys[depth])]
+            valueEvent = self.parser.get_event()
+            if not matching:
+                self._skip(valueEvent)
+                continue
+
+            propPath = path + [key]
+            if any(len(keys) == depth + 1 for pattern, keys in matching):
+                value = self._build(valueEvent)
+                for pattern, keys in matching:
+                    if len(keys) == depth + 1:
+                        self._add(pattern, '.'.join(propPath), value)
+                    else:
+                        for subKeys, subValue in property_path.match_keys(value, keys[depth + 1:]):
+                            self._add(pattern, '.'.join(propPath + subKeys), subValue)
+            elif isinstance(valueEvent, yaml.MappingStartEvent):
+                self.walk_mapping(matching, propPath)
+            elif isinstance(valueEvent, yaml.AliasEvent):
+                raise _NeedsFullLoad()
+            else:
+                self._skip(valueEvent)
+
+            self.pending.difference_update(pattern for pattern, keys in matching if depth < self.exactDepth[pattern])
+            if not self.pending:
+                raise _Found()
+        self.parser.get_event()
+
+    def run(self):
+        yaml = self.yaml
+        self.parser.get_event()
+        if self.parser.check_event(yaml.StreamEndEvent):
+            return
+        self.parser.get_event()
+        if self.parser.check_event(yaml.MappingStartEvent):
+            self.parser.get_event()
+            try:
+                self.walk_mapping([(pattern, pattern.split('.')) for pattern in self.patterns], [])
+            except _Found:
+                pass
+
+
+def _streamable(pattern):
+    """Whether the query only has keys and globs, i.e. no list indices or projections."""
+    return all(len(step) == 1 and step[0].kind in (path_query.KEY, path_query.GLOB)
+               for step in path_query.compile_query(pattern).steps)
+
+
+def read_properties(path, patterns, typed=False):
+    """Returns (pattern, property, value) triples as property_path.read_properties, or None to load the document."""
+    if not all(_streamable(pattern) for pattern in patterns):
+        return None
+    loader = yaml_backend.libyaml_loader()
+    if loader is None:
+        return None
+    import yaml
+
+    with tracing.span('yaml.stream-read', file=path) as span, open(path, 'rb') as ymlFile:
+        parser = loader(ymlFile)
+        lookup = _Lookup(yaml, parser, patterns)
+        try:
+            lookup.run()
+        except _NeedsFullLoad:
+            span.set(fallback=True)
+            return None
+        finally:
+            parser.dispose()
+
+    results = []
+    for pattern in patterns:
+        matches = lookup.results[pattern]
+        if not matches and pattern not in lookup.globs:
+            matches = [(pattern, None)]
+        for prop, value in matches:
+            results.append((pattern, prop, value if typed else property_path.format_value(value)))
+    return results
@@ -0,0 +1,220 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# In-process API for the versioning steps, for callers that run several steps per
+# process instead of one script per step, e.g. run-batch.py. inc-build-number.py,
+# generate-version.py and tag-release.py are thin wrappers around it.
+#
+# Each function raises VersioningError for invalid input, and GitError when a git
+# command fails. plan() computes what the next build would change without any of it.
+#
+# Note: App CI info file is the one which is required by stakater to store CI/CD related data.
+# Wheres the app info file is the one which is placed in the user's application repo containing
+# details about the repo/project and version to bump
+###############################################################################
+
+import os
+
+from util import ci_info
+from util import ci_info_cache
+from util import property_path
+from util import push_journal
+from util.git_repo import GitRepo
+from versioning import build_cache
+from versioning import build_number
+from versioning.version_pipeline import APP_CI_INFO_FILE_NAME
+from versioning.version_pipeline import APP_INFO_FILE_NAME
+from versioning.version_pipeline import VersioningError
+from versioning.version_pipeline import latest_tag
+from versioning.version_pipeline import next_version
+from versioning.version_pipeline import push_release
+from versioning.version_pipeline import resolve_ci_info_path
+from versioning.version_pipeline import validate_release
+
+
+def _check_repo_dir(repoDir):
+    if not os.path.isdir(repoDir):
+        raise VersioningError("Given Repository path does not exist or is not a directory")
+    if not os.path.isdir(os.path.join(repoDir, '.git')):
+        raise VersioningError("Given repository directory is not a git repository")
+
+
+def _app_ci_info_file(appCiInfoDir):
+    if not os.path.isdir(appCiInfoDir):
+        raise VersioningError("Given Repository path does not exist or is not a directory")
+    appCiInfoFilePath = os.path.join(appCiInfoDir, APP_CI_INFO_FILE_NAME)
+    if not os.path.isfile(appCiInfoFilePath):
+        raise VersioningError("Given directory path does not contain a file named: 'app-ci-info.yml'")
+    return appCiInfoFilePath
+
+
+def _commit_and_push(appCiInfoDir, appCiInfoFilePath, message, asyncPush=False):
+    if asyncPush:
+        push_journal.commit(appCiInfoDir, [os.path.abspath(appCiInfoFilePath)], message)
+        return
+    ciInfoRepo = GitRepo(appCiInfoDir)
+    ciInfoRepo.add(os.path.abspath(appCiInfoFilePath))
+    ciInfoRepo.commit(message)
+    ciInfoRepo.push()
+
+
+def increment_build_number(appCiInfoDir, count=1, allocate=False, asyncPush=False):
+    """Increments the build number in the app CI info file and pushes it. Returns the (first, last) number reserved.
+
+    With allocate, or to reserve more than one number, it is safe for parallel builds, see build_number.allocate.
+    With asyncPush, it is committed locally and pushed in the background, see push_journal.py.
+    """
+    appCiInfoDir = resolve_ci_info_path(appCiInfoDir, create=True)
+    appCiInfoFilePath = _app_ci_info_file(appCiInfoDir)
+    if allocate or count != 1:
+        if asyncPush:
+            raise VersioningError('Build numbers cannot be allocated with an asynchronous push, '
+                                  'as the allocation relies on the push being accepted')
+        try:
+            return build_number.allocate(appCiInfoDir, count)
+        except build_number.BuildNumberError as ex:
+            raise VersioningError(str(ex))
+    newBuildNumber = build_number.current_build_number(appCiInfoFilePath) + 1
+    # Patch the value in place to keep the current format and comments
+    ci_info.update(appCiInfoFilePath, {build_number.BUILD_NUMBER_PROPERTY: newBuildNumber})
+    _commit_and_push(appCiInfoDir, appCiInfoFilePath, '[Stakater] Updated Build Number to: {}'.format(newBuildNumber),
+                     asyncPush)
+    return newBuildNumber, newBuildNumber
+
+
+def generate_version(appCiInfoDir, repoDir, tagLookup='index', asyncPush=False):
+    """Generates the version for the current build number, saves it to the app CI info file and pushes it.
+
+    The version of app-info.yml is used if it is greater than the latest tag, else the version of the
+    latest tag with the current build number. The build is recorded for the repo's content, see
+    build_cache.py. With asyncPush, it is pushed in the background. Returns the version.
+    """
+    _check_repo_dir(repoDir)
+    appCiInfoDir = resolve_ci_info_path(appCiInfoDir, create=True)
+    appInfoFilePath = os.path.join(repoDir, APP_INFO_FILE_NAME)
+    if not os.path.isfile(appInfoFilePath):
+        raise VersioningError('Given repository does not contain a "app-info.yml" file.\n Please make sure you place '
+                              'that file with version info in the repository directory.')
+    appCiInfoFilePath = _app_ci_info_file(appCiInfoDir)
+    # Both files are read only here, so the parsed file cache can be used
+    appInfo = ci_info_cache.load(appInfoFilePath)
+    # Should already be updated by increment_build_number
+    currentBuildNumber = build_number.current_build_number(appCiInfoFilePath)
+    version = str(next_version(appInfo, currentBuildNumber, latest_tag(repoDir, tagLookup)))
+    key, commitId = build_cache.current_build(repoDir, appInfo)
+
+    properties = build_cache.record(ci_info_cache.load(appCiInfoFilePath), key, commitId, currentBuildNumber, version)
+    properties['ci-data.current-version'] = version
+    ci_info.update(appCiInfoFilePath, properties)
+    _commit_and_push(appCiInfoDir, appCiInfoFilePath, '[Stakater] Updated Version to: ' + version, asyncPush)
+    return version
+
+
+def lookup_build(appCiInfoDir, repoDir):
+    """Returns the build recorded for the content of the repo's HEAD and its app-info.yml version, or None.
+
+    The returned dict has the `build-number` and `version` of that build and the `commit` it was built from.
+    """
+    _check_repo_dir(repoDir)
+    appCiInfoDir = resolve_ci_info_path(appCiInfoDir)
+    appInfoFilePath = os.path.join(repoDir, APP_INFO_FILE_NAME)
+    if not os.path.isfile(appInfoFilePath):
+        raise VersioningError('Given repository does not contain a "app-info.yml" file.\n Please make sure you place '
+                              'that file with version info in the repository directory.')
+    return build_cache.lookup(_app_ci_info_file(appCiInfoDir), appInfoFilePath, repoDir)
+
+
+def check_release(appCiInfoFilePath, repoDir, tagLookup='index'):
+    """Returns the version from the app CI info file, raising VersioningError unless it is greater than the latest tag."""
+    _check_repo_dir(repoDir)
+    appCiInfo = ci_info_cache.load(resolve_ci_info_path(appCiInfoFilePath))
+    if int(appCiInfo['ci-data']['current-build-number']) <= 0:
+        raise VersioningError('current-build-number has not been updated yet\n'
+                              'Run "generate-version.py" first to update the current build number')
+    version = str(appCiInfo['ci-data']['current-version'])
+    validate_release(version, latest_tag(repoDir, tagLookup))
+    return version
+
+
+def tag_release(appCiInfoFilePath, repoDir, tagLookup='index'):
+    """Tags the repo with the version from the app CI info file, creates the release branch and pushes both.
+
+    The version must be greater than the latest tag. Returns the version and the name of the release branch.
+    """
+    version = check_release(appCiInfoFilePath, repoDir, tagLookup)
+    return version, push_release(GitRepo(repoDir), version)
+
+
+def plan(appCiInfoDir, repoDir, tagLookup='index'):
+    """Returns the changes the next build's versioning would make, without writing files, committing or pushing.
+
+    The build number is incremented, the version generated and the build recorded in memory, from the
+    parsed file cache and the tag index, and checked as tag_release would. Returns a dict with the
+    `changes` as {property: {'from': old, 'to': new}}, the same properties as version_pipeline.run
+    writes, and the `release` tag and branch with `error` set if invalid.
+    With tagLookup `describe` the latest tag is found with a local `git describe`, and with `remote` it
+    is listed from origin with `git ls-remote`.
+    """
+    _check_repo_dir(repoDir)
+    appCiInfoDir = resolve_ci_info_path(appCiInfoDir)
+    appInfoFilePath = os.path.join(repoDir, APP_INFO_FILE_NAME)
+    if not os.path.isfile(appInfoFilePath):
+        raise VersioningError('Given repository does not contain a "app-info.yml" file.\n Please make sure you place '
+                              'that file with version info in the repository directory.')
+    appCiInfo = ci_info_cache.load(_app_ci_info_file(appCiInfoDir))
+    appInfo = ci_info_cache.load(appInfoFilePath)
+    currentBuildNumber = int(appCiInfo['ci-data']['current-build-number'])
+    latestTag = latest_tag(repoDir, tagLookup)
+    version = str(next_version(appInfo, currentBuildNumber + 1, latestTag))
+    try:
+        validate_release(version, latestTag)
+        error = None
+    except VersioningError as ex:
+        error = str(ex)
+    properties = {build_number.BUILD_NUMBER_PROPERTY: currentBuildNumber + 1, 'ci-data.current-version': version}
+    key, commitId = build_cache.current_build(repoDir, appInfo)
+    properties.update(build_cache.record(appCiInfo, key, commitId, currentBuildNumber + 1, version))
+    return {
+        'changes': {prop: {'from': ci_info_cache.to_plain(value), 'to': properties[prop]}
+                    for prop, match, value in property_path.read_properties(appCiInfo, list(properties), typed=True)},
+        'release': {'tag': version, 'branch': 'release-v' + version, 'latestTag': latestTag, 'error': error},
+    }
+
+
+def format_plan(versionPlan):
+    """Formats the plan as a diff of the app CI info file followed by the release to be tagged."""
+    lines = ['{}: {} -> {}'.format(prop, change['from'], change['to'])
+             for prop, change in versionPlan['changes'].items()]
+    release = versionPlan['release']
+    lines.append('tag {} and branch {} (latest tag: {}): {}'.format(
+        release['tag'], release['branch'], release['latestTag'],
+        'invalid, ' + release['error'].split('\n')[0] if release['error'] else 'valid'))
+    return '\n'.join(lines)
@@ -0,0 +1,106 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Record of the builds of an app by content, so that a stage can find out that the
+# source was already built, e.g. on a re-run or after a CI info only change, and
+# reuse that build's artifact and version instead of building it again.
+#
+# A build is keyed by the git tree of the app repo's HEAD, which covers every file of
+# the commit, together with the major.minor.patch version of its app-info.yml. Builds are
+# kept in the app CI info file as a map under `ci-data.builds`, so that recording a build
+# only adds or patches its own lines (see util/yaml_patch.py):
+#   <sha1 of tree and version>:
+#     build-number: 12
+#     version: 1.2.0+12
+#     commit: <commit built>
+# Every line stays shorter than the width at which ruamel.yaml wraps scalars, as a wrapped
+# line cannot be patched. Once more than 2 * MAX_BUILDS builds are recorded, the file is
+# rewritten with the most recent MAX_BUILDS. Builds recorded as a list are still read.
+# Uncommitted changes in the repo are not part of the key.
+###############################################################################
+
+import hashlib
+
+from util import ci_info_cache
+from util.git_repo import GitRepo
+
+BUILDS_PROPERTY = 'ci-data.builds'
+MAX_BUILDS = 50
+
+
+def app_version(appInfo):
+    return '{}.{}.{}'.format(int(appInfo['version']['major']), int(appInfo['version']['minor']),
+                             int(appInfo['version']['patch']))
+
+
+def build_key(treeId, appVersion):
+    return hashlib.sha1('{} {}'.format(treeId, appVersion).encode('utf-8')).hexdigest()
+
+
+def current_build(repoDir, appInfo):
+    """Returns the key of the repo's HEAD and the commit id."""
+    commitId, treeId = GitRepo(repoDir).head_ids()
+    return build_key(treeId, app_version(appInfo)), commitId
+
+
+def builds(appCiInfo):
+    """Returns the builds recorded in the parsed app CI info by key."""
+    recorded = appCiInfo['ci-data'].get('builds') or {}
+    if isinstance(recorded, list):
+        return {build['key']: dict(build) for build in recorded}
+    return {key: dict(build, key=key) for key, build in recorded.items() if isinstance(build, dict)}
+
+
+def find(appCiInfo, key):
+    """Returns the build recorded with the key in the parsed app CI info, or None."""
+    return builds(appCiInfo).get(key)
+
+
+def record(appCiInfo, key, commitId, buildNumber, version):
+    """Returns the properties that add the build to the parsed app CI info.
+
+    Those are the build's own properties, unless the builds have to be rewritten, i.e. they are
+    still a list or there are more than 2 * MAX_BUILDS, keeping the MAX_BUILDS most recent then.
+    """
+    build = {'build-number': int(buildNumber), 'version': str(version), 'commit': commitId}
+    recorded = builds(appCiInfo)
+    recorded[key] = dict(build, key=key)
+    if isinstance(appCiInfo['ci-data'].get('builds') or {}, dict) and len(recorded) <= 2 * MAX_BUILDS:
+        return {'{}.{}.{}'.format(BUILDS_PROPERTY, key, field): value for field, value in build.items()}
+    recent = sorted(recorded.values(), key=lambda build: build['build-number'])[-MAX_BUILDS:]
+    return {BUILDS_PROPERTY: {build['key']: {field: build[field] for field in ('build-number', 'version', 'commit')}
+                              for build in recent}}
+
+
+def lookup(appCiInfoFilePath, appInfoFilePath, repoDir):
+    """Returns the build recorded for the current content of the repo, or None if it was not built yet."""
+    key, commitId = current_build(repoDir, ci_info_cache.load(appInfoFilePath))
+    return find(ci_info_cache.load(appCiInfoFilePath), key)
@@ -0,0 +1,127 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Allocates build numbers from the app CI info file so that parallel builds of the
+# same app never get the same number.
+#
+# Builds sharing a CI info checkout take an flock on a lock file in its .git dir
+# while they update the file. Builds on other checkouts are serialized by git
+# itself: the new build number is committed and pushed, and a rejected push means
+# someone else allocated first, so the commit is dropped, the remote branch pulled
+# and the allocation retried from the newly pushed number (compare-and-swap). The
+# push is a plain fast-forward, never forced, as every checkout writes the same branch.
+#
+# A block of numbers can be reserved in one allocation, e.g. one per matrix build.
+###############################################################################
+
+import os
+import socket
+import time
+import uuid
+
+from util import ci_info
+from util import ci_info_cache
+from util import file_lock
+from util import tracing
+from util.git_repo import GitError
+from util.git_repo import GitRepo
+
+BUILD_NUMBER_PROPERTY = 'ci-data.current-build-number'
+LOCK_FILE_NAME = 'stakater-build-number.lock'
+
+
+class BuildNumberError(Exception):
+    pass
+
+
+def current_build_number(appCiInfoFilePath):
+    return int(ci_info_cache.load(appCiInfoFilePath)['ci-data']['current-build-number'])
+
+
+def _commit_message(first, last):
+    if first == last:
+        message = '[Stakater] Updated Build Number to: {}'.format(last)
+    else:
+        message = '[Stakater] Updated Build Number to: {} (reserved {}-{})'.format(last, first, last)
+    # Allocations of the same number from the same state must still be different commits, else the
+    # second push would be a no-op instead of being rejected
+    return '{}\n\nAllocation-Id: {}-{}-{}'.format(message, socket.gethostname(), os.getpid(), uuid.uuid4().hex)
+
+
+def _upstream(repo):
+    """Returns the remote and the remote branch ref of the upstream of the current branch."""
+    branch = repo.run('symbolic-ref', '--short', 'HEAD')
+    return repo.run('config', 'branch.{}.remote'.format(branch)), repo.run('config', 'branch.{}.merge'.format(branch))
+
+
+def _push_allocation(repo, remote, remoteRef):
+    """Pushes HEAD as a fast-forward of the remote branch. Returns True if it moved the remote branch.
+
+    Raises GitError if the push is rejected, i.e. the remote branch has commits HEAD does not have.
+    """
+    output = repo.run('push', '--porcelain', remote, 'HEAD:' + remoteRef)
+    for line in output.split('\n'):
+        fields = line.split('\t')
+        if len(fields) >= 2 and fields[1].endswith(':' + remoteRef):
+            # ` ` fast-forward, `*` new ref; `=` up to date means nothing was allocated
+            return fields[0] in (' ', '*')
+    return False
+
+
+def allocate(appCiInfoDir, count=1, retries=5, backoff=0.5):
+    """Reserves the next `count` build numbers and pushes the update. Returns the (first, last) number reserved."""
+    if count < 1:
+        raise BuildNumberError('Number of build numbers to reserve must be at least 1, got: {}'.format(count))
+    appCiInfoFilePath = os.path.join(appCiInfoDir, 'app-ci-info.yml')
+    repo = GitRepo(appCiInfoDir)
+
+    with file_lock.locked(os.path.join(repo.git_dir(), LOCK_FILE_NAME)):
+        remote, remoteRef = _upstream(repo)
+        for attempt in range(retries):
+            first = current_build_number(appCiInfoFilePath) + 1
+            last = first + count - 1
+            ci_info.update(appCiInfoFilePath, {BUILD_NUMBER_PROPERTY: last})
+            repo.add(os.path.abspath(appCiInfoFilePath))
+            repo.commit(_commit_message(first, last))
+            try:
+                with tracing.span('push-attempt', attempt=attempt + 1, buildNumber=last):
+                    if _push_allocation(repo, remote, remoteRef):
+                        return first, last
+                error = 'The push did not update {}'.format(remoteRef)
+            except GitError as ex:
+                # Assume the push was rejected because another build pushed first
+                error = str(ex)
+            repo.drop_last_commit()
+            if attempt == retries - 1:
+                raise BuildNumberError('Could not allocate a build number after {} attempts:\n{}'
+                                       .format(retries, error))
+            time.sleep(backoff * (attempt + 1))
+            repo.pull_rebase()
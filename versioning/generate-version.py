@@ -44,6 +44,16 @@
 #
 # Argument 1 (-f, --app-ci-info-dir-path): File path to the app CI info yml file
 # Argument 2 (-d, --repo-dir): Path to the git repository directory for which the version is to be generated
+# Argument 3 (-t, --tag-lookup): How the latest tag is found: `index` (default) takes the highest
+#                              major.minor.patch+build-number tag of the repo, `describe` the nearest tag
+#                              reachable from HEAD as returned by `git describe --tags`, `remote` the highest
+#                              tag of origin, listed with `git ls-remote`. Use `remote` in shallow clones
+# Argument 4 (-p, --plan): Only print what the next build would change, as a diff of the app CI info file
+#                         and whether the version could be tagged, without writing anything or running git
+#                         commands. `text` (default) or `json`
+# Argument 5 (--async): Commit locally and push in the background instead of waiting for the push,
+#                       see util/flush-pushes.py to wait until it is pushed
+# Argument 6 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
 #
 # Note: App CI info file is the one which is required by stakater to store CI/CD related data.
 # Wheres the app info file is the one which is placed in the user's application repo containing
@@ -51,26 +61,24 @@
 ###############################################################################
 
 import argparse
-import subprocess
-import re
+import json
 import os
+import sys
 
-# Import ruamel.yaml if not exists
-try:
-    import ruamel.yaml as yaml
-except ImportError:
-    import pip
-
-    pip.main(['install', '--user', 'ruamel.yaml'])
-    import ruamel.yaml as yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util.git_repo import GitError
+from versioning import api
+from versioning import tag_index
 
 argParse = argparse.ArgumentParser()
 argParse.add_argument('-f', '--app-ci-info-dir-path', dest='f')
 argParse.add_argument('-d', '--repo-dir', dest='d')
+argParse.add_argument('-t', '--tag-lookup', dest='t', choices=tag_index.LOOKUPS, default='index')
+argParse.add_argument('-p', '--plan', dest='p', nargs='?', const='text', choices=['text', 'json'])
+argParse.add_argument('--async', dest='asyncPush', action='store_true')
 
-opts = argParse.parse_args()
-appInfoFileName = 'app-info.yml'
-versionRegex = r'[0-9]+.[0-9]+.[0-9]+\+[0-9]+'
+opts = tracing.parse_args(argParse)
 
 if not any([opts.d]):
     argParse.print_usage()
@@ -80,88 +88,21 @@ if not any([opts.f]):
     argParse.print_usage()
     exit('Argument `-f` or `--app-ci-info-dir-path` must be specified')
 
-repoDir = opts.d
-if not os.path.isdir(repoDir):
-    exit("Given Repository path does not exist or is not a directory")
-if not os.path.isdir(repoDir + '/.git'):
-    exit("Given repository directory is not a git repository")
-if not os.path.isfile(repoDir + '/' + appInfoFileName):
-    exit('Given repository does not contain a "app-info.yml" file.\n Please make sure you place that file with '
-         'version info in the repository directory.')
-
-# Read from app-info.yml
-appInfoFile = open(repoDir + '/' + appInfoFileName)
-appInfo = yaml.round_trip_load(appInfoFile)
-appInfoFile.close()
-
-appCiInfoDir = opts.f
-if not os.path.isdir(appCiInfoDir):
-    exit("Given Repository path does not exist or is not a directory")
-
-appCiInfoFilePath = appCiInfoDir + '/app-ci-info.yml'
-if not os.path.isfile(appCiInfoFilePath):
-    exit("Given directory path does not contain a file named: 'app-ci-info.yml'")
-
-# read from app-ci-info.yml
-appCiInfoFile = open(appCiInfoFilePath)
-# Use round trip load and dump to store file with current format and comments
-appCiInfo = yaml.round_trip_load(appCiInfoFile)
-# Should already be updated by inc-build-number.py
-currentBuildNumber = int(appCiInfo['ci-data']['current-build-number'])
-appCiInfoFile.close()
-
-appInfoVersion = str(appInfo['version']['major']) + '.' + str(appInfo['version']['minor']) \
-                 + '.' + str(appInfo['version']['patch']) + '+' + str(currentBuildNumber)
-
-# Identify new Tag
-newTag = ""
-try:
-    describeProc = subprocess.run(['git', '-C', repoDir, 'describe', '--tags', '--abbrev=0'], stdout=subprocess.PIPE,
-                                  stderr=subprocess.PIPE, check=True)
-    # If tags exist
-    if describeProc.returncode == 0:
-        # Decode pipe output in ascii and strip tailing whitespace characters
-        latestTag = describeProc.stdout.decode('ascii').rstrip()
-        if not re.match(versionRegex, latestTag):
-            exit('The latest tag assigned to the commit is not of the format: '
-                 '"major.minor.patch+build-number"\n'
-                 'Please make sure the latest tag on your git repo is of the given '
-                 'format or the repo does not have any tags')
-        # Parse tag of the format major.minor.patch+buildNumber
-        latestTagArray = latestTag.split('.')
-        latestMajor = int(latestTagArray[0])
-        latestMinor = int(latestTagArray[1])
-        latestPatch = int(latestTagArray[2].split('+')[0])
-        latestBuildNumber = int(latestTagArray[2].split('+')[1])
-        isMajorGreater = appInfo['version']['major'] > latestMajor
-        isMinorGreater = appInfo['version']['major'] == latestMajor and appInfo['version']['minor'] > latestMinor
-        isPatchGreater = appInfo['version']['major'] == latestMajor and appInfo['version']['minor'] == latestMinor \
-                         and appInfo['version']['patch'] > latestPatch
-        if isMajorGreater or isMinorGreater or isPatchGreater:
-            newTag = appInfoVersion
-        else:
-            newTag = str(latestMajor) + '.' + str(latestMinor) + '.' + str(latestPatch) + '+' + str(currentBuildNumber)
-# If no git tags exist
-except subprocess.CalledProcessError as describeException:
-    if str(describeException.stderr.decode('ascii').rstrip()).__contains__("fatal: No names found"):
-        newTag = appInfoVersion
-    else:
-        exit("Error Code: {} \nError: {}".format(describeException.returncode,
-                                                 describeException.stderr.decode('ascii').rstrip()))
-
-# Update app-ci-info.yml file
-with open(appCiInfoFilePath, 'w') as f:
-    appCiInfo['ci-data']['current-version'] = newTag
-    yaml.round_trip_dump(appCiInfo, f, default_flow_style=False)
-    print("New version: {}".format(newTag))
+if opts.p:
+    # Plan only: no writes and no git commands
+    try:
+        versionPlan = api.plan(opts.f, opts.d, opts.t)
+    except api.VersioningError as ex:
+        exit(str(ex))
+    except GitError as gitException:
+        exit("Error Code: {} \nError: {}".format(gitException.returncode, gitException.stderr))
+    print(json.dumps(versionPlan, indent=2) if opts.p == 'json' else api.format_plan(versionPlan))
+    exit(0)
 
 try:
-    addProc = subprocess.run(['git', '-C', appCiInfoDir, 'add', appCiInfoFilePath], stdout=subprocess.PIPE, check=True)
-    print(addProc.stdout.decode('ascii').rstrip())
-    commitProc = subprocess.run(['git', '-C', appCiInfoDir, 'commit', '-m', '[Stakater] Updated Version to: '
-                                 + str(newTag)], stdout=subprocess.PIPE, check=True)
-    print('Git Commit: {}'.format(commitProc.stdout.decode('ascii').rstrip()))
-    pushProc = subprocess.run(['git', '-C', appCiInfoDir, 'push'], stdout=subprocess.PIPE, check=True)
-    print('Git Push: {}'.format(pushProc.stdout.decode('ascii').rstrip()))
-except subprocess.CalledProcessError as addException:
-    exit("Error Code: {} \nError: {}".format(addException.returncode, addException.stderr))
+    newTag = api.generate_version(opts.f, opts.d, opts.t, asyncPush=opts.asyncPush)
+except api.VersioningError as ex:
+    exit(str(ex))
+except GitError as gitException:
+    exit("Error Code: {} \nError: {}".format(gitException.returncode, gitException.stderr))
+print("New version: {}".format(newTag))
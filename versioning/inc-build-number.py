@@ -37,57 +37,43 @@
 # Authors: Hazim
 #
 # Argument 1 (-f, --app-ci-info-dir-path): File path to the app CI info yml file
+# Argument 2 (-a, --allocate): Safe for parallel builds of the same app: lock the CI info
+#                              checkout and retry with the latest build number if the push
+#                              is rejected because another build pushed first
+# Argument 3 (-n, --count): Number of consecutive build numbers to reserve at once, e.g. one
+#                           per matrix build, defaults to 1. Implies --allocate
+# Argument 4 (--async): Commit locally and push in the background instead of waiting for the push,
+#                       see util/flush-pushes.py to wait until it is pushed
+# Argument 5 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
 ###############################################################################
 import argparse
-import subprocess
 import os
+import sys
 
-# Import ruamel.yaml if not exists
-try:
-    import ruamel.yaml as yaml
-except ImportError:
-    import pip
-
-    pip.main(['install', '--user', 'ruamel.yaml'])
-    import ruamel.yaml as yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util.git_repo import GitError
+from versioning import api
 
 argParse = argparse.ArgumentParser()
 argParse.add_argument('-f', '--app-ci-info-dir-path', dest='f')
+argParse.add_argument('-a', '--allocate', dest='a', action='store_true')
+argParse.add_argument('-n', '--count', dest='n', type=int, default=1)
+argParse.add_argument('--async', dest='asyncPush', action='store_true')
 
-opts = argParse.parse_args()
+opts = tracing.parse_args(argParse)
 
 if not any([opts.f]):
     argParse.print_usage()
     exit('Argument `-f` or `--app-ci-info-dir-path` must be specified')
 
-appCiInfoDir = opts.f
-if not os.path.isdir(appCiInfoDir):
-    exit("Given Repository path does not exist or is not a directory")
-
-appCiInfoFilePath = appCiInfoDir + '/app-ci-info.yml'
-if not os.path.isfile(appCiInfoFilePath):
-    exit("Given directory path does not contain a file named: 'app-ci-info.yml'")
-
-appCiInfoFile = open(appCiInfoFilePath)
-# Use round trip load and dump to store file with current format and comments
-appCiInfo = yaml.round_trip_load(appCiInfoFile)
-currentBuildNumber = int(appCiInfo['ci-data']['current-build-number'])
-appCiInfoFile.close()
-
-# Write new build number to file
-newBuildNumber = currentBuildNumber + 1
-with open(appCiInfoFilePath, 'w') as f:
-    appCiInfo['ci-data']['current-build-number'] = newBuildNumber
-    yaml.round_trip_dump(appCiInfo, f, default_flow_style=False)
-    print("Build Number: {}".format(newBuildNumber))
-
 try:
-    addProc = subprocess.run(['git', '-C', appCiInfoDir, 'add', appCiInfoFilePath], stdout=subprocess.PIPE, check=True)
-    print(addProc.stdout.decode('ascii').rstrip())
-    commitProc = subprocess.run(['git', '-C', appCiInfoDir, 'commit', '-m', '[Stakater] Updated Build Number to: '
-                                + str(newBuildNumber)], stdout=subprocess.PIPE, check=True)
-    print('Git Commit: {}'.format(commitProc.stdout.decode('ascii').rstrip()))
-    pushProc = subprocess.run(['git', '-C', appCiInfoDir, 'push'], stdout=subprocess.PIPE, check=True)
-    print('Git Push: {}'.format(pushProc.stdout.decode('ascii').rstrip()))
-except subprocess.CalledProcessError as addException:
-    exit("Error Code: {} \nError: {}".format(addException.returncode, addException.stderr))
+    firstBuildNumber, lastBuildNumber = api.increment_build_number(opts.f, opts.n, allocate=opts.a,
+                                                                     asyncPush=opts.asyncPush)
+except api.VersioningError as ex:
+    exit(str(ex))
+except GitError as gitException:
+    exit("Error Code: {} \nError: {}".format(gitException.returncode, gitException.stderr))
+print("Build Number: {}".format(lastBuildNumber))
+if opts.n != 1:
+    print("Reserved Build Numbers: {}-{}".format(firstBuildNumber, lastBuildNumber))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script looks up whether the current content of a repository was already built,
+# so that a stage can reuse that build's artifact and version instead of building it
+# again, e.g. on a re-run of a pipeline or after a change to the CI repo only.
+#
+# The content is the git tree of the repo's HEAD together with the major.minor.patch
+# version of its app-info.yml; generate-version.py and version-pipeline.py record it
+# with each build, see build_cache.py. Uncommitted changes are not part of it.
+# Only the app CI info file and the repo's HEAD are read, nothing is written.
+#
+# Exits with 0 and prints the build if one is found, else exits with 1.
+#
+# Argument 1 (-f, --app-ci-info-dir-path): File path to the app CI info yml file
+# Argument 2 (-d, --repo-dir): Path to the git repository directory of the app
+# Argument 3 (-o, --output): Output format: `text` (default), `shell` (KEY=value lines) or `json`
+# Argument 4 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+#
+# Note: App CI info file is the one which is required by stakater to store CI/CD related data.
+# Wheres the app info file is the one which is placed in the user's application repo containing
+# details about the repo/project and version to bump
+###############################################################################
+
+import argparse
+import json
+import os
+import shlex
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util.git_repo import GitError
+from versioning import api
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-f', '--app-ci-info-dir-path', dest='f')
+argParse.add_argument('-d', '--repo-dir', dest='d')
+argParse.add_argument('-o', '--output', dest='o', choices=['text', 'shell', 'json'], default='text')
+
+opts = tracing.parse_args(argParse)
+
+if not any([opts.d]):
+    argParse.print_usage()
+    exit('Argument `-d` or `--repo-dir` must be specified')
+
+if not any([opts.f]):
+    argParse.print_usage()
+    exit('Argument `-f` or `--app-ci-info-dir-path` must be specified')
+
+try:
+    build = api.lookup_build(opts.f, opts.d)
+except api.VersioningError as ex:
+    exit(str(ex))
+except GitError as gitException:
+    exit("Error Code: {} \nError: {}".format(gitException.returncode, gitException.stderr))
+
+if build is None:
+    if opts.o == 'json':
+        print(json.dumps(None))
+    elif opts.o == 'text':
+        print('No build found for the current content of the repository')
+    exit(1)
+
+if opts.o == 'json':
+    print(json.dumps(build))
+elif opts.o == 'shell':
+    for field in ['build-number', 'version', 'commit']:
+        print('{}={}'.format(field.replace('-', '_').upper(), shlex.quote(str(build[field]))))
+else:
+    print('Build Number: {}'.format(build['build-number']))
+    print('Version: {}'.format(build['version']))
+    print('Commit: {}'.format(build['commit']))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script releases many repos at once, as tag-release.py does for one: every
+# version is checked against the latest tag of its repo up front, then the repos are
+# tagged, get their release branch and are pushed concurrently. If tagging fails
+# anywhere, the local tags and branches created are deleted in every repo; if a push
+# fails, those of the failed repo are. See release_train.py.
+#
+# Argument 1 (-m, --manifest): Path to a JSON manifest (`-` for stdin) listing the repos to release as
+#                              [{"repo": "<repo dir>", "file": "<app-ci-info.yml>"}]
+# Argument 2 (-t, --tag-lookup): How the latest tag of each repo is found, see tag-release.py
+# Argument 3 (-j, --jobs): Number of repos processed concurrently, defaults to 8
+# Argument 4 (-o, --output): Output format of the per repo results: `text` (default) or `json`
+# Argument 5 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+#
+# Exits with 1 unless every repo was released.
+###############################################################################
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from versioning import release_train
+from versioning import tag_index
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-m', '--manifest', dest='m')
+argParse.add_argument('-t', '--tag-lookup', dest='t', choices=tag_index.LOOKUPS, default='index')
+argParse.add_argument('-j', '--jobs', dest='j', type=int, default=8)
+argParse.add_argument('-o', '--output', dest='o', choices=['text', 'json'], default='text')
+
+opts = tracing.parse_args(argParse)
+
+if not any([opts.m]):
+    argParse.print_usage()
+    exit('Argument `-m` or `--manifest` must be specified')
+
+try:
+    entries = release_train.load_manifest(opts.m)
+except (release_train.ManifestError, OSError) as ex:
+    exit(str(ex))
+
+results = release_train.run(entries, opts.t, max(1, opts.j))
+if opts.o == 'json':
+    print(json.dumps(results, indent=2))
+else:
+    for result in results:
+        print('{:<12} {:<16} {}'.format(result['status'], result['version'] or '-', result['repo']))
+        if result['error']:
+            print('    ' + result['error'].replace('\n', '\n    '))
+exit(0 if all(result['status'] == release_train.RELEASED for result in results) else 1)
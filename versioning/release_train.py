@@ -0,0 +1,148 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Coordinated release of many repos at once, e.g. every service of a product, as
+# tag-release.py does for one repo.
+#
+# A manifest is a JSON list of the repos and their app CI info files:
+#   [{"repo": "<repo dir>", "file": "<app-ci-info.yml>"}, ...]
+# The train runs in three phases, each concurrently over the repos with a bounded
+# thread pool, and stops before the next phase if any repo fails:
+#   1. check: every version must be greater than the latest tag of its repo
+#   2. create: tag each repo and create its release branch locally
+#   3. push: push each tag and branch in one atomic push
+# When the create phase fails anywhere, the local refs created in every repo are
+# deleted, so nothing is left behind. When a push fails, the local refs of that
+# repo are deleted, while repos already pushed stay released.
+###############################################################################
+
+import concurrent.futures
+import json
+import sys
+
+from util import tracing
+from util.git_repo import GitError
+from util.git_repo import GitRepo
+from versioning import api
+
+# Per repo statuses
+CHECKED = 'checked'
+INVALID = 'invalid'
+CREATED = 'created'
+RELEASED = 'released'
+FAILED = 'failed'
+ROLLED_BACK = 'rolled-back'
+SKIPPED = 'skipped'
+
+
+class ManifestError(Exception):
+    pass
+
+
+def load_manifest(path):
+    """Reads the manifest from the file, or stdin if path is `-`, and checks its entries."""
+    try:
+        if path == '-':
+            entries = json.load(sys.stdin)
+        else:
+            with open(path) as manifestFile:
+                entries = json.load(manifestFile)
+    except ValueError as ex:
+        raise ManifestError('Invalid manifest: ' + str(ex))
+    if not isinstance(entries, list):
+        raise ManifestError('Invalid manifest: expected a list of repos')
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or 'repo' not in entry or 'file' not in entry:
+            raise ManifestError('Invalid manifest: entry {} must have the keys: repo, file'.format(index))
+    return entries
+
+
+def _run_phase(name, function, cars, jobs):
+    """Runs the function on each car concurrently, recording the error of those that fail. Returns True if none did."""
+    def run(car):
+        try:
+            function(car)
+            return None
+        except (api.VersioningError, GitError, OSError) as ex:
+            return str(ex)
+
+    with tracing.span('release-train.' + name, repos=len(cars)), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        errors = list(executor.map(run, cars))
+    for car, error in zip(cars, errors):
+        if error is not None:
+            car['error'] = error
+    return all(error is None for error in errors)
+
+
+def _check(car, tagLookup):
+    car['version'] = api.check_release(car['file'], car['repo'], tagLookup)
+    car['status'] = CHECKED
+
+
+def _create(car):
+    repo = GitRepo(car['repo'])
+    repo.tag(car['version'], 'Release: {}'.format(car['version']))
+    car['created'].append((repo.delete_tag, car['version']))
+    car['branch'] = 'release-v' + car['version']
+    repo.branch(car['branch'], car['version'])
+    car['created'].append((repo.delete_branch, car['branch']))
+    car['status'] = CREATED
+
+
+def _push(car):
+    GitRepo(car['repo']).push(car['version'], car['branch'], remote='origin', atomic=True)
+    car['status'] = RELEASED
+
+
+def _roll_back(car):
+    """Deletes the local refs the train created in the car's repo."""
+    while car['created']:
+        delete, name = car['created'].pop()
+        delete(name)
+    car['status'] = ROLLED_BACK if car['error'] is None else FAILED
+
+
+def run(entries, tagLookup='index', jobs=8):
+    """Releases every repo of the manifest. Returns one result per repo, in order, as a dict with its `repo`,
+    `version`, `branch`, `status` and `error`.
+    """
+    cars = [{'repo': entry['repo'], 'file': entry['file'], 'version': None, 'branch': None, 'status': SKIPPED,
+             'error': None, 'created': []} for entry in entries]
+    if not _run_phase('check', lambda car: _check(car, tagLookup), cars, jobs):
+        for car in cars:
+            car['status'] = SKIPPED if car['error'] is None else INVALID
+    elif not _run_phase('create', _create, cars, jobs):
+        # All or nothing: remove every ref created, including the partial ones of the failed repos
+        _run_phase('roll-back', _roll_back, cars, jobs)
+    elif not _run_phase('push', _push, cars, jobs):
+        _run_phase('roll-back', _roll_back, [car for car in cars if car['status'] != RELEASED], jobs)
+    return [{key: value for key, value in car.items() if key != 'created'} for car in cars]
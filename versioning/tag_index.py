@@ -0,0 +1,202 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Index of the version tags (major.minor.patch+build-number) of a git repo, used to
+# find the highest version tag instead of the nearest one `git describe` returns.
+#
+# Tag names are read straight from the repo's packed-refs file and refs/tags dir, without
+# walking history. The sorted index is kept in .git/stakater-tag-index.json: on later
+# runs packed-refs is only re-parsed if it changed, new tags are inserted into the
+# sorted list, whose last entry is the highest version tag.
+#
+# Shallow clones, e.g. `git clone --depth 1`, lack most tags, so neither the index nor
+# `git describe` can be trusted there. The `remote` lookup lists the tags of origin with
+# `git ls-remote` instead, which only transfers the tag names and needs no history.
+###############################################################################
+
+import bisect
+import json
+import os
+
+from util import tracing
+from util.git_repo import GitRepo
+from versioning.version import Version
+
+INDEX_FILE_NAME = 'stakater-tag-index.json'
+TAGS_PREFIX = 'refs/tags/'
+LOOKUPS = ('index', 'describe', 'remote')
+
+
+class TagLookupError(Exception):
+    pass
+
+
+def version_key(tag):
+    """Returns the sort key [major, minor, patch, build, tag] of a version tag, or None if it is not one."""
+    version = Version.try_parse(tag)
+    return None if version is None else list(version) + [tag]
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def _read_packed_tags(path):
+    tags = []
+    try:
+        with open(path, 'r') as packedRefs:
+            for line in packedRefs:
+                # Skip the header and peeled lines (^<sha>)
+                if line.startswith('#') or line.startswith('^'):
+                    continue
+                ref = line.rstrip('\n').split(' ', 1)[-1]
+                if ref.startswith(TAGS_PREFIX):
+                    tags.append(ref[len(TAGS_PREFIX):])
+    except FileNotFoundError:
+        pass
+    return tags
+
+
+def _read_loose_tags(tagsDir):
+    tags = []
+    for root, dirs, files in os.walk(tagsDir):
+        relative = os.path.relpath(root, tagsDir)
+        for name in files:
+            tags.append(name if relative == '.' else relative.replace(os.sep, '/') + '/' + name)
+    return tags
+
+
+class TagIndex(object):
+    def __init__(self, repoDir):
+        self.repoDir = repoDir
+        self.gitDir = os.path.join(repoDir, '.git')
+        self.indexPath = os.path.join(self.gitDir, INDEX_FILE_NAME)
+        self.keys = []
+        self.refresh()
+
+    def _load_index(self):
+        try:
+            with open(self.indexPath, 'r') as indexFile:
+                return json.load(indexFile)
+        except (OSError, ValueError):
+            return {'packedStamp': None, 'packed': [], 'keys': []}
+
+    def _save_index(self, index):
+        tmpPath = '{}.{}.tmp'.format(self.indexPath, os.getpid())
+        try:
+            with open(tmpPath, 'w') as indexFile:
+                json.dump(index, indexFile, separators=(',', ':'))
+            os.replace(tmpPath, self.indexPath)
+        except OSError:
+            # The index is only an optimization
+            pass
+
+    def _tag_names(self, index):
+        """Returns all tag names, and whether packed-refs had to be re-read."""
+        if not os.path.isdir(self.gitDir):
+            # e.g. a worktree, where .git is a file; let git resolve the refs
+            output = GitRepo(self.repoDir).run('for-each-ref', '--format=%(refname:short)', TAGS_PREFIX)
+            return set(output.split('\n')) if output else set(), index['packed'], False
+        packedPath = os.path.join(self.gitDir, 'packed-refs')
+        packedStamp = _stamp(packedPath)
+        packed = index['packed']
+        changed = packedStamp != index['packedStamp']
+        if changed:
+            packed = [tag for tag in _read_packed_tags(packedPath) if Version.try_parse(tag)]
+            index['packedStamp'] = packedStamp
+            index['packed'] = packed
+        loose = _read_loose_tags(os.path.join(self.gitDir, 'refs', 'tags'))
+        return set(packed).union(loose), packed, changed
+
+    def refresh(self):
+        """Brings the index up to date with the tags of the repo."""
+        with tracing.span('tags.index-refresh', repo=self.repoDir) as span:
+            self._refresh()
+            span.set(tags=len(self.keys))
+
+    def _refresh(self):
+        index = self._load_index()
+        names, packed, changed = self._tag_names(index)
+        names = set(name for name in names if Version.try_parse(name))
+        keys = index['keys']
+        indexed = set(key[-1] for key in keys)
+        if indexed == names and not changed:
+            self.keys = keys
+            return
+        if indexed <= names:
+            for name in names - indexed:
+                bisect.insort(keys, version_key(name))
+        else:
+            # Tags were deleted, rebuild
+            keys = sorted(version_key(name) for name in names)
+        index['keys'] = keys
+        self.keys = keys
+        self._save_index(index)
+
+    def latest(self):
+        """Returns the highest version tag, or None if the repo has no version tags."""
+        return self.keys[-1][-1] if self.keys else None
+
+
+def is_shallow(repoDir):
+    gitDir = os.path.join(repoDir, '.git')
+    if os.path.isdir(gitDir):
+        return os.path.isfile(os.path.join(gitDir, 'shallow'))
+    return GitRepo(repoDir, native=False).run('rev-parse', '--is-shallow-repository') == 'true'
+
+
+def latest_remote_tag(repoDir, remote='origin'):
+    """Returns the highest version tag of the remote, or None if it has no version tags."""
+    with tracing.span('tags.remote-lookup', remote=remote):
+        keys = [key for key in map(version_key, GitRepo(repoDir, native=False).remote_tags(remote)) if key]
+    return max(keys)[-1] if keys else None
+
+
+def latest_tag(repoDir, lookup='index'):
+    """Returns the latest version tag of the repo: the highest with lookup `index`, the nearest with `describe`,
+    or the highest of origin with `remote`.
+
+    Raises TagLookupError if a local lookup finds no tag in a shallow clone, rather than taking it as untagged.
+    """
+    if lookup == 'remote':
+        return latest_remote_tag(repoDir)
+    if lookup == 'describe':
+        tag = GitRepo(repoDir).latest_tag()
+    else:
+        tag = TagIndex(repoDir).latest()
+    if tag is None and is_shallow(repoDir):
+        raise TagLookupError('No tags found in "{}", which is a shallow clone that may lack the tags of the repo.\n'
+                             'Use the `remote` tag lookup to read the tags of origin instead'.format(repoDir))
+    return tag
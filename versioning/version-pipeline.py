@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# This script runs inc-build-number.py, generate-version.py and tag-release.py as one
+# step in a single process. The build number and version are committed and pushed to
+# the CI info repo once, and the latest tag of the repo is only looked up once.
+#
+# Argument 1 (-f, --app-ci-info-dir-path): Path to the directory containing the app CI info yml file
+# Argument 2 (-d, --repo-dir): Path to the git repository directory for which the version is to be generated
+# Argument 3 (--no-tag): Only increment the build number and generate the version, without tagging a release
+# Argument 4 (-t, --tag-lookup): How the latest tag is found: `index` (default) takes the highest
+#                              major.minor.patch+build-number tag of the repo, `describe` the nearest tag
+#                              reachable from HEAD as returned by `git describe --tags`, `remote` the highest
+#                              tag of origin, listed with `git ls-remote`. Use `remote` in shallow clones
+# Argument 5 (-p, --plan): Only print what the run would change, as a diff of the app CI info file and
+#                         whether the version could be tagged, without writing anything or running git
+#                         commands. `text` (default) or `json`
+# Argument 6 (--trace): Write a trace of the time spent per phase to this file, see util/tracing.py
+###############################################################################
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from util import tracing
+from util.git_repo import GitError
+from versioning import api
+from versioning import tag_index
+from versioning import version_pipeline
+
+argParse = argparse.ArgumentParser()
+argParse.add_argument('-f', '--app-ci-info-dir-path', dest='f')
+argParse.add_argument('-d', '--repo-dir', dest='d')
+argParse.add_argument('--no-tag', dest='noTag', action='store_true')
+argParse.add_argument('-t', '--tag-lookup', dest='t', choices=tag_index.LOOKUPS, default='index')
+argParse.add_argument('-p', '--plan', dest='p', nargs='?', const='text', choices=['text', 'json'])
+
+opts = tracing.parse_args(argParse)
+
+if not any([opts.d]):
+    argParse.print_usage()
+    exit('Argument `-d` or `--repo-dir` must be specified')
+
+if not any([opts.f]):
+    argParse.print_usage()
+    exit('Argument `-f` or `--app-ci-info-dir-path` must be specified')
+
+if opts.p:
+    # Plan only: no writes and no git commands
+    try:
+        versionPlan = api.plan(opts.f, opts.d, opts.t)
+    except api.VersioningError as ex:
+        exit(str(ex))
+    except GitError as gitException:
+        exit("Error Code: {} \nError: {}".format(gitException.returncode, gitException.stderr))
+    print(json.dumps(versionPlan, indent=2) if opts.p == 'json' else api.format_plan(versionPlan))
+    exit(0)
+
+repoDir = opts.d
+if not os.path.isdir(repoDir):
+    exit("Given Repository path does not exist or is not a directory")
+if not os.path.isdir(repoDir + '/.git'):
+    exit("Given repository directory is not a git repository")
+if not os.path.isdir(opts.f):
+    exit("Given Repository path does not exist or is not a directory")
+
+try:
+    version_pipeline.run(opts.f, repoDir, tag=not opts.noTag, tagLookup=opts.t)
+except (version_pipeline.VersioningError, GitError) as ex:
+    exit(str(ex))
@@ -0,0 +1,72 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Version of the format <major>.<minor>.<patch>+<build-number>, as generated by
+# generate-version.py and used for release tags.
+#
+# Version is a named tuple of ints, so it is compact, hashable and totally ordered
+# with comparisons done natively on the tuple, which keeps sorting and max() over
+# thousands of tags cheap.
+###############################################################################
+
+import collections
+import re
+
+VERSION_PATTERN = re.compile(r'([0-9]+)\.([0-9]+)\.([0-9]+)\+([0-9]+)')
+
+
+class Version(collections.namedtuple('Version', ['major', 'minor', 'patch', 'build'])):
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text):
+        """Parses major.minor.patch+build-number, raising ValueError if the whole text is not of that format."""
+        match = VERSION_PATTERN.fullmatch(text)
+        if not match:
+            raise ValueError('"{}" is not of the format: "major.minor.patch+build-number"'.format(text))
+        return cls._make(map(int, match.groups()))
+
+    @classmethod
+    def try_parse(cls, text):
+        """Returns the parsed version, or None if the text is not of the format."""
+        match = VERSION_PATTERN.fullmatch(text)
+        return cls._make(map(int, match.groups())) if match else None
+
+    @property
+    def release(self):
+        """The (major, minor, patch) part, without the build number."""
+        return self[:3]
+
+    def with_build(self, build):
+        return self._replace(build=int(build))
+
+    def __str__(self):
+        return '{}.{}.{}+{}'.format(*self)
@@ -0,0 +1,168 @@
+###############################################################################
+# Copyright 2017 Aurora Solutions
+#
+#    http://www.aurorasolutions.io
+#
+# Aurora Solutions is an innovative services and product company at
+# the forefront of the software industry, with processes and practices
+# involving Domain Driven Design(DDD), Agile methodologies to build
+# scalable, secure, reliable and high performance products.
+#
+# Stakater is an Infrastructure-as-a-Code DevOps solution to automate the
+# creation of web infrastructure stack on Amazon. Stakater is a collection
+# of Blueprints; where each blueprint is an opinionated, reusable, tested,
+# supported, documented, configurable, best-practices definition of a piece
+# of infrastructure. Stakater is based on Docker, CoreOS, Terraform, Packer,
+# Docker Compose, GoCD, Fleet, ETCD, and much more.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+###############################################################################
+# Runs the whole versioning flow of inc-build-number.py, generate-version.py and
+# tag-release.py in one process: the app CI info file is parsed once, the latest tag
+# is looked up once, and the build number and version are written with a single
+# commit and push to the CI info repo.
+#
+# Note: App CI info file is the one which is required by stakater to store CI/CD related data.
+# Wheres the app info file is the one which is placed in the user's application repo containing
+# details about the repo/project and version to bump
+###############################################################################
+
+import os
+
+from util import ci_info
+from util import ci_info_cache
+from util import ci_info_shards
+from util.git_repo import GitRepo
+from versioning import build_cache
+from versioning import tag_index
+from versioning.version import Version
+
+APP_INFO_FILE_NAME = 'app-info.yml'
+APP_CI_INFO_FILE_NAME = 'app-ci-info.yml'
+
+
+class VersioningError(Exception):
+    pass
+
+
+def _parse_tag(latestTag):
+    try:
+        return Version.parse(latestTag)
+    except ValueError:
+        raise VersioningError('The latest tag assigned to the commit is not of the format: '
+                              '"major.minor.patch+build-number"\n'
+                              'Please make sure the latest tag on your git repo is of the given '
+                              'format or the repo does not have any tags')
+
+
+def latest_tag(repoDir, tagLookup):
+    """Returns the latest version tag of the repo, see tag_index.latest_tag."""
+    try:
+        return tag_index.latest_tag(repoDir, tagLookup)
+    except tag_index.TagLookupError as ex:
+        raise VersioningError(str(ex))
+
+
+def resolve_ci_info_path(path, create=False):
+    """Returns the path of the app CI info file or directory in its shard, see ci_info_shards.resolve."""
+    try:
+        return ci_info_shards.resolve(path, create)
+    except ci_info_shards.ShardError as ex:
+        raise VersioningError(str(ex))
+
+
+def next_version(appInfo, buildNumber, latestTag):
+    """Returns the version for the build, as generate-version.py does."""
+    appVersion = Version(int(appInfo['version']['major']), int(appInfo['version']['minor']),
+                         int(appInfo['version']['patch']), int(buildNumber))
+    if latestTag is None:
+        return appVersion
+    latest = _parse_tag(latestTag)
+    # Greater major, minor or patch in app-info.yml means the version was bumped
+    return appVersion if appVersion.release > latest.release else latest.with_build(buildNumber)
+
+
+def validate_release(version, latestTag):
+    """Raises VersioningError unless the version can be released on top of the latest tag, as tag-release.py does."""
+    try:
+        version = Version.parse(str(version))
+    except ValueError:
+        raise VersioningError('The given version in the app ci yml file is not of the format: '
+                              '"major.minor.patch+build-number"\nPlease make sure that the version is of the given format')
+    if latestTag is not None and not version > _parse_tag(latestTag):
+        raise VersioningError('The given version is not greater/higher than the version on the latest git tag\n'
+                              'Please Make sure the given version is greater or higher than the version on the '
+                              'latest git tag')
+
+
+def push_release(repo, version):
+    """Tags the current commit with the version, creates the release branch and pushes both in one push.
+
+    Returns the name of the release branch.
+    """
+    branchName = 'release-v' + version
+    repo.tag(version, 'Release: {}'.format(version))
+    repo.branch(branchName, version)
+    repo.push(version, branchName, remote='origin')
+    return branchName
+
+
+def print_release(version, branchName):
+    print("Tag {} assigned successfully".format(version))
+    print('Release Branch {} created successfully'.format(branchName))
+    print('Tag {} pushed successfully'.format(version))
+    print('Release branch {} pushed successfully'.format(branchName))
+
+
+def run(appCiInfoDir, repoDir, tag=True, tagLookup='index'):
+    """Increments the build number, generates the version and optionally tags the release. Returns the version."""
+    appCiInfoDir = resolve_ci_info_path(appCiInfoDir, create=True)
+    appInfoFilePath = os.path.join(repoDir, APP_INFO_FILE_NAME)
+    appCiInfoFilePath = os.path.join(appCiInfoDir, APP_CI_INFO_FILE_NAME)
+    if not os.path.isfile(appInfoFilePath):
+        raise VersioningError('Given repository does not contain a "app-info.yml" file.\n Please make sure you place '
+                              'that file with version info in the repository directory.')
+    if not os.path.isfile(appCiInfoFilePath):
+        raise VersioningError("Given directory path does not contain a file named: 'app-ci-info.yml'")
+
+    repo = GitRepo(repoDir)
+    ciInfoRepo = GitRepo(appCiInfoDir)
+    appInfo = ci_info_cache.load(appInfoFilePath)
+    appCiInfo = ci_info_cache.load(appCiInfoFilePath)
+    latestTag = latest_tag(repoDir, tagLookup)
+
+    buildNumber = int(appCiInfo['ci-data']['current-build-number']) + 1
+    version = str(next_version(appInfo, buildNumber, latestTag))
+    if tag:
+        validate_release(version, latestTag)
+
+    key, commitId = build_cache.current_build(repoDir, appInfo)
+    properties = build_cache.record(appCiInfo, key, commitId, buildNumber, version)
+    properties.update({
+        'ci-data.current-build-number': buildNumber,
+        'ci-data.current-version': version,
+    })
+    ci_info.update(appCiInfoFilePath, properties)
+    print("Build Number: {}".format(buildNumber))
+    print("New version: {}".format(version))
+
+    ciInfoRepo.add(os.path.abspath(appCiInfoFilePath))
+    print('Git Commit: {}'.format(ciInfoRepo.commit('[Stakater] Updated Build Number to: {} and Version to: {}'
+                                                     .format(buildNumber, version))))
+    ciInfoRepo.push()
+
+    if tag:
+        print_release(version, push_release(repo, version))
+    return version